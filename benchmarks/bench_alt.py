@@ -0,0 +1,96 @@
+"""
+Compare A* with the octile heuristic and ALT (landmark bounds),
+including preprocessing and reloading of the landmark tables.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_alt.py [size [queries [landmarks]]]``.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from topopy.primitives.landmarks import AVOID, FARTHEST, get_landmark_path
+from topopy.primitives.movement import SimpleRectangularMovement
+from topopy.primitives.strategy import (
+    ALTDistanceStrategy, AStarDistanceStrategy
+)
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import NumpyRectangularTopology
+
+
+def make_topology(size, seed=0):
+    """Long walls with a few gaps, so that paths make long detours"""
+    rnd = random.Random(seed)
+    floor = KeyTile.from_key('.')
+    wall = KeyTile.from_key('#')
+    rows = [[floor] * size for _ in range(size)]
+    for line in range(8, size, 8):
+        for i in range(size):
+            rows[line][i] = wall
+        for _ in range(2):
+            rows[line][rnd.randrange(size)] = floor
+    return NumpyRectangularTopology(rows)
+
+
+def run(strategy, topo, movement, queries):
+    start = time.perf_counter()
+    results = [
+        strategy.get_path(topo, movement, src, dst)[0]
+        for src, dst in queries
+    ]
+    return results, time.perf_counter() - start
+
+
+def main(size=256, query_count=50, landmark_count=8):
+    movement = SimpleRectangularMovement(
+        diagonal=True, weight_map={('.', '.'): 1}
+    )
+    topo = make_topology(size)
+    loc = topo.location_class
+    rnd = random.Random(1)
+    queries = [
+        (loc(rnd.randrange(size), rnd.randrange(size)),
+         loc(rnd.randrange(size), rnd.randrange(size)))
+        for _ in range(query_count)
+    ]
+    print('{} x {} grid, {} queries, {} landmarks'.format(
+        size, size, query_count, landmark_count
+    ))
+
+    expected, elapsed = run(AStarDistanceStrategy(), topo, movement, queries)
+    print('{:<24} {:8.3f} s'.format('A*, octile', elapsed))
+
+    for selection in (FARTHEST, AVOID):
+        strategy = ALTDistanceStrategy(
+            landmark_count=landmark_count, selection=selection
+        )
+        start = time.perf_counter()
+        table = strategy.get_landmarks(topo, movement)
+        print('{:<24} {:8.3f} s, {} KiB'.format(
+            'preprocessing, ' + selection, time.perf_counter() - start,
+            table.nbytes // 1024
+        ))
+        results, elapsed = run(strategy, topo, movement, queries)
+        print('{:<24} {:8.3f} s'.format('ALT, ' + selection, elapsed))
+        assert all(
+            (a is None) == (b is None) or abs(a - b) < 1e-6
+            for a, b in zip(results, expected)
+        )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = get_landmark_path(os.path.join(tmp_dir, 'map.txt'))
+        strategy.save_landmarks(topo, movement, path)
+        restarted = ALTDistanceStrategy(
+            landmark_count=landmark_count, selection=selection
+        )
+        start = time.perf_counter()
+        restarted.load_landmarks(topo, movement, path)
+        print('{:<24} {:8.3f} s'.format(
+            'reload', time.perf_counter() - start
+        ))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,76 @@
+"""
+Compare the number of expanded nodes and the query time of Dijkstra,
+A* and weighted A* on an open grid with a few walls.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_astar.py [size ...]``.
+"""
+import sys
+import timeit
+from itertools import product
+
+from topopy.primitives.heuristic import default_heuristic
+from topopy.primitives.movement import SimpleRectangularMovement
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import RectangularTopology
+from topopy.primitives.utils import astar, dijkstra
+
+
+def make_topology(size, walls):
+    floor, wall = KeyTile.from_key('.'), KeyTile.from_key('#')
+    matrix = [[floor] * size for _ in range(size)]
+    for x in range(size // 4, size, size // 4 or 1) if walls else ():
+        for y in range(size // 8, size - size // 8):
+            matrix[x][y] = wall
+    return RectangularTopology(matrix)
+
+
+def counting(get_neighbors, counter):
+    def wrapper(node):
+        counter[0] += 1
+        return get_neighbors(node)
+
+    return wrapper
+
+
+def main(sizes=(32, 64, 128), repeat=3):
+    print('{:>6} {:>6} {:>20} {:>10} {:>10} {:>10}'.format(
+        'size', 'map', 'search', 'distance', 'expanded', 'time, s'
+    ))
+    for size, walls, diagonal in product(sizes, (False, True),
+                                         (False, True)):
+        topo = make_topology(size, walls)
+        movement = SimpleRectangularMovement(
+            diagonal=diagonal, weight_map={('.', '.'): 1}
+        )
+        graph = topo.to_graph(movement)
+        src = topo.location_class(0, size // 2)
+        dst = topo.location_class(size - 1, size // 2)
+        heuristic = default_heuristic(movement)
+
+        def neighbors(loc):
+            return graph.get(loc, {}).items()
+
+        searches = (
+            ('dijkstra', lambda get: dijkstra.find_path(get, src, dst)),
+            ('a*', lambda get: astar.find_path(
+                get, src, dst, lambda loc: heuristic(loc, dst))),
+            ('weighted a*', lambda get: astar.find_path(
+                get, src, dst, lambda loc: heuristic(loc, dst),
+                weight=1.5)),
+        )
+        for name, search in searches:
+            counter = [0]
+            dist, _ = search(counting(neighbors, counter))
+            elapsed = min(timeit.repeat(
+                lambda: search(neighbors), number=1, repeat=repeat
+            ))
+            print('{:>6} {:>6} {:>20} {:>10.2f} {:>10} {:>10.4f}'.format(
+                size, 'walls' if walls else 'open',
+                name + (' (diag)' if diagonal else ''),
+                dist, counter[0], elapsed
+            ))
+
+
+if __name__ == '__main__':
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (32, 64, 128))
@@ -0,0 +1,71 @@
+"""
+Compare answering many path queries one by one with the grouped
+``get_paths`` batch API, in process and on a process pool.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_batch.py [size [sources [targets]]]``.
+"""
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from topopy.primitives.batch import get_paths
+from topopy.primitives.movement import SimpleRectangularMovement
+from topopy.primitives.strategy import DijkstraDistanceStrategy
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import NumpyRectangularTopology
+
+
+def make_topology(size, wall_ratio=0.2, seed=0):
+    rnd = random.Random(seed)
+    floor = KeyTile.from_key('.')
+    wall = KeyTile.from_key('#')
+    return NumpyRectangularTopology([
+        [wall if rnd.random() < wall_ratio else floor for _ in range(size)]
+        for _ in range(size)
+    ])
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main(size=128, sources=8, targets=32):
+    movement = SimpleRectangularMovement(
+        diagonal=True, weight_map={('.', '.'): 1}
+    )
+    topo = make_topology(size)
+    loc = topo.location_class
+    rnd = random.Random(1)
+    cells = [loc(rnd.randrange(size), rnd.randrange(size))
+             for _ in range(sources + targets)]
+    pairs = [(src, dst) for src in cells[:sources] for dst in cells[sources:]]
+    print('{} x {} grid, {} queries'.format(size, size, len(pairs)))
+
+    strategy = DijkstraDistanceStrategy()
+    expected, elapsed = timed(lambda: [
+        strategy.get_path(topo, movement, src, dst) for src, dst in pairs
+    ])
+    print('{:<24} {:8.3f} s'.format('one by one', elapsed))
+
+    results, elapsed = timed(lambda: get_paths(topo, movement, pairs))
+    print('{:<24} {:8.3f} s'.format('grouped', elapsed))
+    assert [r[0] for r in results] == [e[0] for e in expected]
+
+    with ProcessPoolExecutor() as executor:
+        results, elapsed = timed(
+            lambda: get_paths(topo, movement, pairs, executor=executor)
+        )
+    print('{:<24} {:8.3f} s'.format('grouped, process pool', elapsed))
+    assert all(
+        (r[0] is None) == (e[0] is None) and
+        (r[0] is None or abs(r[0] - e[0]) < 1e-3)
+        for r, e in zip(results, expected)
+    )
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
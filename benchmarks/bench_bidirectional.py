@@ -0,0 +1,71 @@
+"""
+Compare unidirectional and bidirectional Dijkstra and A*
+on long cross-map queries.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_bidirectional.py [size [queries]]``.
+"""
+import random
+import sys
+import time
+
+from topopy.primitives.movement import SimpleRectangularMovement
+from topopy.primitives.strategy import (
+    AStarDistanceStrategy, BidirectionalAStarDistanceStrategy,
+    BidirectionalDijkstraDistanceStrategy, DijkstraDistanceStrategy
+)
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import NumpyRectangularTopology
+
+
+def make_topology(size, wall_ratio=0.25, seed=0):
+    rnd = random.Random(seed)
+    floor = KeyTile.from_key('.')
+    wall = KeyTile.from_key('#')
+    return NumpyRectangularTopology([
+        [wall if rnd.random() < wall_ratio else floor for _ in range(size)]
+        for _ in range(size)
+    ])
+
+
+def main(size=256, query_count=10):
+    movement = SimpleRectangularMovement(
+        diagonal=True, weight_map={('.', '.'): 1}
+    )
+    topo = make_topology(size)
+    loc = topo.location_class
+    rnd = random.Random(1)
+    queries = [
+        (loc(rnd.randrange(size // 4), rnd.randrange(size)),
+         loc(size - 1 - rnd.randrange(size // 4), rnd.randrange(size)))
+        for _ in range(query_count)
+    ]
+    print('{} x {} grid, {} cross-map queries'.format(
+        size, size, query_count
+    ))
+
+    expected = None
+    for name, strategy in (
+            ('Dijkstra', DijkstraDistanceStrategy()),
+            ('bidirectional Dijkstra',
+             BidirectionalDijkstraDistanceStrategy()),
+            ('A*', AStarDistanceStrategy()),
+            ('bidirectional A*', BidirectionalAStarDistanceStrategy()),
+    ):
+        start = time.perf_counter()
+        distances = [
+            strategy.get_path(topo, movement, src, dst)[0]
+            for src, dst in queries
+        ]
+        elapsed = time.perf_counter() - start
+        print('{:<24} {:8.3f} s'.format(name, elapsed))
+        if expected is None:
+            expected = distances
+        assert all(
+            (a is None) == (b is None) and (a is None or abs(a - b) < 1e-6)
+            for a, b in zip(distances, expected)
+        )
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
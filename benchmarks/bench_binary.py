@@ -0,0 +1,68 @@
+"""
+Compare saving and loading a map as characters and in the binary
+format, raw (memory-mapped), zlib-compressed and run-length encoded.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_binary.py [size]``.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import NumpyRectangularTopology
+from topopy.serialization.topology import (
+    RectangularBinarySerializer, RectangularCharSerializer
+)
+
+
+def make_topology(size, seed=0):
+    rnd = np.random.RandomState(seed)
+    # Blocks of equal tiles, as in real maps
+    blocks = rnd.randint(0, 3, size=(size // 8 + 1, size // 8 + 1))
+    keys = np.kron(blocks, np.ones((8, 8), dtype=np.int64))[:size, :size]
+    return NumpyRectangularTopology.from_array(
+        keys.astype(np.uint16), [KeyTile.from_key(key) for key in '.,#']
+    )
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main(size=4096):
+    topo = make_topology(size)
+    char_serializer = RectangularCharSerializer(
+        topology_class=NumpyRectangularTopology
+    )
+    print('{} x {} map'.format(size, size))
+    print('{:<10} {:>10} {:>10} {:>10}'.format(
+        '', 'size, MB', 'save, s', 'load, s'
+    ))
+    with tempfile.TemporaryDirectory() as path:
+        file_name = os.path.join(path, 'map')
+        _, save_time = timed(char_serializer.serialize, topo)
+        data = char_serializer.serialize(topo)
+        _, load_time = timed(char_serializer.deserialize, data)
+        print('{:<10} {:10.1f} {:10.3f} {:10.3f}'.format(
+            'chars', len(data) / 2**20, save_time, load_time
+        ))
+        for compression in (None, 'zlib', 'rle'):
+            serializer = RectangularBinarySerializer(compression=compression)
+            _, save_time = timed(serializer.save, topo, file_name)
+            loaded, load_time = timed(serializer.load, file_name)
+            assert np.array_equal(loaded.keys, topo.keys)
+            print('{:<10} {:10.1f} {:10.3f} {:10.4f}'.format(
+                compression or 'raw', os.path.getsize(file_name) / 2**20,
+                save_time, load_time
+            ))
+            del loaded
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,76 @@
+"""
+Compare query latency of Dijkstra with contraction hierarchies
+and report the preprocessing cost.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_ch.py [size [queries]]``.
+"""
+import random
+import sys
+import time
+
+from topopy.primitives.movement import SimpleRectangularMovement
+from topopy.primitives.strategy import (
+    ContractionHierarchyStrategy, DijkstraDistanceStrategy
+)
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import NumpyRectangularTopology
+
+
+def make_topology(size, wall_ratio=0.2, seed=0):
+    rnd = random.Random(seed)
+    floor = KeyTile.from_key('.')
+    wall = KeyTile.from_key('#')
+    return NumpyRectangularTopology([
+        [wall if rnd.random() < wall_ratio else floor for _ in range(size)]
+        for _ in range(size)
+    ])
+
+
+def run(strategy, topo, movement, queries):
+    start = time.perf_counter()
+    results = [
+        strategy.get_path(topo, movement, src, dst)[0]
+        for src, dst in queries
+    ]
+    return results, (time.perf_counter() - start) / len(queries)
+
+
+def main(size=64, query_count=200):
+    movement = SimpleRectangularMovement(
+        diagonal=True, weight_map={('.', '.'): 1}
+    )
+    topo = make_topology(size)
+    loc = topo.location_class
+    rnd = random.Random(1)
+    queries = [
+        (loc(rnd.randrange(size), rnd.randrange(size)),
+         loc(rnd.randrange(size), rnd.randrange(size)))
+        for _ in range(query_count)
+    ]
+    print('{} x {} grid, {} queries'.format(size, size, query_count))
+
+    strategy = ContractionHierarchyStrategy()
+    stats = strategy.get_hierarchy(topo, movement).stats
+    print('preprocessing {:.2f} s, {} nodes, {} edges, {} shortcuts, '
+          '{} KiB'.format(
+              stats['preprocessing_time'], stats['nodes'], stats['edges'],
+              stats['shortcuts'], stats['nbytes'] // 1024
+          ))
+
+    expected, latency = run(
+        DijkstraDistanceStrategy(), topo, movement, queries
+    )
+    print('{:<16} {:8.3f} ms / query'.format('Dijkstra', latency * 1000))
+    results, latency = run(strategy, topo, movement, queries)
+    print('{:<16} {:8.3f} ms / query'.format(
+        'CH', latency * 1000
+    ))
+    assert all(
+        (a is None) == (b is None) and (a is None or abs(a - b) < 1e-3)
+        for a, b in zip(results, expected)
+    )
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
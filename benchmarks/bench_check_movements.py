@@ -0,0 +1,74 @@
+"""
+Compare checking the moves of many actors one by one
+(``TopoActor.check_movement``) and at once (``World.check_movements``).
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_check_movements.py [actors]``.
+"""
+import random
+import sys
+import time
+
+from topopy.primitives.location import IntLocation2D
+from topopy.primitives.movement import SimpleRectangularMovement
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import NumpyRectangularTopology
+from topopy.world.world import TopoActor, World
+
+
+def best_of(function, *args, repeat=20):
+    """Return the result and the shortest time of several calls"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def main(actor_count=10000, size=512):
+    rnd = random.Random(0)
+    tiles = [KeyTile.from_key(key) for key in '...,#']
+    topology = NumpyRectangularTopology(
+        [[rnd.choice(tiles) for _ in range(size)] for _ in range(size)]
+    )
+    movement = SimpleRectangularMovement(diagonal=True, weight_map={
+        ('.', '.'): 1, ('.', ','): 3, (',', '.'): 1, (',', ','): 2
+    })
+    world = World(
+        loop=None, client=None, topologies={'ground': topology}, actors=[]
+    )
+    targets = []
+    for actor_id in range(actor_count):
+        loc = IntLocation2D(rnd.randrange(size), rnd.randrange(size))
+        world.actors[actor_id] = TopoActor(
+            loop=None, client=None, id=actor_id, world=world, loc=loc,
+            movement_strategies={'ground': movement}
+        )
+        targets.append(IntLocation2D(
+            loc.x + rnd.randint(-1, 1), loc.y + rnd.randint(-1, 1)
+        ))
+    actor_ids = list(world.actors)
+
+    def check_each():
+        return [
+            world.actors[actor_id].check_movement(target)
+            for actor_id, target in zip(actor_ids, targets)
+        ]
+
+    expected, single_time = best_of(check_each)
+    mask, bulk_time = best_of(world.check_movements, actor_ids, targets)
+    assert mask.tolist() == expected
+
+    print('{} actors, {} moves possible'.format(actor_count, mask.sum()))
+    print('{:<16} {:>10}'.format('', 'us/move'))
+    print('{:<16} {:10.2f}'.format(
+        'check_movement', single_time / actor_count * 1e6
+    ))
+    print('{:<16} {:10.2f}'.format(
+        'check_movements', bulk_time / actor_count * 1e6
+    ))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
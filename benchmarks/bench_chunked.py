@@ -0,0 +1,74 @@
+"""
+Compare A* on a dense map and on the same map split in chunks,
+held in memory or loaded lazily from a store with a small budget.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_chunked.py [size [queries]]``.
+"""
+import random
+import sys
+import tempfile
+import time
+
+from topopy.primitives.chunked import ChunkedTopology, SQLiteChunkStore
+from topopy.primitives.movement import SimpleRectangularMovement
+from topopy.primitives.strategy import AStarDistanceStrategy
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import NumpyRectangularTopology
+
+
+def make_matrix(size, seed=0):
+    rnd = random.Random(seed)
+    tiles = [KeyTile.from_key(key) for key in '...,#']
+    return [[rnd.choice(tiles) for _ in range(size)] for _ in range(size)]
+
+
+def make_chunked(dense, **kwargs):
+    topo = ChunkedTopology(default_tile=KeyTile.from_key('#'), **kwargs)
+    locs = list(dense.all_locations())
+    topo.update_many(locs, [dense[loc] for loc in locs])
+    return topo
+
+
+def main(size=512, query_count=20):
+    weight_map = {
+        ('.', '.'): 1, ('.', ','): 3, (',', '.'): 1, (',', ','): 2
+    }
+    movement = SimpleRectangularMovement(diagonal=True, weight_map=weight_map)
+    dense = NumpyRectangularTopology(make_matrix(size))
+    locs = list(dense.all_locations())
+    rnd = random.Random(1)
+    queries = [
+        (rnd.choice(locs), rnd.choice(locs)) for _ in range(query_count)
+    ]
+
+    with tempfile.TemporaryDirectory() as path:
+        store = SQLiteChunkStore(path + '/chunks.db')
+        stored = make_chunked(dense, store=store, memory_budget=32 * 8192)
+        stored.flush()
+        maps = [
+            ('dense', dense),
+            ('chunked', make_chunked(dense)),
+            ('stored', stored),
+        ]
+        print('{} x {} map, {} A* queries, chunks of 64 x 64'.format(
+            size, size, query_count
+        ))
+        print('{:<10} {:>8} {:>8} {:>8}'.format(
+            '', 'A*, ms', 'loads', 'chunks'
+        ))
+        for name, topo in maps:
+            strategy = AStarDistanceStrategy()
+            start = time.perf_counter()
+            for src, dst in queries:
+                strategy.get_path(topo, movement, src, dst)
+            query_time = (time.perf_counter() - start) / query_count
+            print('{:<10} {:8.1f} {:>8} {:>8}'.format(
+                name, query_time * 1000, getattr(topo, 'loads', '-'),
+                getattr(topo, 'loaded_chunks', '-')
+            ))
+        store.close()
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
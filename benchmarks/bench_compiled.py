@@ -0,0 +1,103 @@
+"""
+Compare per-edge ``get_passability`` calls with compiled cost tables
+(``MovementStrategy.compile``) on a ``NumpyRectangularTopology``:
+neighbour generation, an implicit A* query and ``to_graph`` with a
+custom movement strategy.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_compiled.py [size]``.
+"""
+import random
+import sys
+import time
+
+from topopy.primitives.movement import (
+    MovementStrategy, SimpleRectangularMovement
+)
+from topopy.primitives.strategy import AStarDistanceStrategy
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import NumpyRectangularTopology
+
+
+class InterpretedMovement(SimpleRectangularMovement):
+    __slots__ = ()
+
+    compilable = False
+
+
+class SwampMovement(MovementStrategy):
+    """Custom strategy: swamps are slow, walls impassable"""
+
+    costs = {'.': 1, ',': 4}
+
+    def __init__(self, compilable):
+        self.compilable = compilable
+
+    def get_passability(self, from_tile, to_tile, from_loc, to_loc):
+        cost = self.costs.get(to_tile.key)
+        if cost is not None:
+            diagonal = from_loc.x != to_loc.x and from_loc.y != to_loc.y
+            return cost * (1.5 if diagonal else 1)
+
+
+def make_topology(size, seed=0):
+    rnd = random.Random(seed)
+    tiles = [KeyTile.from_key(key) for key in '...,#']
+    return NumpyRectangularTopology([
+        [rnd.choice(tiles) for _ in range(size)] for _ in range(size)
+    ])
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main(size=256):
+    topo = make_topology(size)
+    loc = topo.location_class
+    weight_map = {
+        ('.', '.'): 1, ('.', ','): 3, (',', '.'): 1, (',', ','): 2
+    }
+    print('{} x {} grid'.format(size, size))
+    print('{:<28} {:>12} {:>12}'.format('', 'calls, s', 'compiled, s'))
+
+    movements = [
+        InterpretedMovement(diagonal=True, weight_map=weight_map),
+        SimpleRectangularMovement(diagonal=True, weight_map=weight_map),
+    ]
+    locs = list(topo.all_locations())
+
+    def iterate(movement):
+        for from_loc in locs:
+            for _ in topo.iter_neighbors(from_loc, movement):
+                pass
+
+    times = [timed(iterate, movement)[1] for movement in movements]
+    print('{:<28} {:12.3f} {:12.3f}'.format('iter_neighbors, all cells',
+                                            *times))
+
+    strategy = AStarDistanceStrategy()
+    results = [
+        timed(strategy.get_path, topo, movement, loc(0, 0),
+              loc(size - 1, size - 1))
+        for movement in movements
+    ]
+    assert results[0][0][0] == results[1][0][0]
+    print('{:<28} {:12.3f} {:12.3f}'.format(
+        'implicit A*, corner to corner', results[0][1], results[1][1]
+    ))
+
+    results = [
+        timed(topo.to_graph, SwampMovement(compilable), True)
+        for compilable in (False, True)
+    ]
+    assert (results[0][0].weights == results[1][0].weights).all()
+    print('{:<28} {:12.3f} {:12.3f}'.format(
+        'to_graph, custom movement', results[0][1], results[1][1]
+    ))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,53 @@
+"""
+Compare memory and build time of the dict-of-dicts graph
+with ``CSRGraph``.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_csr.py [size ...]``.
+"""
+import sys
+import time
+import tracemalloc
+
+from topopy.primitives.movement import SimpleRectangularMovement
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import NumpyRectangularTopology
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    graph = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return graph, elapsed, size
+
+
+def main(sizes=(64, 128, 256)):
+    movement = SimpleRectangularMovement(
+        diagonal=True, weight_map={('.', '.'): 1}
+    )
+    print('{:>6} {:>8} {:>10} {:>12} {:>14}'.format(
+        'size', 'format', 'time, s', 'memory, KiB', 'bytes / edge'
+    ))
+    for size in sizes:
+        tile = KeyTile.from_key('.')
+        topo = NumpyRectangularTopology([[tile] * size for _ in range(size)])
+        for compact in (False, True):
+            graph, elapsed, memory = measure(
+                lambda: topo.to_graph(movement, compact=compact)
+            )
+            if compact:
+                edges = graph.edge_count
+            else:
+                edges = sum(len(row) for row in graph.values())
+            print('{:>6} {:>8} {:>10.4f} {:>12.0f} {:>14.1f}'.format(
+                size, 'csr' if compact else 'dict',
+                elapsed, memory / 1024, memory / edges
+            ))
+            del graph
+
+
+if __name__ == '__main__':
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (64, 128, 256))
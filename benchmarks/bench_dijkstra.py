@@ -0,0 +1,82 @@
+"""
+Compare the heap-based Dijkstra with the original O(V^2) min-scan
+on open square grids of growing size.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_dijkstra.py [size ...]``.
+"""
+import sys
+import timeit
+
+from topopy.primitives.movement import SimpleRectangularMovement
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import RectangularTopology
+from topopy.primitives.utils import dijkstra
+
+
+def legacy_get_shortest_path(weighted_graph, start, end):
+    """The original implementation, kept for comparison only"""
+    nodes_to_visit = {start}
+    visited_nodes = set()
+    distance_from_start = {start: 0}
+    tentative_parents = {}
+
+    while nodes_to_visit:
+        current = min(
+            [(distance_from_start[node], node) for node in nodes_to_visit]
+        )[1]
+        if current == end:
+            break
+
+        nodes_to_visit.discard(current)
+        visited_nodes.add(current)
+
+        edges = weighted_graph[current]
+        unvisited_neighbors = set(edges).difference(visited_nodes)
+        for neighbor in unvisited_neighbors:
+            neighbor_distance = distance_from_start[current] + edges[neighbor]
+            if neighbor_distance < distance_from_start.get(
+                    neighbor, float('inf')):
+                distance_from_start[neighbor] = neighbor_distance
+                tentative_parents[neighbor] = current
+                nodes_to_visit.add(neighbor)
+
+    return distance_from_start[end]
+
+
+def make_graph(size, diagonal):
+    tile = KeyTile.from_key('.')
+    topo = RectangularTopology([[tile] * size for _ in range(size)])
+    movement = SimpleRectangularMovement(
+        diagonal=diagonal, weight_map={('.', '.'): 1}
+    )
+    return topo, topo.to_graph(movement)
+
+
+def main(sizes=(16, 32, 64, 128), repeat=3):
+    print('{:>6} {:>10} {:>14} {:>14} {:>9}'.format(
+        'size', 'nodes', 'legacy, s', 'heap, s', 'speedup'
+    ))
+    for size in sizes:
+        topo, graph = make_graph(size, diagonal=True)
+        src = topo.location_class(0, 0)
+        dst = topo.location_class(size - 1, size - 1)
+
+        new_dist, _ = dijkstra.get_shortest_path(graph, src, dst)
+        assert abs(legacy_get_shortest_path(graph, src, dst) - new_dist) < 1e-9
+
+        legacy = min(timeit.repeat(
+            lambda: legacy_get_shortest_path(graph, src, dst),
+            number=1, repeat=repeat
+        ))
+        heap = min(timeit.repeat(
+            lambda: dijkstra.get_shortest_path(graph, src, dst),
+            number=1, repeat=repeat
+        ))
+        print('{:>6} {:>10} {:>14.4f} {:>14.4f} {:>8.1f}x'.format(
+            size, size * size, legacy, heap, legacy / heap
+        ))
+
+
+if __name__ == '__main__':
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (16, 32, 64, 128))
@@ -0,0 +1,74 @@
+"""
+Compare one A* search per actor with a shared ``DistanceMap``
+when many actors head for the same goal.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_distance_map.py [size [actors]]``.
+"""
+import random
+import sys
+import time
+
+from topopy.primitives.movement import SimpleRectangularMovement
+from topopy.primitives.strategy import (
+    AStarDistanceStrategy, DistanceMapStrategy
+)
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import NumpyRectangularTopology
+
+
+def make_topology(size, wall_ratio=0.2, seed=0):
+    rnd = random.Random(seed)
+    floor = KeyTile.from_key('.')
+    wall = KeyTile.from_key('#')
+    return NumpyRectangularTopology([
+        [wall if rnd.random() < wall_ratio else floor for _ in range(size)]
+        for _ in range(size)
+    ])
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main(size=128, actors=50):
+    movement = SimpleRectangularMovement(
+        diagonal=True, weight_map={('.', '.'): 1}
+    )
+    topo = make_topology(size)
+    loc = topo.location_class
+    rnd = random.Random(1)
+    goal = loc(size // 2, size // 2)
+    sources = [loc(rnd.randrange(size), rnd.randrange(size))
+               for _ in range(actors)]
+    print('{} x {} grid, {} actors'.format(size, size, actors))
+
+    for name, strategy in (
+            ('A* per actor', AStarDistanceStrategy()),
+            ('distance map', DistanceMapStrategy()),
+    ):
+        results, elapsed = timed(lambda: [
+            strategy.get_path(topo, movement, src, goal) for src in sources
+        ])
+        print('{:<16} {:8.3f} s'.format(name, elapsed))
+        distances = [dist for dist, _ in results]
+        if name == 'A* per actor':
+            expected = distances
+        else:
+            assert all(
+                (a is None) == (b is None) and
+                (a is None or abs(a - b) < 1e-6)
+                for a, b in zip(distances, expected)
+            )
+
+    strategy.get_distance_map(topo, movement, (goal,))
+    _, elapsed = timed(lambda: [
+        strategy.get_path(topo, movement, src, goal) for src in sources
+    ])
+    print('{:<16} {:8.3f} s'.format('cached map', elapsed))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,70 @@
+"""
+Compare hexagonal and rectangular maps of the same size: neighbour
+generation, graph building and A* queries.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_hex.py [size [queries]]``.
+"""
+import random
+import sys
+import time
+
+from topopy.primitives.movement import (
+    SimpleHexMovement, SimpleRectangularMovement
+)
+from topopy.primitives.strategy import AStarDistanceStrategy
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import HexTopology, NumpyRectangularTopology
+
+
+def make_matrix(size, seed=0):
+    rnd = random.Random(seed)
+    tiles = [KeyTile.from_key(key) for key in '...,#']
+    return [[rnd.choice(tiles) for _ in range(size)] for _ in range(size)]
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main(size=256, query_count=20):
+    weight_map = {
+        ('.', '.'): 1, ('.', ','): 3, (',', '.'): 1, (',', ','): 2
+    }
+    maps = [
+        ('rectangular', NumpyRectangularTopology(make_matrix(size)),
+         SimpleRectangularMovement(diagonal=True, weight_map=weight_map)),
+        ('hex', HexTopology(make_matrix(size)),
+         SimpleHexMovement(weight_map=weight_map)),
+    ]
+    print('{} x {} maps, {} A* queries'.format(size, size, query_count))
+    print('{:<12} {:>16} {:>12} {:>12}'.format(
+        '', 'neighbours, s', 'to_graph, s', 'A*, ms'
+    ))
+    for name, topo, movement in maps:
+        locs = list(topo.all_locations())
+
+        def iterate():
+            for loc in locs:
+                for _ in topo.iter_neighbors(loc, movement):
+                    pass
+
+        _, neighbours_time = timed(iterate)
+        _, graph_time = timed(topo.to_graph, movement, True)
+        rnd = random.Random(1)
+        strategy = AStarDistanceStrategy()
+        start = time.perf_counter()
+        for _ in range(query_count):
+            strategy.get_path(
+                topo, movement, rnd.choice(locs), rnd.choice(locs)
+            )
+        query_time = (time.perf_counter() - start) / query_count
+        print('{:<12} {:16.3f} {:12.3f} {:12.1f}'.format(
+            name, neighbours_time, graph_time, query_time * 1000
+        ))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
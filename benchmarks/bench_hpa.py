@@ -0,0 +1,102 @@
+"""
+Compare A* with hierarchical path-finding (HPA*) on long queries
+and report the suboptimality of HPA* paths against Dijkstra.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_hpa.py [size [queries [cluster]]]``.
+"""
+import random
+import sys
+import time
+
+from topopy.primitives.movement import SimpleRectangularMovement
+from topopy.primitives.strategy import (
+    AStarDistanceStrategy, DijkstraDistanceStrategy,
+    HierarchicalDistanceStrategy
+)
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import NumpyRectangularTopology
+
+
+def make_topology(size, wall_ratio=0.25, seed=0):
+    rnd = random.Random(seed)
+    floor = KeyTile.from_key('.')
+    wall = KeyTile.from_key('#')
+    return NumpyRectangularTopology([
+        [wall if rnd.random() < wall_ratio else floor for _ in range(size)]
+        for _ in range(size)
+    ])
+
+
+def run(strategy, topo, movement, queries):
+    start = time.perf_counter()
+    results = [
+        strategy.get_path(topo, movement, src, dst)[0]
+        for src, dst in queries
+    ]
+    return results, time.perf_counter() - start
+
+
+def main(size=256, query_count=20, cluster_size=16):
+    movement = SimpleRectangularMovement(
+        diagonal=True, weight_map={('.', '.'): 1}
+    )
+    topo = make_topology(size)
+    loc = topo.location_class
+    rnd = random.Random(1)
+    queries = []
+    while len(queries) < query_count:
+        # Long queries: opposite quarters of the map
+        src = loc(rnd.randrange(size // 4), rnd.randrange(size // 4))
+        dst = loc(size - 1 - rnd.randrange(size // 4),
+                  size - 1 - rnd.randrange(size // 4))
+        queries.append((src, dst))
+    print('{} x {} grid, {} queries, {} x {} clusters'.format(
+        size, size, query_count, cluster_size, cluster_size
+    ))
+
+    expected, elapsed = run(
+        DijkstraDistanceStrategy(), topo, movement, queries
+    )
+    print('{:<22} {:8.3f} s'.format('Dijkstra', elapsed))
+    _, elapsed = run(AStarDistanceStrategy(), topo, movement, queries)
+    print('{:<22} {:8.3f} s'.format('A*', elapsed))
+
+    strategy = HierarchicalDistanceStrategy(cluster_size=cluster_size)
+    _, elapsed = run(strategy, topo, movement, queries)
+    abstraction = strategy.get_abstraction(topo, movement)
+    print('{:<22} {:8.3f} s ({} clusters abstracted)'.format(
+        'HPA*, lazy abstraction', elapsed, len(abstraction)
+    ))
+    start = time.perf_counter()
+    abstraction.precompute()
+    print('{:<22} {:8.3f} s'.format(
+        'full abstraction', time.perf_counter() - start
+    ))
+    results, elapsed = run(strategy, topo, movement, queries)
+    print('{:<22} {:8.3f} s'.format('HPA*, abstracted', elapsed))
+
+    ratios = [
+        result / exp for result, exp in zip(results, expected)
+        if exp and result is not None
+    ]
+    missed = sum(
+        (result is None) != (exp is None)
+        for result, exp in zip(results, expected)
+    )
+    print('suboptimality: mean {:.2%}, max {:.2%}, reachability '
+          'mismatches {}'.format(
+              sum(ratios) / len(ratios) - 1, max(ratios) - 1, missed
+          ))
+
+    start = time.perf_counter()
+    topo[loc(size // 2, size // 2)] = KeyTile.from_key('#')
+    strategy.get_abstraction(topo, movement)
+    abstraction.precompute()
+    print('{:<22} {:8.3f} s'.format(
+        'rebuild after a change', time.perf_counter() - start
+    ))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,52 @@
+"""
+Compare a short query on a large map with a materialized graph
+(``to_graph``) and with implicit neighbour generation.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_implicit.py [size ...]``.
+"""
+import sys
+import time
+import tracemalloc
+
+from topopy.primitives.movement import SimpleRectangularMovement
+from topopy.primitives.strategy import DijkstraDistanceStrategy
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import RectangularTopology
+
+
+def measure(strategy, topo, movement, src, dst):
+    tracemalloc.start()
+    start = time.perf_counter()
+    dist, _ = strategy.get_path(topo, movement, src, dst)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return dist, elapsed, peak
+
+
+def main(sizes=(64, 128, 256)):
+    print('{:>6} {:>12} {:>10} {:>10} {:>12}'.format(
+        'size', 'mode', 'distance', 'time, s', 'peak, KiB'
+    ))
+    movement = SimpleRectangularMovement(
+        diagonal=True, weight_map={('.', '.'): 1}
+    )
+    for size in sizes:
+        tile = KeyTile.from_key('.')
+        topo = RectangularTopology([[tile] * size for _ in range(size)])
+        src = topo.location_class(size // 2, size // 2)
+        dst = topo.location_class(size // 2 + 5, size // 2 + 3)
+        for implicit in (False, True):
+            dist, elapsed, peak = measure(
+                DijkstraDistanceStrategy(implicit=implicit),
+                topo, movement, src, dst
+            )
+            print('{:>6} {:>12} {:>10.2f} {:>10.4f} {:>12.0f}'.format(
+                size, 'implicit' if implicit else 'to_graph',
+                dist, elapsed, peak / 1024
+            ))
+
+
+if __name__ == '__main__':
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (64, 128, 256))
@@ -0,0 +1,77 @@
+"""
+Compare expanded nodes and query time of A* and Jump Point Search
+on uniform-cost 8-connected grids with scattered obstacles.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_jps.py [size ...]``.
+"""
+import random
+import sys
+import timeit
+
+from topopy.primitives.heuristic import default_heuristic
+from topopy.primitives.movement import SimpleRectangularMovement
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import RectangularTopology
+from topopy.primitives.utils import astar, jps
+
+
+def make_topology(size, density, seed=0):
+    rnd = random.Random(seed)
+    floor, wall = KeyTile.from_key('.'), KeyTile.from_key('#')
+    return RectangularTopology([
+        [wall if rnd.random() < density else floor for _ in range(size)]
+        for _ in range(size)
+    ])
+
+
+def main(sizes=(64, 128, 256), repeat=3):
+    movement = SimpleRectangularMovement(
+        diagonal=True, weight_map={('.', '.'): 1}
+    )
+    heuristic = default_heuristic(movement)
+    floor = KeyTile.from_key('.')
+    print('{:>6} {:>8} {:>6} {:>10} {:>10} {:>10}'.format(
+        'size', 'density', 'search', 'distance', 'expanded', 'time, s'
+    ))
+    for size in sizes:
+        for density in (0.0, 0.1, 0.25):
+            topo = make_topology(size, density)
+            src = topo.location_class(0, 0)
+            dst = topo.location_class(size - 1, size - 1)
+            topo[src] = topo[dst] = floor
+            matrix = topo.matrix
+
+            def walkable(x, y):
+                return (
+                    0 <= x < size and 0 <= y < size and
+                    matrix[x][y] is floor
+                )
+
+            expanded = [0]
+
+            def neighbors(loc):
+                expanded[0] += 1
+                return topo.iter_neighbors(loc, movement)
+
+            searches = (
+                ('a*', lambda: astar.find_path(
+                    neighbors, src, dst, lambda loc: heuristic(loc, dst))),
+                ('jps', lambda: jps.find_path(
+                    walkable, tuple(src), tuple(dst), stats=stats)),
+            )
+            for name, search in searches:
+                expanded[0] = 0
+                stats = {}
+                dist, _ = search()
+                count = stats.get('expanded', expanded[0])
+                elapsed = min(timeit.repeat(search, number=1, repeat=repeat))
+                print('{:>6} {:>8} {:>6} {:>10} {:>10} {:>10.4f}'.format(
+                    size, density, name,
+                    '-' if dist is None else '{:.2f}'.format(dist),
+                    count, elapsed
+                ))
+
+
+if __name__ == '__main__':
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (64, 128, 256))
@@ -0,0 +1,58 @@
+"""
+Compare graph construction time of ``RectangularTopology.to_graph``
+with the vectorized ``NumpyRectangularTopology.get_edge_costs``.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_numpy_topology.py [size ...]``.
+The list-based topology is only timed up to ``LIST_LIMIT``
+cells per side; larger sizes are extrapolated linearly by area.
+"""
+import random
+import sys
+import time
+
+from topopy.primitives.movement import SimpleRectangularMovement
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import (
+    NumpyRectangularTopology, RectangularTopology
+)
+
+
+LIST_LIMIT = 256
+
+
+def make_matrix(size, seed=0):
+    rnd = random.Random(seed)
+    tiles = [KeyTile.from_key(key) for key in '..,#']
+    return [[rnd.choice(tiles) for _ in range(size)] for _ in range(size)]
+
+
+def main(sizes=(256, 1024, 2048)):
+    movement = SimpleRectangularMovement(
+        diagonal=True,
+        weight_map={('.', '.'): 1, ('.', ','): 2, (',', ','): 2,
+                    (',', '.'): 1},
+    )
+    print('{:>6} {:>16} {:>16}'.format('size', 'to_graph, s', 'numpy, s'))
+    list_rate = None
+    for size in sizes:
+        matrix = make_matrix(size)
+        if size <= LIST_LIMIT:
+            topo = RectangularTopology(matrix)
+            start = time.perf_counter()
+            topo.to_graph(movement)
+            list_time = time.perf_counter() - start
+            list_rate = list_time / (size * size)
+            list_label = '{:.3f}'.format(list_time)
+        else:
+            list_label = '~{:.1f}'.format(list_rate * size * size)
+
+        topo = NumpyRectangularTopology(matrix)
+        start = time.perf_counter()
+        topo.get_edge_costs(movement)
+        numpy_time = time.perf_counter() - start
+        print('{:>6} {:>16} {:>16.3f}'.format(size, list_label, numpy_time))
+
+
+if __name__ == '__main__':
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (256, 1024, 2048))
@@ -0,0 +1,88 @@
+"""
+Compare A* with and without a reachability check on queries whose
+destination is walled off, and measure how long index updates take.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_reachability.py [size [queries]]``.
+"""
+import random
+import sys
+import time
+
+from topopy.primitives.movement import SimpleRectangularMovement
+from topopy.primitives.strategy import (
+    AStarDistanceStrategy, ReachabilityCheckStrategy
+)
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import NumpyRectangularTopology
+
+
+def make_topology(size, wall_ratio=0.2, seed=0):
+    """Random map split in two by a wall in the middle column"""
+    rnd = random.Random(seed)
+    floor = KeyTile.from_key('.')
+    wall = KeyTile.from_key('#')
+    return NumpyRectangularTopology([
+        [
+            wall if y == size // 2 or rnd.random() < wall_ratio else floor
+            for y in range(size)
+        ]
+        for _ in range(size)
+    ])
+
+
+def run(strategy, topo, movement, queries):
+    start = time.perf_counter()
+    results = [
+        strategy.get_path(topo, movement, src, dst)[0]
+        for src, dst in queries
+    ]
+    return results, (time.perf_counter() - start) / len(queries)
+
+
+def main(size=128, query_count=50):
+    movement = SimpleRectangularMovement(
+        diagonal=True, weight_map={('.', '.'): 1}
+    )
+    topo = make_topology(size)
+    loc = topo.location_class
+    rnd = random.Random(1)
+    queries = [
+        (loc(rnd.randrange(size), rnd.randrange(size // 2)),
+         loc(rnd.randrange(size), rnd.randrange(size // 2 + 1, size)))
+        for _ in range(query_count)
+    ]
+    print('{} x {} grid, {} unreachable queries'.format(
+        size, size, query_count
+    ))
+
+    strategy = ReachabilityCheckStrategy()
+    start = time.perf_counter()
+    index = strategy.cache.get(topo, movement)
+    print('index built in {:.3f} s, {} components'.format(
+        time.perf_counter() - start, index.component_count
+    ))
+
+    expected, latency = run(AStarDistanceStrategy(), topo, movement, queries)
+    print('{:<16} {:8.3f} ms / query'.format('A*', latency * 1000))
+    results, latency = run(strategy, topo, movement, queries)
+    print('{:<16} {:8.3f} ms / query'.format('checked A*', latency * 1000))
+    assert results == expected
+
+    floor = KeyTile.from_key('.')
+    wall = KeyTile.from_key('#')
+    start = time.perf_counter()
+    changes = 100
+    for _ in range(changes):
+        topo[loc(rnd.randrange(size), rnd.randrange(size))] = rnd.choice(
+            (floor, wall)
+        )
+        strategy.cache.get(topo, movement)
+    print('{:.3f} ms / tile change, {} of {} updated in place'.format(
+        (time.perf_counter() - start) / changes * 1000,
+        strategy.cache.updates, changes
+    ))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,65 @@
+"""
+Compare radius and nearest-actor queries of ``GridSpatialIndex`` with
+scanning all actors, and measure moves.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_spatial.py [actors [queries]]``.
+"""
+import heapq
+import random
+import sys
+import time
+
+from topopy.primitives.location import IntLocation2D
+from topopy.world.spatial import GridSpatialIndex
+
+
+def main(actor_count=10000, query_count=1000, size=1000, radius=10):
+    rnd = random.Random(0)
+    locs = {
+        actor_id: IntLocation2D(rnd.randrange(size), rnd.randrange(size))
+        for actor_id in range(actor_count)
+    }
+    queries = [
+        IntLocation2D(rnd.randrange(size), rnd.randrange(size))
+        for _ in range(query_count)
+    ]
+    index = GridSpatialIndex(cell_size=radius)
+    for actor_id, loc in locs.items():
+        index.move(actor_id, loc)
+
+    def scan_radius(loc):
+        return [
+            actor_id for actor_id, (x, y) in locs.items()
+            if (x - loc.x)**2 + (y - loc.y)**2 <= radius**2
+        ]
+
+    def scan_nearest(loc):
+        return heapq.nsmallest(5, locs, key=lambda actor_id: (
+            (locs[actor_id].x - loc.x)**2 + (locs[actor_id].y - loc.y)**2
+        ))
+
+    print('{} actors on a {} x {} map, {} queries'.format(
+        actor_count, size, size, query_count
+    ))
+    print('{:<24} {:>10}'.format('', 'us/query'))
+    for name, function in (
+            ('scan radius', scan_radius),
+            ('index radius', lambda loc: index.query_radius(loc, radius)),
+            ('scan 5 nearest', scan_nearest),
+            ('index 5 nearest', lambda loc: index.nearest(loc, 5))):
+        start = time.perf_counter()
+        for loc in queries:
+            function(loc)
+        elapsed = time.perf_counter() - start
+        print('{:<24} {:10.1f}'.format(name, elapsed / query_count * 1e6))
+
+    start = time.perf_counter()
+    for actor_id, loc in locs.items():
+        index.move(actor_id, IntLocation2D(loc.x + 1, loc.y))
+    elapsed = time.perf_counter() - start
+    print('{:<24} {:10.2f}'.format('move, us', elapsed / actor_count * 1e6))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
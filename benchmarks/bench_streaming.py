@@ -0,0 +1,81 @@
+"""
+Compare the time and peak memory of reading a character map with
+``deserialize`` and ``deserialize_stream``, and of writing it with
+``serialize`` and ``serialize_stream``.
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_streaming.py [size]``.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from topopy.primitives.chunked import ChunkedTopology
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import NumpyRectangularTopology
+from topopy.serialization.topology import RectangularCharSerializer
+
+
+def make_topology(size, seed=0):
+    rnd = np.random.RandomState(seed)
+    keys = rnd.randint(0, 3, size=(size, size)).astype(np.uint16)
+    return NumpyRectangularTopology.from_array(
+        keys, [KeyTile.from_key(key) for key in '.,#']
+    )
+
+
+def measure(function, *args):
+    """Return the time and the peak of allocated memory in MB"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main(size=2048):
+    serializer = RectangularCharSerializer(
+        topology_class=NumpyRectangularTopology
+    )
+    topo = make_topology(size)
+
+    with tempfile.TemporaryDirectory() as path:
+        file_name = os.path.join(path, 'map.txt')
+
+        def write():
+            with open(file_name, 'w') as f:
+                f.write(serializer.serialize(topo))
+
+        def write_stream():
+            with open(file_name, 'w') as f:
+                f.writelines(serializer.serialize_stream(topo))
+
+        def read():
+            with open(file_name) as f:
+                serializer.deserialize(f.read())
+
+        def read_stream():
+            with open(file_name) as f:
+                serializer.deserialize_stream(f)
+
+        def read_chunked():
+            with open(file_name) as f:
+                serializer.deserialize_stream(f, topology=ChunkedTopology())
+
+        print('{0} x {0} map, {1:.1f} MB file'.format(size, size**2 / 2**20))
+        print('{:<16} {:>8} {:>10}'.format('', 'time, s', 'peak, MB'))
+        for name, function in (
+                ('serialize', write), ('serialize_stream', write_stream),
+                ('deserialize', read), ('stream to array', read_stream),
+                ('stream to chunks', read_chunked)):
+            print('{:<16} {:8.3f} {:10.1f}'.format(name, *measure(function)))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
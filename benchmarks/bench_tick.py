@@ -0,0 +1,66 @@
+"""
+Compare applying the moves of many actors message by message (World),
+once per tick from messages (TickWorld) and once per tick from
+``request_moves`` (TickWorld, bulk).
+
+Run from the project root with
+``PYTHONPATH=. python benchmarks/bench_tick.py [actors [ticks]]``.
+"""
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+from topopy.primitives.location import IntLocation2D
+from topopy.world import messages
+from topopy.world.world import TickWorld, World
+
+
+def main(actor_count=10000, tick_count=10, size=1000):
+    rnd = random.Random(0)
+    actors = [SimpleNamespace(id=i) for i in range(actor_count)]
+    print('{} actors, {} ticks'.format(actor_count, tick_count))
+    print('{:<12} {:>10} {:>10}'.format('', 'us/move', 'rejected'))
+    for name, world_class, bulk in (
+            ('World', World, False), ('TickWorld', TickWorld, False),
+            ('bulk', TickWorld, True)):
+        world = world_class(loop=None, client=None, topologies={}, actors=[])
+        dispatch = world.dispatcher.dispatch
+        cells = rnd.sample(range(size * size), actor_count)
+        locs = {}
+        for actor, cell in zip(actors, cells):
+            locs[actor.id] = IntLocation2D(*divmod(cell, size))
+            dispatch(messages.InhabitCell(actor, loc=locs[actor.id]))
+        if isinstance(world, TickWorld):
+            world.tick()
+
+        rejected = 0
+        elapsed = 0
+        for _ in range(tick_count):
+            new_locs = []
+            for actor in actors:
+                loc = locs[actor.id]
+                new_locs.append(IntLocation2D(
+                    loc.x + rnd.randint(-1, 1), loc.y + rnd.randint(-1, 1)
+                ))
+            start = time.perf_counter()
+            if bulk:
+                world.request_moves(
+                    (actor.id, loc) for actor, loc in zip(actors, new_locs)
+                )
+            else:
+                for actor, new_loc in zip(actors, new_locs):
+                    dispatch(messages.VacateCell(actor, loc=locs[actor.id]))
+                    dispatch(messages.InhabitCell(actor, loc=new_loc))
+            if isinstance(world, TickWorld):
+                rejected += len(world.tick()['rejected'])
+            elapsed += time.perf_counter() - start
+            for actor in actors:
+                locs[actor.id] = world.spatial_index.get_location(actor.id)
+        print('{:<12} {:10.2f} {:>10}'.format(
+            name, elapsed / (tick_count * actor_count) * 1e6, rejected
+        ))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -40,6 +40,7 @@ setup(
 
     requires=(
         'aiochannel',
+        'numpy',
     ),
 
     extras_require=dict(
@@ -0,0 +1,131 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from unittest import TestCase
+
+from topopy.primitives.batch import (
+    BY_DESTINATION, BY_SOURCE, get_paths, group_queries
+)
+from topopy.primitives.graph import CSRGraph
+from topopy.primitives.movement import SimpleRectangularMovement
+from topopy.primitives.strategy import DijkstraDistanceStrategy
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import NumpyRectangularTopology
+from topopy.serialization.topology import RectangularCharSerializer
+
+
+class TestGetPaths(TestCase):
+    topo_str = (
+        '...#..\n'
+        '.#,#.,\n'
+        '..,...\n'
+        '##.#.#\n'
+    )
+    movement_strategy = SimpleRectangularMovement(
+        diagonal=True,
+        weight_map={('.', '.'): 1, ('.', ','): 2, (',', '.'): 3,
+                    (',', ','): 4}
+    )
+
+    def setUp(self):
+        self.topology = RectangularCharSerializer(
+            topology_class=NumpyRectangularTopology
+        ).deserialize(self.topo_str)
+        loc = self.topology.location_class
+        x_size, y_size = self.topology.shape
+        cells = [
+            loc(x, y) for x in range(x_size) for y in range(y_size)
+            if self.topology[loc(x, y)].key != '#'
+        ]
+        self.pairs = [
+            (src, dst) for src in cells[:4] for dst in cells[::3]
+        ] + [(cells[5], loc(0, 3))]
+
+    def _expected(self):
+        strategy = DijkstraDistanceStrategy()
+        return [
+            strategy.get_path(self.topology, self.movement_strategy, src, dst)
+            for src, dst in self.pairs
+        ]
+
+    def _assert_results(self, results):
+        expected = self._expected()
+        self.assertEqual(len(results), len(expected))
+        for (src, dst), (dist, path), (exp_dist, _) in zip(
+                self.pairs, results, expected):
+            if exp_dist is None:
+                self.assertEqual((dist, path), (None, None))
+            else:
+                # Summation order and float32 weights of compact graphs
+                self.assertAlmostEqual(dist, exp_dist, places=5)
+                self.assertEqual((path[0], path[-1]), (src, dst))
+
+    def test_group_queries(self):
+        reverse, groups = group_queries([(1, 2), (1, 3), (4, 2)])
+        self.assertFalse(reverse)
+        self.assertEqual(groups, {1: [2, 3], 4: [2]})
+        reverse, groups = group_queries([(1, 2), (3, 2), (4, 5)])
+        self.assertTrue(reverse)
+        self.assertEqual(groups, {2: [1, 3], 5: [4]})
+        with self.assertRaises(ValueError):
+            group_queries([], 'nowhere')
+
+    def test_sequential(self):
+        for group_by in (BY_SOURCE, BY_DESTINATION):
+            with self.subTest(group_by=group_by):
+                self._assert_results(get_paths(
+                    self.topology, self.movement_strategy, self.pairs,
+                    group_by=group_by
+                ))
+
+    def test_explicit_graph(self):
+        for compact in (False, True):
+            graph = self.topology.to_graph(
+                self.movement_strategy, compact=compact
+            )
+            for group_by in (BY_SOURCE, BY_DESTINATION):
+                with self.subTest(compact=compact, group_by=group_by):
+                    self._assert_results(get_paths(
+                        self.topology, self.movement_strategy, self.pairs,
+                        group_by=group_by, graph=graph
+                    ))
+
+    def test_process_pool(self):
+        with ProcessPoolExecutor(2) as executor:
+            for group_by in (BY_SOURCE, BY_DESTINATION):
+                for workers in (None, 2):
+                    with self.subTest(group_by=group_by, workers=workers):
+                        self._assert_results(get_paths(
+                            self.topology, self.movement_strategy,
+                            self.pairs, group_by=group_by,
+                            executor=executor, workers=workers
+                        ))
+
+    def test_empty(self):
+        with ProcessPoolExecutor(1) as executor:
+            for kwargs in ({}, {'executor': executor}):
+                with self.subTest(**kwargs):
+                    self.assertEqual(get_paths(
+                        self.topology, self.movement_strategy, [], **kwargs
+                    ), [])
+
+    def test_saved_graph_changes(self):
+        loc = self.topology.location_class
+        with ProcessPoolExecutor(1) as executor, \
+                tempfile.TemporaryDirectory() as tmp_dir:
+            graph_path = os.path.join(tmp_dir, 'graph')
+            for tile in ('.', '#', '.'):
+                # Walls around (2, 2) change the paths from (2, 1)
+                self.topology.update_many(
+                    [loc(1, 2), loc(3, 2), loc(2, 3)],
+                    [KeyTile.from_key(tile)] * 3
+                )
+                graph = self.topology.to_graph(
+                    self.movement_strategy, compact=True
+                )
+                self.assertIsInstance(graph, CSRGraph)
+                graph.save(graph_path)
+                self._assert_results(get_paths(
+                    self.topology, self.movement_strategy, self.pairs,
+                    executor=executor, graph_path=graph_path
+                ))
@@ -0,0 +1,29 @@
+from unittest import TestCase
+
+from topopy.primitives.utils import dijkstra
+
+
+class TestGetShortestPath(TestCase):
+    def test_weighted(self):
+        graph = {
+            'a': {'b': 1, 'c': 5},
+            'b': {'c': 1, 'd': 7},
+            'c': {'d': 1},
+        }
+        self.assertEqual(
+            dijkstra.get_shortest_path(graph, 'a', 'd'),
+            (3, ['a', 'b', 'c', 'd'])
+        )
+
+    def test_unreachable(self):
+        graph = {
+            'a': {'b': 1},
+            'b': {'a': 1},
+            'c': {'a': 1},
+        }
+        self.assertEqual(
+            dijkstra.get_shortest_path(graph, 'a', 'c'), (None, None)
+        )
+        self.assertEqual(
+            dijkstra.get_shortest_path(graph, 'a', 'x'), (None, None)
+        )
@@ -0,0 +1,259 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from topopy.primitives.graph import (
+    CSRGraph, GraphCache, ListLocationIndex, reverse_graph
+)
+from topopy.primitives.movement import SimpleRectangularMovement
+from topopy.primitives.strategy import (
+    AStarDistanceStrategy, DijkstraDistanceStrategy
+)
+from topopy.primitives.tile import KeyTile
+from topopy.primitives.topology import (
+    NumpyRectangularTopology, RectangularTopology
+)
+from topopy.serialization.topology import RectangularCharSerializer
+
+
+class TestCSRGraph(TestCase):
+    topo_str = (
+        '..#.\n'
+        '.#,.\n'
+        '..,,\n'
+    )
+    movement_strategy = SimpleRectangularMovement(
+        diagonal=True,
+        weight_map={('.', '.'): 1, ('.', ','): 2, (',', ','): 3}
+    )
+
+    def _deserialize(self, topology_class=RectangularTopology):
+        return RectangularCharSerializer(
+            topology_class=topology_class
+        ).deserialize(self.topo_str)
+
+    def _assert_graphs_equal(self, graph, expected):
+        self.assertEqual(
+            {loc: set(edges) for loc, edges in graph.items()},
+            {loc: set(edges) for loc, edges in expected.items()}
+        )
+        for loc, edges in expected.items():
+            for to_loc, cost in edges.items():
+                self.assertAlmostEqual(graph[loc][to_loc], cost, 6)
+
+    def test_from_dict(self):
+        graph = {'a': {'b': 1, 'c': 2.5}, 'b': {'c': 1}}
+        csr = CSRGraph.from_dict(graph)
+        self.assertEqual(len(csr), 3)
+        self.assertEqual(csr.edge_count, 3)
+        self.assertEqual(csr.indices.dtype, np.int32)
+        self.assertEqual(csr.weights.dtype, np.float32)
+        self.assertEqual(csr.to_dict(), graph)
+        self.assertEqual(list(csr.iter_neighbors('c')), [])
+        self.assertEqual(list(csr.iter_neighbors('x')), [])
+
+    def test_to_graph_compact(self):
+        for topology_class in (RectangularTopology, NumpyRectangularTopology):
+            topo = self._deserialize(topology_class)
+            expected = topo.to_graph(self.movement_strategy)
+            csr = topo.to_graph(self.movement_strategy, compact=True)
+            self.assertEqual(len(csr), 12)
+            self._assert_graphs_equal(csr.to_dict(), expected)
+
+    def test_save_load(self):
+        topo = self._deserialize(NumpyRectangularTopology)
+        expected = topo.to_graph(self.movement_strategy)
+        loc = topo.location_class
+        indexed = CSRGraph.from_dict(expected)
+        with tempfile.TemporaryDirectory() as path:
+            for csr in (topo.to_graph(self.movement_strategy, compact=True),
+                        indexed):
+                csr.save(os.path.join(path, 'graph'))
+                loaded = CSRGraph.load(os.path.join(path, 'graph'))
+                self.assertIsInstance(loaded.weights, np.memmap)
+                self._assert_graphs_equal(loaded.to_dict(), expected)
+                self.assertEqual(
+                    loaded.index.get_id(loc(2, 3)),
+                    csr.index.get_id(loc(2, 3))
+                )
+                del loaded
+        self.assertIsInstance(indexed.index, ListLocationIndex)
+
+    def test_strategies(self):
+        topo = self._deserialize()
+        loc = topo.location_class
+        expected, _ = DijkstraDistanceStrategy().get_path(
+            topo, self.movement_strategy, loc(0, 0), loc(2, 3)
+        )
+        csr = topo.to_graph(self.movement_strategy, compact=True)
+        for strategy in (DijkstraDistanceStrategy(),
+                         AStarDistanceStrategy()):
+            dist, path = strategy.get_path(
+                topo, self.movement_strategy, loc(0, 0), loc(2, 3), graph=csr
+            )
+            self.assertAlmostEqual(dist, expected, 6)
+            self.assertEqual(path[-1], loc(2, 3))
+
+        dist, _ = DijkstraDistanceStrategy(
+            implicit=False, compact=True
+        ).get_path(topo, self.movement_strategy, loc(0, 0), loc(2, 3))
+        self.assertAlmostEqual(dist, expected, 6)
+
+
+class TestGraphCache(TestCase):
+    weight_map = {('.', '.'): 1}
+
+    def _make_topology(self):
+        return RectangularCharSerializer().deserialize((
+            '...\n'
+            '.#.\n'
+        ))
+
+    def test_hit_and_invalidate(self):
+        cache = GraphCache()
+        topo = self._make_topology()
+        graph = cache.get_graph(
+            topo, SimpleRectangularMovement(weight_map=dict(self.weight_map))
+        )
+        # A different strategy object with the same behavior
+        self.assertIs(cache.get_graph(
+            topo, SimpleRectangularMovement(weight_map=dict(self.weight_map))
+        ), graph)
+        self.assertEqual(cache.stats, {
+            'size': 1, 'hits': 1, 'misses': 1, 'evictions': 0, 'updates': 0
+        })
+
+        loc = topo.location_class
+        topo[loc(1, 1)] = KeyTile.from_key('.')
+        new_graph = cache.get_graph(
+            topo, SimpleRectangularMovement(weight_map=self.weight_map)
+        )
+        self.assertIn(loc(1, 1), new_graph)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+        cache.max_patch_size = 0
+        topo[loc(1, 1)] = KeyTile.from_key('#')
+        self.assertIsNot(cache.get_graph(
+            topo, SimpleRectangularMovement(weight_map=self.weight_map)
+        ), new_graph)
+
+        compact = cache.get_graph(
+            topo, SimpleRectangularMovement(weight_map=self.weight_map),
+            compact=True
+        )
+        self.assertIsInstance(compact, CSRGraph)
+        self.assertEqual(len(cache), 2)
+
+    def test_eviction(self):
+        cache = GraphCache(max_size=2)
+        movement_strategy = SimpleRectangularMovement(
+            weight_map=self.weight_map
+        )
+        topologies = [self._make_topology() for _ in range(3)]
+        for topo in topologies:
+            cache.get_graph(topo, movement_strategy)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+        cache.get_graph(topologies[2], movement_strategy)
+        self.assertEqual(cache.hits, 1)
+        cache.get_graph(topologies[0], movement_strategy)
+        self.assertEqual(cache.misses, 4)
+
+    def test_strategy(self):
+        cache = GraphCache()
+        strategy = DijkstraDistanceStrategy(graph_cache=cache)
+        topo = self._make_topology()
+        loc = topo.location_class
+        movement_strategy = SimpleRectangularMovement(
+            weight_map=self.weight_map
+        )
+        for _ in range(3):
+            dist, _ = strategy.get_path(
+                topo, movement_strategy, loc(1, 0), loc(1, 2)
+            )
+            self.assertEqual(dist, 4)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+
+class TestPatchGraph(TestCase):
+    weight_map = {('.', '.'): 1, ('.', ','): 2, (',', '.'): 3}
+    changes = (
+        ((1, 1), '.'), ((0, 3), '#'), ((2, 2), '.'), ((2, 3), ','),
+        ((0, 0), '#'), ((1, 1), '#'),
+    )
+
+    def _make_topology(self, topology_class):
+        return RectangularCharSerializer(
+            topology_class=topology_class
+        ).deserialize((
+            '....\n'
+            '.#,.\n'
+            '..,,\n'
+        ))
+
+    def _check(self, topology_class, compact, batch, reverse=False):
+        cache = GraphCache()
+        topo = self._make_topology(topology_class)
+        loc = topo.location_class
+        for diagonal in (False, True):
+            movement_strategy = SimpleRectangularMovement(
+                diagonal=diagonal, weight_map=self.weight_map
+            )
+            graph = cache.get_graph(
+                topo, movement_strategy, compact, reverse=reverse
+            )
+        if batch:
+            topo.update_many(
+                [loc(*xy) for xy, _ in self.changes],
+                [KeyTile.from_key(key) for _, key in self.changes]
+            )
+        else:
+            for xy, key in self.changes:
+                topo[loc(*xy)] = KeyTile.from_key(key)
+                self.assertIs(cache.get_graph(
+                    topo, movement_strategy, compact, reverse=reverse
+                ), graph)
+        self.assertIs(cache.get_graph(
+            topo, movement_strategy, compact, reverse=reverse
+        ), graph)
+        expected = topo.to_graph(movement_strategy)
+        if reverse:
+            expected = reverse_graph(expected)
+        if compact:
+            graph = graph.to_dict()
+        self.assertEqual(
+            {loc: set(edges) for loc, edges in graph.items()},
+            {loc: set(edges) for loc, edges in expected.items()}
+        )
+        for from_loc, edges in expected.items():
+            for to_loc, cost in edges.items():
+                self.assertAlmostEqual(graph[from_loc][to_loc], cost, 6)
+
+    def test_patch(self):
+        for topology_class in (RectangularTopology, NumpyRectangularTopology):
+            for compact in (False, True):
+                for batch in (False, True):
+                    self._check(topology_class, compact, batch)
+                self._check(topology_class, compact, False, reverse=True)
+
+    def test_changed_since(self):
+        class Topology(RectangularTopology):
+            __slots__ = ()
+            changelog_size = 3
+
+        topo = self._make_topology(Topology)
+        loc = topo.location_class
+        tile = KeyTile.from_key('.')
+        topo[loc(0, 0)] = tile
+        self.assertEqual(topo.changed_since(0), {loc(0, 0)})
+        topo.update_many([loc(0, 1), loc(0, 2)], [tile, tile])
+        self.assertEqual(topo.version, 2)
+        self.assertEqual(topo.changed_since(1), {loc(0, 1), loc(0, 2)})
+        self.assertEqual(topo.changed_since(2), set())
+        topo[loc(0, 3)] = tile
+        self.assertIsNone(topo.changed_since(0))
+        self.assertEqual(
+            topo.changed_since(1), {loc(0, 1), loc(0, 2), loc(0, 3)}
+        )
@@ -1,10 +1,22 @@
+import io
+import os
+import tempfile
 from unittest import TestCase
 
-from topopy.primitives.tile import KeyTile
+import numpy as np
 
-from topopy.primitives.topology import RectangularTopology
+from topopy.primitives.chunked import ChunkedTopology
+from topopy.primitives.location import (
+    HEX_AXIAL, HEX_EVEN_R, HEX_ODD_R, IntLocation2D
+)
+from topopy.primitives.tile import KeyTile, TilePalette
+
+from topopy.primitives.topology import (
+    HexTopology, NumpyRectangularTopology, RectangularTopology
+)
 from topopy.serialization.topology import (
-    RectangularCharSerializer, RectangularKeySerializer
+    RectangularBinarySerializer, RectangularCharSerializer,
+    RectangularKeySerializer
 )
 
 
@@ -71,3 +83,149 @@ class TestRectangularKeySerializer(TestCase):
             [0, 0, 0],
         ]
         self.assertEqual(RectangularKeySerializer().serialize(topo), matrix)
+
+
+class TestRectangularBinarySerializer(TestCase):
+    topo_str = (
+        '...##\n'
+        '.##,,\n'
+        '.....\n'
+    )
+    compressions = (None, 'zlib', 'rle')
+
+    def _deserialize(self):
+        return RectangularCharSerializer(
+            topology_class=NumpyRectangularTopology
+        ).deserialize(self.topo_str)
+
+    def test_round_trip(self):
+        topo = self._deserialize()
+        for compression in self.compressions:
+            serializer = RectangularBinarySerializer(compression=compression)
+            data = serializer.serialize(topo)
+            loaded = serializer.deserialize(data)
+            self.assertIsInstance(loaded, NumpyRectangularTopology)
+            self.assertEqual(loaded.matrix, topo.matrix)
+            self.assertEqual(loaded.keys.dtype, topo.keys.dtype)
+            # Loaded topologies can be modified
+            loaded[IntLocation2D(0, 0)] = KeyTile.from_key('#')
+
+        palette = TilePalette([KeyTile.from_key(',')])
+        shared = RectangularBinarySerializer(palette=palette).deserialize(
+            RectangularBinarySerializer().serialize(topo)
+        )
+        self.assertIs(shared.palette, palette)
+        self.assertEqual(shared.matrix, topo.matrix)
+
+        hex_topo = RectangularBinarySerializer(
+            topology_class=HexTopology
+        ).deserialize(RectangularBinarySerializer().serialize(topo))
+        self.assertEqual(hex_topo.matrix, topo.matrix)
+
+        with self.assertRaises(ValueError):
+            RectangularBinarySerializer(compression='lzma')
+        with self.assertRaises(ValueError):
+            RectangularBinarySerializer().deserialize(b'..#\n')
+
+    def test_hex_layouts(self):
+        serializer = RectangularBinarySerializer(topology_class=HexTopology)
+        with tempfile.TemporaryDirectory() as path:
+            file_name = os.path.join(path, 'map.bin')
+            for layout in (HEX_ODD_R, HEX_EVEN_R, HEX_AXIAL):
+                topo = HexTopology(self._deserialize().matrix, layout=layout)
+                serializer.save(topo, file_name)
+                for loaded in (
+                        serializer.deserialize(serializer.serialize(topo)),
+                        serializer.load(file_name),
+                ):
+                    self.assertEqual(loaded.layout, layout)
+                    self.assertEqual(
+                        list(loaded.all_locations()),
+                        list(topo.all_locations())
+                    )
+                    for loc in topo.all_locations():
+                        self.assertEqual(loaded[loc], topo[loc])
+                    del loaded
+
+        # Hex maps are not silently loaded as rectangular ones
+        with self.assertRaises(ValueError):
+            RectangularBinarySerializer().deserialize(
+                serializer.serialize(HexTopology(self._deserialize().matrix))
+            )
+
+    def test_load(self):
+        topo = self._deserialize()
+        with tempfile.TemporaryDirectory() as path:
+            for compression in self.compressions:
+                file_name = os.path.join(path, 'map.bin')
+                serializer = RectangularBinarySerializer(
+                    compression=compression
+                )
+                serializer.save(topo, file_name)
+                loaded = serializer.load(file_name)
+                self.assertEqual(loaded.matrix, topo.matrix)
+                self.assertEqual(
+                    isinstance(loaded.keys, np.memmap), compression is None
+                )
+                # Changes are not written back to the file
+                loaded[IntLocation2D(0, 0)] = KeyTile.from_key('#')
+                del loaded
+                self.assertEqual(
+                    serializer.load(file_name, mmap=False).matrix,
+                    topo.matrix
+                )
+
+
+class TestStreamingCharSerializer(TestCase):
+    topo_str = (
+        '..#.....\n'
+        '.##,,...\n'
+        '........\n'
+        '#####...\n'
+        '..,,..#.\n'
+    )
+
+    def test_deserialize_stream(self):
+        serializer = RectangularCharSerializer(
+            topology_class=NumpyRectangularTopology
+        )
+        expected = serializer.deserialize(self.topo_str)
+        topo = serializer.deserialize_stream(
+            io.StringIO('\n' + self.topo_str)
+        )
+        self.assertEqual(topo.keys.tolist(), expected.keys.tolist())
+        self.assertEqual(topo.palette.tiles, expected.palette.tiles)
+        with self.assertRaises(ValueError):
+            serializer.deserialize_stream(['..#\n', '..\n'])
+        with self.assertRaises(ValueError):
+            serializer.deserialize_stream([])
+
+        # Plain rectangular topologies have no array to stream into
+        for block_size in (1, 2, 1024):
+            topo = RectangularCharSerializer().deserialize_stream(
+                io.StringIO(self.topo_str), block_size=block_size
+            )
+            self.assertIsInstance(topo, NumpyRectangularTopology)
+            self.assertEqual(topo.matrix, expected.matrix)
+
+        topo = serializer.deserialize_stream(
+            io.StringIO(self.topo_str), block_size=2,
+            topology=ChunkedTopology(
+                chunk_size=3, default_tile=KeyTile.from_key('#')
+            )
+        )
+        self.assertEqual(topo.loaded_chunks, 6)
+        for loc in expected.all_locations():
+            self.assertEqual(topo[loc], expected[loc])
+
+    def test_serialize_stream(self):
+        for topology_class in (RectangularTopology, NumpyRectangularTopology):
+            serializer = RectangularCharSerializer(
+                topology_class=topology_class
+            )
+            topo = serializer.deserialize(self.topo_str)
+            lines = list(serializer.serialize_stream(topo))
+            self.assertEqual(''.join(lines), self.topo_str)
+            self.assertEqual(
+                serializer.serialize(topo), self.topo_str.strip()
+            )
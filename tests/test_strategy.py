@@ -1,10 +1,29 @@
+import os
+import random
+import tempfile
 from unittest import TestCase
 
-from topopy.primitives.strategy import DijkstraDistanceStrategy
+from topopy.primitives.heuristic import (
+    EuclideanHeuristic, ManhattanHeuristic, OctileHeuristic
+)
+from topopy.primitives.graph import GraphCache
+from topopy.primitives.landmarks import AVOID, FARTHEST, get_landmark_path
+from topopy.primitives.strategy import (
+    ALTDistanceStrategy, AStarDistanceStrategy,
+    BidirectionalAStarDistanceStrategy, BidirectionalDijkstraDistanceStrategy,
+    ContractionHierarchyStrategy, DijkstraDistanceStrategy,
+    DistanceMapStrategy, DStarLiteDistanceStrategy,
+    HierarchicalDistanceStrategy, JumpPointSearchStrategy,
+    ReachabilityCheckStrategy, WeightedAStarDistanceStrategy
+)
 from topopy.primitives.tile import KeyTile
+from topopy.primitives.utils.dstar_lite import DStarLite
 
 from topopy.primitives.movement import (
-    MovementStrategy, SimpleRectangularMovement
+    SQRT_2, MovementStrategy, SimpleHexMovement, SimpleRectangularMovement
+)
+from topopy.primitives.topology import (
+    HexTopology, NumpyRectangularTopology, RectangularTopology
 )
 from topopy.serialization.topology import RectangularCharSerializer
 
@@ -71,3 +90,934 @@ class TestDijkstraDistanceStrategy(TestCase):
         )
         self._check_path(topo_str, expected_str, movement_strategy,
                          (0, 0), (3, 3))
+
+    def test_get_shortest_path_materialized(self):
+        topo = RectangularCharSerializer().deserialize((
+            '..#..\n'
+            '.##..\n'
+            '.....\n'
+            '.##..\n'
+        ))
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=True,
+            weight_map={('.', '.'): 1}
+        )
+        loc = topo.location_class
+        results = [
+            DijkstraDistanceStrategy(implicit=implicit).get_path(
+                topology=topo,
+                movement_strategy=movement_strategy,
+                src=loc(0, 0),
+                dst=loc(3, 4),
+            )
+            for implicit in (True, False)
+        ]
+        self.assertEqual(results[0], results[1])
+
+    def test_get_shortest_path_unreachable(self):
+        topo = RectangularCharSerializer().deserialize((
+            '..#..\n'
+            '.##..\n'
+            '##...\n'
+        ))
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=False,
+            weight_map={('.', '.'): 1}
+        )
+        loc = topo.location_class
+        dist, path = DijkstraDistanceStrategy().get_path(
+            topology=topo,
+            movement_strategy=movement_strategy,
+            src=loc(0, 0),
+            dst=loc(2, 4),
+        )
+        self.assertIsNone(dist)
+        self.assertIsNone(path)
+
+    def test_get_shortest_path_same_location(self):
+        topo = RectangularCharSerializer().deserialize('...\n')
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=False,
+            weight_map={('.', '.'): 1}
+        )
+        loc = topo.location_class
+        dist, path = DijkstraDistanceStrategy().get_path(
+            topology=topo,
+            movement_strategy=movement_strategy,
+            src=loc(0, 1),
+            dst=loc(0, 1),
+        )
+        self.assertEqual(dist, 0)
+        self.assertEqual(path, [loc(0, 1)])
+
+
+class TestAStarDistanceStrategy(TestCase):
+    topo_str = (
+        '..#......\n'
+        '.##..#.#.\n'
+        '.....#.#.\n'
+        '.##..#...\n'
+        '....,,,,.\n'
+    )
+    weight_map = {
+        ('.', '.'): 2, (',', ','): 3, ('.', ','): 3, (',', '.'): 2,
+    }
+
+    def _get_dist(self, strategy, diagonal, start, end):
+        topo = RectangularCharSerializer().deserialize(self.topo_str)
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=diagonal, weight_map=self.weight_map
+        )
+        dist, path = strategy.get_path(
+            topology=topo,
+            movement_strategy=movement_strategy,
+            src=topo.location_class(*start),
+            dst=topo.location_class(*end),
+        )
+        if path is not None:
+            self.assertEqual(path[0], topo.location_class(*start))
+            self.assertEqual(path[-1], topo.location_class(*end))
+        return dist
+
+    def test_same_distance_as_dijkstra(self):
+        for diagonal in (False, True):
+            for heuristic_class in (None, ManhattanHeuristic,
+                                    OctileHeuristic, EuclideanHeuristic):
+                for start, end in (((0, 0), (4, 8)), ((0, 8), (3, 0)),
+                                   ((4, 4), (0, 3))):
+                    self.assertAlmostEqual(
+                        self._get_dist(
+                            AStarDistanceStrategy(heuristic_class),
+                            diagonal, start, end
+                        ),
+                        self._get_dist(
+                            DijkstraDistanceStrategy(), diagonal, start, end
+                        )
+                    )
+
+    def test_weighted_is_bounded(self):
+        for diagonal in (False, True):
+            for start, end in (((0, 0), (4, 8)), ((0, 8), (3, 0))):
+                optimal = self._get_dist(
+                    DijkstraDistanceStrategy(), diagonal, start, end
+                )
+                dist = self._get_dist(
+                    WeightedAStarDistanceStrategy(weight=2),
+                    diagonal, start, end
+                )
+                self.assertLessEqual(optimal, dist)
+                self.assertLessEqual(dist, 2 * optimal)
+
+    def test_unreachable(self):
+        self.assertIsNone(self._get_dist(
+            AStarDistanceStrategy(), False, (0, 0), (0, 2)
+        ))
+
+    def test_custom_movement(self):
+        # Movements without weights get no heuristic, searches still work
+        movement_strategy = _Blocking(SimpleRectangularMovement(
+            diagonal=True, weight_map=self.weight_map
+        ), ())
+        topo = RectangularCharSerializer().deserialize(self.topo_str)
+        loc = topo.location_class
+        expected, _ = DijkstraDistanceStrategy().get_path(
+            topo, movement_strategy, loc(0, 0), loc(4, 8)
+        )
+        for strategy in (
+                AStarDistanceStrategy(), JumpPointSearchStrategy(),
+                HierarchicalDistanceStrategy(cluster_size=2),
+                ReachabilityCheckStrategy(),
+                BidirectionalAStarDistanceStrategy(),
+                DStarLiteDistanceStrategy(),
+        ):
+            dist, _ = strategy.get_path(
+                topo, movement_strategy, loc(0, 0), loc(4, 8)
+            )
+            self.assertGreaterEqual(dist, expected - 1e-9)
+            if not isinstance(strategy, HierarchicalDistanceStrategy):
+                self.assertAlmostEqual(dist, expected)
+
+    def test_heuristic_from_movement(self):
+        loc = RectangularCharSerializer().topology_class.location_class
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=True, weight_map=self.weight_map
+        )
+        heuristic = OctileHeuristic.from_movement(movement_strategy)
+        self.assertEqual(heuristic.straight, 2)
+        self.assertAlmostEqual(heuristic(loc(0, 0), loc(3, 1)), 4 + 2 * SQRT_2)
+
+        # Impassable transitions do not bound the cost of a step
+        heuristic = OctileHeuristic.from_movement(SimpleRectangularMovement(
+            diagonal=True, weight_map={('.', '.'): 1, ('.', '#'): None}
+        ))
+        self.assertEqual(heuristic.straight, 1)
+
+
+class TestDistanceMapStrategy(TestCase):
+    topo_str = (
+        '..........\n'
+        '.####.,,..\n'
+        '....#..##.\n'
+        '.##.#...#.\n'
+        '..#...#.#.\n'
+        '..#.###..#\n'
+    )
+
+    def _setup(self, topology_class=RectangularTopology):
+        topo = RectangularCharSerializer(
+            topology_class=topology_class
+        ).deserialize(self.topo_str)
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=True,
+            weight_map={('.', '.'): 1, ('.', ','): 3, (',', '.'): 1,
+                        (',', ','): 2}
+        )
+        return topo, movement_strategy
+
+    def test_same_as_dijkstra(self):
+        for topology_class in (RectangularTopology, NumpyRectangularTopology):
+            topo, movement_strategy = self._setup(topology_class)
+            loc = topo.location_class
+            strategy = DistanceMapStrategy()
+            dijkstra = DijkstraDistanceStrategy()
+            dst = loc(3, 9)
+            for x in range(6):
+                for y in range(10):
+                    src = loc(x, y)
+                    dist, path = strategy.get_path(
+                        topo, movement_strategy, src, dst
+                    )
+                    expected, _ = dijkstra.get_path(
+                        topo, movement_strategy, src, dst
+                    )
+                    if expected is None:
+                        self.assertEqual((dist, path), (None, None))
+                        continue
+                    self.assertAlmostEqual(dist, expected)
+                    self.assertEqual((path[0], path[-1]), (src, dst))
+                    self.assertAlmostEqual(dist, sum(
+                        movement_strategy.get_passability(
+                            topo[a], topo[b], a, b
+                        )
+                        for a, b in zip(path, path[1:])
+                    ))
+            self.assertEqual(strategy.cache.stats['misses'], 1)
+
+    def test_multiple_goals(self):
+        topo, movement_strategy = self._setup()
+        loc = topo.location_class
+        goals = (loc(0, 0), loc(5, 7))
+        distance_map = DistanceMapStrategy().get_distance_map(
+            topo, movement_strategy, goals
+        )
+        self.assertEqual(distance_map.get_distance(loc(0, 0)), 0)
+        self.assertIsNone(distance_map.get_next(loc(5, 7)))
+        self.assertEqual(distance_map.get_next(loc(4, 7)), loc(5, 7))
+        self.assertEqual(distance_map.get_next(loc(0, 1)), loc(0, 0))
+        # Walled-in corner
+        self.assertEqual(distance_map.get_path(loc(5, 9)), (None, None))
+
+    def test_invalidated_by_version(self):
+        topo, movement_strategy = self._setup(NumpyRectangularTopology)
+        loc = topo.location_class
+        strategy = DistanceMapStrategy()
+        src, dst = loc(0, 0), loc(2, 0)
+        self.assertEqual(
+            strategy.get_path(topo, movement_strategy, src, dst)[0], 2
+        )
+        topo[loc(1, 0)] = KeyTile.from_key('#')
+        topo[loc(1, 1)] = KeyTile.from_key('#')
+        self.assertAlmostEqual(
+            strategy.get_path(topo, movement_strategy, src, dst)[0],
+            DijkstraDistanceStrategy().get_path(
+                topo, movement_strategy, src, dst
+            )[0]
+        )
+        self.assertEqual(strategy.cache.stats['misses'], 2)
+
+
+class TestDStarLiteDistanceStrategy(TestCase):
+    topo_str = (
+        '..........\n'
+        '.####.....\n'
+        '....#..##.\n'
+        '.##.#...#.\n'
+        '..#...#.#.\n'
+        '..#.###...\n'
+    )
+
+    def _setup(self, diagonal):
+        topo = RectangularCharSerializer().deserialize(self.topo_str)
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=diagonal,
+            weight_map={('.', '.'): 1, ('.', ','): 3, (',', '.'): 1}
+        )
+        return topo, movement_strategy
+
+    def _assert_same_as_dijkstra(self, result, topo, movement_strategy,
+                                 src, dst, blocked=()):
+        expected, _ = DijkstraDistanceStrategy().get_path(
+            topo, _Blocking(movement_strategy, blocked), src, dst
+        )
+        dist, path = result
+        if expected is None:
+            self.assertIsNone(dist)
+            self.assertIsNone(path)
+            return
+        self.assertAlmostEqual(dist, expected)
+        self.assertEqual((path[0], path[-1]), (src, dst))
+        self.assertFalse(set(path[1:]) & set(blocked))
+
+    def test_replan_on_changes(self):
+        rnd = random.Random(0)
+        tiles = [KeyTile.from_key(key) for key in '..,#']
+        for diagonal in (False, True):
+            topo, movement_strategy = self._setup(diagonal)
+            loc = topo.location_class
+            strategy = DStarLiteDistanceStrategy()
+            src, dst = loc(0, 0), loc(5, 9)
+            for _ in range(30):
+                changed = loc(rnd.randrange(6), rnd.randrange(10))
+                if changed not in (src, dst):
+                    topo[changed] = rnd.choice(tiles)
+                result = strategy.get_path(topo, movement_strategy, src, dst)
+                self._assert_same_as_dijkstra(
+                    result, topo, movement_strategy, src, dst
+                )
+
+    def test_rounding_errors(self):
+        # Keys of nodes on the path are off by an ulp from the key of
+        # the start after these changes
+        topo = RectangularCharSerializer().deserialize(
+            '...,\n.#.#\n##..\n#.,.\n,#,,\n,#,,'
+        )
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=True, weight_map={
+                ('.', '.'): 1, ('.', ','): 3, (',', '.'): 1, (',', ','): 2
+            }
+        )
+        loc = topo.location_class
+        strategy = DStarLiteDistanceStrategy()
+        src, dst = loc(4, 0), loc(0, 3)
+        for changes in (
+                [(1, 0, '.')],
+                [(0, 1, '#'), (5, 1, '.'), (1, 0, '.')],
+                [(1, 3, '.'), (4, 3, '.'), (1, 0, ',')],
+                [(2, 1, '#'), (1, 2, '.'), (3, 2, '.')],
+                [(5, 1, ','), (3, 0, '.'), (0, 1, '.')],
+                [(1, 3, '#'), (0, 0, '.'), (5, 3, '.')],
+        ):
+            topo.update_many(
+                [loc(x, y) for x, y, _ in changes],
+                [KeyTile.from_key(key) for _, _, key in changes]
+            )
+            self._assert_same_as_dijkstra(
+                strategy.get_path(topo, movement_strategy, src, dst),
+                topo, movement_strategy, src, dst
+            )
+
+    def test_zero_cost_edges(self):
+        for graph, distance in (
+                ({'A': {'B': 0, 'G': 1}, 'B': {'A': 0, 'G': 1}}, 1),
+                ({'A': {'G': 1, 'B': 0}, 'B': {'A': 0, 'G': 1}}, 1),
+                # The walk dead-ends in C before backtracking to A
+                ({
+                    'A': {'B': 0, 'C': 0, 'G': 2},
+                    'B': {'A': 0, 'C': 0, 'D': 1},
+                    'C': {'A': 0, 'B': 0},
+                    'D': {'G': 1},
+                }, 2),
+        ):
+            predecessors = {}
+            for node, edges in graph.items():
+                for neighbor, weight in edges.items():
+                    predecessors.setdefault(neighbor, {})[node] = weight
+            dstar = DStarLite(
+                lambda node: list(graph.get(node, {}).items()),
+                lambda node: list(predecessors.get(node, {}).items()),
+                'A', 'G', lambda a, b: 0
+            )
+            for complete in (False, True):
+                dstar.compute(complete=complete)
+                dist, path = dstar.get_path()
+                self.assertEqual(dist, distance)
+                self.assertEqual(
+                    sum(graph[a][b] for a, b in zip(path, path[1:])),
+                    distance
+                )
+                self.assertEqual((path[0], path[-1]), ('A', 'G'))
+
+    def test_move_along_path(self):
+        topo, movement_strategy = self._setup(True)
+        loc = topo.location_class
+        strategy = DStarLiteDistanceStrategy()
+        dst = loc(5, 9)
+        planner = strategy.get_planner(
+            topo, movement_strategy, loc(0, 0), dst, actor='a'
+        )
+        dist, path = planner.get_path()
+        expanded = planner.expanded
+        blocked = [loc(0, 5)]
+        planner.set_blocked(blocked)
+        for step in path[1:4]:
+            self.assertIs(strategy.get_planner(
+                topo, movement_strategy, step, dst, actor='a'
+            ), planner)
+            self._assert_same_as_dijkstra(
+                planner.get_path(), topo, movement_strategy, step, dst,
+                blocked
+            )
+        # Repairs are cheaper than the initial search
+        self.assertLess(planner.expanded, 2 * expanded)
+
+        planner.set_blocked([loc(4, 9), loc(5, 8)])
+        self.assertEqual(planner.get_path(), (None, None))
+        planner.set_blocked([])
+        self.assertIsNotNone(planner.get_path()[0])
+
+        strategy.forget('a')
+        self.assertIsNot(strategy.get_planner(
+            topo, movement_strategy, loc(0, 0), dst, actor='a'
+        ), planner)
+
+
+class TestJumpPointSearchStrategy(TestCase):
+    def _random_topology(self, rnd, topology_class, size=12, density=0.3):
+        return RectangularCharSerializer(
+            topology_class=topology_class
+        ).deserialize('\n'.join(
+            ''.join(
+                '#' if rnd.random() < density else rnd.choice('.,')
+                for _ in range(size)
+            )
+            for _ in range(size)
+        ))
+
+    def test_same_distance_as_dijkstra(self):
+        rnd = random.Random(1)
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=True, weight_map={
+                (a, b): 2 for a in '.,' for b in '.,'
+            }
+        )
+        strategy = JumpPointSearchStrategy(fallback=_Failing())
+        for topology_class in (RectangularTopology, NumpyRectangularTopology):
+            for _ in range(20):
+                topo = self._random_topology(rnd, topology_class)
+                loc = topo.location_class
+                src = loc(rnd.randrange(12), rnd.randrange(12))
+                dst = loc(rnd.randrange(12), rnd.randrange(12))
+                expected, _ = DijkstraDistanceStrategy().get_path(
+                    topo, movement_strategy, src, dst
+                )
+                dist, path = strategy.get_path(
+                    topo, movement_strategy, src, dst
+                )
+                if expected is None:
+                    self.assertEqual((dist, path), (None, None))
+                    continue
+                self.assertAlmostEqual(dist, expected)
+                self.assertEqual((path[0], path[-1]), (src, dst))
+                cost = sum(
+                    dict(topo.iter_neighbors(a, movement_strategy))[b]
+                    for a, b in zip(path, path[1:])
+                )
+                self.assertAlmostEqual(cost, expected)
+
+    def test_fallback(self):
+        topo = self._random_topology(random.Random(2), RectangularTopology)
+        loc = topo.location_class
+        for movement_strategy in (
+                SimpleRectangularMovement(
+                    diagonal=False, weight_map={('.', '.'): 1}
+                ),
+                SimpleRectangularMovement(
+                    diagonal=True, weight_map={('.', '.'): 1, ('.', ','): 2}
+                ),
+        ):
+            with self.assertRaises(NotImplementedError):
+                JumpPointSearchStrategy(fallback=_Failing()).get_path(
+                    topo, movement_strategy, loc(0, 0), loc(5, 5)
+                )
+
+    def test_uniform_weight(self):
+        self.assertEqual(
+            SimpleRectangularMovement(weight_map={
+                ('.', '.'): 1, ('.', ','): 1, (',', '.'): 1, (',', ','): 1,
+                ('#', '#'): None,
+            }).get_uniform_weight(),
+            (frozenset('.,'), 1)
+        )
+        self.assertIsNone(SimpleRectangularMovement(weight_map={
+            ('.', '.'): 1, ('.', ','): 1, (',', ','): 1,
+        }).get_uniform_weight())
+
+
+class _Failing(DijkstraDistanceStrategy):
+    def get_path(self, *args, **kwargs):
+        raise NotImplementedError
+
+
+class _Blocking(MovementStrategy):
+    """Forbid moving into the given cells"""
+
+    def __init__(self, movement_strategy, blocked):
+        self.movement_strategy = movement_strategy
+        self.blocked = set(blocked)
+
+    def get_passability(self, from_tile, to_tile, from_loc, to_loc):
+        if to_loc not in self.blocked:
+            return self.movement_strategy.get_passability(
+                from_tile, to_tile, from_loc, to_loc
+            )
+
+
+class TestHierarchicalDistanceStrategy(TestCase):
+    size = 40
+
+    def _random_topology(self, rnd):
+        tiles = [KeyTile.from_key(key) for key in '...,#']
+        return NumpyRectangularTopology([
+            [rnd.choice(tiles) for _ in range(self.size)]
+            for _ in range(self.size)
+        ])
+
+    def _assert_near_dijkstra(self, strategy, topo, movement_strategy,
+                              src, dst):
+        dist, path = strategy.get_path(topo, movement_strategy, src, dst)
+        expected, _ = DijkstraDistanceStrategy().get_path(
+            topo, movement_strategy, src, dst
+        )
+        if expected is None:
+            self.assertEqual((dist, path), (None, None))
+            return
+        self.assertEqual((path[0], path[-1]), (src, dst))
+        self.assertAlmostEqual(dist, sum(
+            movement_strategy.get_passability(topo[a], topo[b], a, b)
+            for a, b in zip(path, path[1:])
+        ))
+        self.assertGreaterEqual(dist, expected - 1e-9)
+        self.assertLessEqual(dist, expected * 1.5)
+
+    def test_near_dijkstra(self):
+        rnd = random.Random(0)
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=True,
+            weight_map={('.', '.'): 1, ('.', ','): 3, (',', '.'): 1,
+                        (',', ','): 2}
+        )
+        for _ in range(5):
+            topo = self._random_topology(rnd)
+            loc = topo.location_class
+            strategy = HierarchicalDistanceStrategy(cluster_size=8)
+            for _ in range(20):
+                self._assert_near_dijkstra(
+                    strategy, topo, movement_strategy,
+                    loc(rnd.randrange(self.size), rnd.randrange(self.size)),
+                    loc(rnd.randrange(self.size), rnd.randrange(self.size))
+                )
+
+    def test_diagonal_crossings(self):
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=True,
+            weight_map={('.', '.'): 1, ('.', ','): 3, (',', '.'): 1,
+                        (',', ','): 2}
+        )
+        heuristic = OctileHeuristic.from_movement(movement_strategy)
+        serializer = RectangularCharSerializer(
+            topology_class=NumpyRectangularTopology
+        )
+        # The clusters only meet at a corner
+        topo = serializer.deserialize('...###\n' * 3 + '###...\n' * 3)
+        loc = topo.location_class
+        abstraction = HierarchicalDistanceStrategy(
+            cluster_size=3
+        ).get_abstraction(topo, movement_strategy)
+        self.assertAlmostEqual(
+            abstraction.get_path(loc(0, 0), loc(5, 5), heuristic)[0],
+            5 * SQRT_2
+        )
+
+        # Borders crossed only by diagonal steps
+        rnd = random.Random(2)
+        for _ in range(30):
+            topo = serializer.deserialize('\n'.join(
+                ''.join(rnd.choice('...,##') for _ in range(6))
+                for _ in range(8)
+            ))
+            loc = topo.location_class
+            abstraction = HierarchicalDistanceStrategy(
+                cluster_size=3
+            ).get_abstraction(topo, movement_strategy)
+            for _ in range(10):
+                src = loc(rnd.randrange(8), rnd.randrange(6))
+                dst = loc(rnd.randrange(8), rnd.randrange(6))
+                expected, _ = DijkstraDistanceStrategy().get_path(
+                    topo, movement_strategy, src, dst
+                )
+                dist, path = abstraction.get_path(src, dst, heuristic)
+                self.assertEqual(dist is None, expected is None)
+                if path is not None:
+                    self.assertEqual((path[0], path[-1]), (src, dst))
+                    self.assertGreaterEqual(dist, expected - 1e-9)
+
+    def test_rebuilds_affected_clusters(self):
+        rnd = random.Random(1)
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=False, weight_map={('.', '.'): 1, (',', ','): 1}
+        )
+        topo = self._random_topology(rnd)
+        loc = topo.location_class
+        strategy = HierarchicalDistanceStrategy(cluster_size=8)
+        abstraction = strategy.get_abstraction(topo, movement_strategy)
+        abstraction.precompute()
+        self.assertEqual(len(abstraction), 25)
+
+        wall = KeyTile.from_key('#')
+        for _ in range(10):
+            topo[loc(rnd.randrange(self.size), rnd.randrange(self.size))] = (
+                wall
+            )
+            self._assert_near_dijkstra(
+                strategy, topo, movement_strategy, loc(0, 0), loc(39, 39)
+            )
+        self.assertIs(
+            strategy.get_abstraction(topo, movement_strategy), abstraction
+        )
+        abstraction.precompute()
+        topo[loc(12, 12)] = wall
+        strategy.get_abstraction(topo, movement_strategy)
+        # The cluster of the changed cell and its four neighbours
+        self.assertEqual(len(abstraction), 20)
+
+
+class TestALTDistanceStrategy(TestCase):
+    movement_strategy = SimpleRectangularMovement(
+        diagonal=True,
+        weight_map={('.', '.'): 1, ('.', ','): 3, (',', '.'): 1,
+                    (',', ','): 2}
+    )
+
+    def _random_topology(self, rnd, size=24):
+        tiles = [KeyTile.from_key(key) for key in '...,#']
+        return NumpyRectangularTopology([
+            [rnd.choice(tiles) for _ in range(size)] for _ in range(size)
+        ])
+
+    def _assert_same_as_dijkstra(self, strategy, topo, queries):
+        for src, dst in queries:
+            dist, path = strategy.get_path(
+                topo, self.movement_strategy, src, dst
+            )
+            expected, _ = DijkstraDistanceStrategy().get_path(
+                topo, self.movement_strategy, src, dst
+            )
+            if expected is None:
+                self.assertEqual((dist, path), (None, None))
+            else:
+                self.assertAlmostEqual(dist, expected)
+                self.assertEqual((path[0], path[-1]), (src, dst))
+
+    def _random_queries(self, rnd, topo, count=30):
+        loc = topo.location_class
+        x_size, y_size = topo.shape
+        return [
+            (loc(rnd.randrange(x_size), rnd.randrange(y_size)),
+             loc(rnd.randrange(x_size), rnd.randrange(y_size)))
+            for _ in range(count)
+        ]
+
+    def test_same_as_dijkstra(self):
+        rnd = random.Random(0)
+        for selection in (FARTHEST, AVOID):
+            for _ in range(3):
+                topo = self._random_topology(rnd)
+                strategy = ALTDistanceStrategy(
+                    landmark_count=4, selection=selection
+                )
+                self._assert_same_as_dijkstra(
+                    strategy, topo, self._random_queries(rnd, topo)
+                )
+                table = strategy.get_landmarks(topo, self.movement_strategy)
+                self.assertEqual(len(set(table.landmarks.tolist())), 4)
+
+    def test_save_load(self):
+        rnd = random.Random(1)
+        topo = self._random_topology(rnd)
+        strategy = ALTDistanceStrategy(landmark_count=3)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = get_landmark_path(os.path.join(tmp_dir, 'map.txt'))
+            strategy.save_landmarks(topo, self.movement_strategy, path)
+            saved = strategy.get_landmarks(topo, self.movement_strategy)
+
+            restarted = ALTDistanceStrategy(landmark_count=3)
+            table = restarted.load_landmarks(
+                topo, self.movement_strategy, path
+            )
+            self.assertIs(
+                restarted.get_landmarks(topo, self.movement_strategy), table
+            )
+            self.assertEqual(table.from_landmarks.dtype, 'float32')
+            self.assertTrue(
+                (table.from_landmarks == saved.from_landmarks).all()
+            )
+            self._assert_same_as_dijkstra(
+                restarted, topo, self._random_queries(rnd, topo)
+            )
+            self.assertEqual(restarted.landmark_cache.stats['misses'], 0)
+
+            with self.assertRaises(ValueError):
+                restarted.load_landmarks(
+                    self._random_topology(rnd, size=10),
+                    self.movement_strategy, path
+                )
+
+
+class TestContractionHierarchyStrategy(TestCase):
+    def test_same_as_dijkstra(self):
+        rnd = random.Random(0)
+        tiles = [KeyTile.from_key(key) for key in '...,#']
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=True,
+            weight_map={('.', '.'): 1, ('.', ','): 3, (',', '.'): 1,
+                        (',', ','): 2}
+        )
+        for topology_class in (RectangularTopology, NumpyRectangularTopology):
+            topo = topology_class([
+                [rnd.choice(tiles) for _ in range(20)] for _ in range(20)
+            ])
+            loc = topo.location_class
+            strategy = ContractionHierarchyStrategy()
+            for _ in range(40):
+                src = loc(rnd.randrange(20), rnd.randrange(20))
+                dst = loc(rnd.randrange(20), rnd.randrange(20))
+                dist, path = strategy.get_path(
+                    topo, movement_strategy, src, dst
+                )
+                expected, _ = DijkstraDistanceStrategy().get_path(
+                    topo, movement_strategy, src, dst
+                )
+                if expected is None:
+                    self.assertEqual((dist, path), (None, None))
+                    continue
+                self.assertAlmostEqual(dist, expected, places=4)
+                self.assertEqual((path[0], path[-1]), (src, dst))
+                self.assertAlmostEqual(dist, sum(
+                    movement_strategy.get_passability(
+                        topo[a], topo[b], a, b
+                    )
+                    for a, b in zip(path, path[1:])
+                ), places=4)
+
+            stats = strategy.get_hierarchy(topo, movement_strategy).stats
+            self.assertEqual(stats['nodes'], 400)
+            self.assertGreater(stats['shortcuts'], 0)
+            self.assertGreater(stats['nbytes'], 0)
+            self.assertEqual(strategy.cache.stats['misses'], 1)
+
+    def test_rebuild(self):
+        topo = RectangularCharSerializer(
+            topology_class=NumpyRectangularTopology
+        ).deserialize('....\n.#..\n....')
+        movement_strategy = SimpleRectangularMovement(
+            weight_map={('.', '.'): 1}
+        )
+        loc = topo.location_class
+        src, dst = loc(1, 0), loc(1, 2)
+        strategy = ContractionHierarchyStrategy()
+        self.assertEqual(
+            strategy.get_path(topo, movement_strategy, src, dst)[0], 4
+        )
+        self.assertFalse(strategy.rebuild(topo, movement_strategy))
+        hierarchy = strategy.get_hierarchy(topo, movement_strategy)
+
+        # Changes do not block queries on a new hierarchy
+        topo[loc(1, 1)] = KeyTile.from_key('.')
+        self.assertEqual(
+            strategy.get_path(topo, movement_strategy, src, dst)[0], 2
+        )
+        self.assertEqual(strategy.cache.stats['misses'], 1)
+        self.assertTrue(strategy.rebuild(topo, movement_strategy))
+        self.assertIsNot(
+            strategy.get_hierarchy(topo, movement_strategy), hierarchy
+        )
+        self.assertEqual(
+            strategy.get_path(topo, movement_strategy, src, dst)[0], 2
+        )
+        self.assertEqual(strategy.cache.stats['misses'], 2)
+
+
+class TestBidirectionalStrategies(TestCase):
+    weight_map = {('.', '.'): 1, ('.', ','): 3, (',', '.'): 1, (',', ','): 2}
+
+    def _check_same_as_dijkstra(self, strategy, diagonal):
+        rnd = random.Random(0)
+        tiles = [KeyTile.from_key(key) for key in '...,#']
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=diagonal, weight_map=self.weight_map
+        )
+        for _ in range(3):
+            topo = NumpyRectangularTopology([
+                [rnd.choice(tiles) for _ in range(25)] for _ in range(25)
+            ])
+            loc = topo.location_class
+            for _ in range(30):
+                src = loc(rnd.randrange(25), rnd.randrange(25))
+                dst = loc(rnd.randrange(25), rnd.randrange(25))
+                dist, path = strategy.get_path(
+                    topo, movement_strategy, src, dst
+                )
+                # Compact graphs have float32 weights
+                expected, _ = DijkstraDistanceStrategy(
+                    implicit=strategy.implicit, compact=strategy.compact,
+                    graph_cache=strategy.graph_cache
+                ).get_path(topo, movement_strategy, src, dst)
+                if expected is None:
+                    self.assertEqual((dist, path), (None, None))
+                    continue
+                if diagonal:
+                    # Equal paths may sum diagonal steps in another order
+                    self.assertAlmostEqual(dist, expected)
+                else:
+                    self.assertEqual(dist, expected)
+                self.assertEqual((path[0], path[-1]), (src, dst))
+                self.assertAlmostEqual(dist, sum(
+                    movement_strategy.get_passability(
+                        topo[a], topo[b], a, b
+                    )
+                    for a, b in zip(path, path[1:])
+                ), places=5)
+
+    def test_same_as_dijkstra(self):
+        for strategy in (
+                BidirectionalDijkstraDistanceStrategy(),
+                BidirectionalDijkstraDistanceStrategy(
+                    implicit=False, compact=True, graph_cache=GraphCache()
+                ),
+                BidirectionalAStarDistanceStrategy(),
+                BidirectionalAStarDistanceStrategy(
+                    implicit=False, graph_cache=GraphCache()
+                ),
+        ):
+            for diagonal in (False, True):
+                with self.subTest(strategy=strategy, diagonal=diagonal):
+                    self._check_same_as_dijkstra(strategy, diagonal)
+
+
+class TestReachabilityCheckStrategy(TestCase):
+    size = 20
+
+    def _check_index(self, strategy, topo, movement_strategy, rnd):
+        index = strategy.cache.get(topo, movement_strategy)
+        loc = topo.location_class
+        for _ in range(50):
+            src = loc(rnd.randrange(self.size), rnd.randrange(self.size))
+            dst = loc(rnd.randrange(self.size), rnd.randrange(self.size))
+            expected, _ = DijkstraDistanceStrategy().get_path(
+                topo, movement_strategy, src, dst
+            )
+            reachable = index.is_reachable(src, dst)
+            if reachable is not None:
+                self.assertEqual(reachable, expected is not None)
+            dist, _ = strategy.get_path(topo, movement_strategy, src, dst)
+            self.assertEqual(dist, expected)
+
+    def _check_changes(self, movement_strategy, seed):
+        rnd = random.Random(seed)
+        tiles = [KeyTile.from_key(key) for key in '..,##']
+        topo = NumpyRectangularTopology([
+            [rnd.choice(tiles) for _ in range(self.size)]
+            for _ in range(self.size)
+        ])
+        loc = topo.location_class
+        strategy = ReachabilityCheckStrategy(
+            strategy=DijkstraDistanceStrategy()
+        )
+        self._check_index(strategy, topo, movement_strategy, rnd)
+        for _ in range(10):
+            topo.update_many(
+                [loc(rnd.randrange(self.size), rnd.randrange(self.size))
+                 for _ in range(3)],
+                [rnd.choice(tiles) for _ in range(3)]
+            )
+            self._check_index(strategy, topo, movement_strategy, rnd)
+        return strategy
+
+    def test_undirected(self):
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=True,
+            weight_map={('.', '.'): 1, ('.', ','): 3, (',', '.'): 1,
+                        (',', ','): 2}
+        )
+        strategy = self._check_changes(movement_strategy, 0)
+        # Most changes are applied in place
+        self.assertGreater(strategy.cache.updates, 5)
+
+    def test_directed(self):
+        # Cells with ``,`` can be entered but not left
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=False,
+            weight_map={('.', '.'): 1, ('.', ','): 1, (',', ','): 1}
+        )
+        self._check_changes(movement_strategy, 1)
+
+    def test_rejects_without_searching(self):
+        topo = RectangularCharSerializer().deserialize((
+            '..#..\n'
+            '..#..\n'
+        ))
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=False,
+            weight_map={('.', '.'): 1}
+        )
+        loc = topo.location_class
+        strategy = ReachabilityCheckStrategy(strategy=_Failing())
+        self.assertEqual(
+            strategy.get_path(topo, movement_strategy, loc(0, 0), loc(0, 4)),
+            (None, None)
+        )
+        with self.assertRaises(NotImplementedError):
+            strategy.get_path(topo, movement_strategy, loc(0, 0), loc(1, 1))
+
+
+class TestHexStrategies(TestCase):
+    def test_same_as_dijkstra(self):
+        rnd = random.Random(0)
+        tiles = [KeyTile.from_key(key) for key in '...,#']
+        movement_strategy = SimpleHexMovement(weight_map={
+            ('.', '.'): 1, ('.', ','): 3, (',', '.'): 1, (',', ','): 2
+        })
+        topo = HexTopology([
+            [rnd.choice(tiles) for _ in range(20)] for _ in range(15)
+        ])
+        locs = list(topo.all_locations())
+        queries = [
+            (rnd.choice(locs), rnd.choice(locs)) for _ in range(20)
+        ]
+        for strategy in (
+                AStarDistanceStrategy(),
+                BidirectionalAStarDistanceStrategy(),
+                ALTDistanceStrategy(),
+                ContractionHierarchyStrategy(),
+                DistanceMapStrategy(),
+                DStarLiteDistanceStrategy(),
+                HierarchicalDistanceStrategy(cluster_size=4),
+                JumpPointSearchStrategy(),
+                ReachabilityCheckStrategy(),
+        ):
+            for src, dst in queries:
+                with self.subTest(strategy=strategy, src=src, dst=dst):
+                    expected, _ = DijkstraDistanceStrategy().get_path(
+                        topo, movement_strategy, src, dst
+                    )
+                    dist, path = strategy.get_path(
+                        topo, movement_strategy, src, dst
+                    )
+                    if expected is None:
+                        self.assertEqual((dist, path), (None, None))
+                        continue
+                    self.assertAlmostEqual(dist, expected, places=5)
+                    self.assertEqual((path[0], path[-1]), (src, dst))
+                    self.assertTrue(all(
+                        a.distance(b) == 1 for a, b in zip(path, path[1:])
+                    ))
@@ -1,9 +1,27 @@
+import tempfile
 from unittest import TestCase
 
-from topopy.primitives.tile import KeyTile
-from topopy.primitives.topology import RectangularTopology
+import numpy as np
 
-from topopy.primitives.movement import SimpleRectangularMovement
+from topopy.primitives.chunked import (
+    ChunkedTopology, DirectoryChunkStore, SQLiteChunkStore
+)
+from topopy.primitives.graph import CSRGraph, GraphCache
+from topopy.primitives.location import (
+    HEX_AXIAL, HEX_EVEN_R, HEX_ODD_R, HexLocation, IntLocation2D
+)
+from topopy.primitives.tile import KeyTile, TilePalette
+from topopy.primitives.topology import (
+    GraphableTopology, HexTopology, NumpyRectangularTopology,
+    RectangularTopology
+)
+
+from topopy.primitives.movement import (
+    MovementStrategy, SimpleHexMovement, SimpleRectangularMovement
+)
+from topopy.primitives.strategy import (
+    AStarDistanceStrategy, DijkstraDistanceStrategy
+)
 from topopy.serialization.topology import RectangularCharSerializer
 
 
@@ -64,6 +82,25 @@ class TestRectangularTopology(TestCase):
         result_graph = topo.to_graph(movement_strategy=movement_strategy)
         self.assertEqual(result_graph, graph)
 
+    def test_iter_neighbors(self):
+        topo = RectangularCharSerializer().deserialize((
+            '..#\n'
+            '.#,\n'
+            '...\n'
+        ))
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=True,
+            weight_map={('.', '.'): 1, ('.', ','): 2}
+        )
+        graph = topo.to_graph(movement_strategy=movement_strategy)
+        for loc in topo.all_locations():
+            neighbors = dict(topo.iter_neighbors(loc, movement_strategy))
+            generic_neighbors = dict(GraphableTopology.iter_neighbors(
+                topo, loc, movement_strategy
+            ))
+            self.assertEqual(neighbors, generic_neighbors)
+            self.assertEqual(neighbors, graph.get(loc, {}))
+
     def test_getitem(self):
         loc = RectangularTopology.location_class
         topo = RectangularCharSerializer(
@@ -88,3 +125,427 @@ class TestRectangularTopology(TestCase):
         ))
         topo[loc(1, 2)] = KeyTile.from_key('Q')
         self.assertEqual(KeyTile.from_key('Q'), topo.matrix[1][2])
+
+
+class TestNumpyRectangularTopology(TestCase):
+    topo_str = (
+        '..#.\n'
+        '.#,.\n'
+        '..,,\n'
+    )
+    weight_map = {('.', '.'): 1, ('.', ','): 2, (',', ','): 3}
+
+    def _deserialize(self, topology_class):
+        return RectangularCharSerializer(
+            topology_class=topology_class
+        ).deserialize(self.topo_str)
+
+    def test_init(self):
+        topo = self._deserialize(NumpyRectangularTopology)
+        self.assertEqual(topo.shape, (3, 4))
+        self.assertEqual(topo.keys.dtype, np.uint16)
+        self.assertEqual(
+            [tile.key for tile in topo.palette], ['.', '#', ',']
+        )
+        self.assertEqual(
+            RectangularCharSerializer().serialize(topo).strip(),
+            self.topo_str.strip()
+        )
+
+    def test_getitem_setitem(self):
+        loc = NumpyRectangularTopology.location_class
+        topo = self._deserialize(NumpyRectangularTopology)
+        self.assertEqual(topo[loc(1, 2)], KeyTile.from_key(','))
+        topo[loc(1, 2)] = KeyTile.from_key('Q')
+        self.assertEqual(topo[loc(1, 2)], KeyTile.from_key('Q'))
+        self.assertEqual(topo.keys[1, 2], 3)
+
+    def test_to_graph(self):
+        for diagonal in (False, True):
+            movement_strategy = SimpleRectangularMovement(
+                diagonal=diagonal, weight_map=self.weight_map
+            )
+            expected = self._deserialize(RectangularTopology).to_graph(
+                movement_strategy
+            )
+            topo = self._deserialize(NumpyRectangularTopology)
+            graph = topo.to_graph(movement_strategy)
+            # Same costs to the last bit, e.g. of diagonal steps
+            self.assertEqual(graph, expected)
+            for loc, edges in expected.items():
+                self.assertEqual(
+                    dict(topo.iter_neighbors(loc, movement_strategy)), edges
+                )
+
+    def test_get_edge_costs_generic(self):
+        class Movement(MovementStrategy):
+            def get_passability(self, from_tile, to_tile,
+                                from_loc, to_loc):
+                if to_tile.key != '#':
+                    return 5
+
+        topo = self._deserialize(NumpyRectangularTopology)
+        directions, costs = topo.get_edge_costs(Movement())
+        self.assertEqual(costs.shape, (8, 3, 4))
+        up = directions.index((-1, 0))
+        self.assertEqual(costs[up, 1, 0], 5)
+        self.assertEqual(costs[up, 1, 2], np.inf)
+        self.assertEqual(costs[up, 0, 0], np.inf)
+
+    def test_compiled_movement(self):
+        class Movement(MovementStrategy):
+            def __init__(self, compilable):
+                self.compilable = compilable
+
+            def get_passability(self, from_tile, to_tile,
+                                from_loc, to_loc):
+                if to_tile.key != '#' and from_loc.x == to_loc.x:
+                    return 5 if from_tile.key == ',' else 1
+
+        topo = self._deserialize(NumpyRectangularTopology)
+        graphs = [
+            topo.to_graph(Movement(compilable))
+            for compilable in (False, True)
+        ]
+        self.assertEqual(graphs[0], graphs[1])
+        for compilable in (False, True):
+            movement_strategy = Movement(compilable)
+            for loc in topo.all_locations():
+                self.assertEqual(
+                    dict(topo.iter_predecessors(loc, movement_strategy)), {
+                        from_loc: edges[loc]
+                        for from_loc, edges in graphs[0].items()
+                        if loc in edges
+                    }
+                )
+
+    def test_compile_cache(self):
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=True, weight_map=self.weight_map
+        )
+        topo = self._deserialize(NumpyRectangularTopology)
+        directions = ((1, 0), (1, 1))
+        compiled = movement_strategy.compile(topo.palette, directions)
+        self.assertEqual(compiled.costs.shape, (3, 3, 2))
+        # Same table as tabulating get_passability
+        np.testing.assert_array_equal(
+            compiled.costs,
+            MovementStrategy.compile_costs(
+                movement_strategy, topo.palette, directions
+            )
+        )
+        self.assertIs(
+            movement_strategy.compile(topo.palette, directions), compiled
+        )
+        topo[topo.location_class(0, 0)] = KeyTile.from_key('Q')
+        self.assertEqual(
+            movement_strategy.compile(topo.palette, directions).costs.shape,
+            (4, 4, 2)
+        )
+
+
+class TestTilePalette(TestCase):
+    def test_palette(self):
+        t = KeyTile.from_key
+        self.assertEqual(hash(KeyTile('.')), hash(t('.')))
+        self.assertEqual(len({KeyTile('.'), t('.'), t('#')}), 2)
+
+        palette = TilePalette([t('.'), t('#'), t('.')], max_size=3)
+        self.assertEqual(palette.tiles, [t('.'), t('#')])
+        self.assertEqual(palette.get_id(KeyTile('#')), 1)
+        self.assertEqual(palette.get_id(t(',')), 2)
+        self.assertEqual(palette[2], t(','))
+        self.assertIsNone(palette.find(t('~')))
+        self.assertNotIn(t('~'), palette)
+        with self.assertRaises(ValueError):
+            palette.get_id(t('~'))
+
+    def test_shared(self):
+        t = KeyTile.from_key
+        palette = TilePalette()
+        movement_strategy = SimpleRectangularMovement(
+            weight_map={('.', '.'): 1, (',', ','): 2}
+        )
+        topos = [
+            NumpyRectangularTopology([[t('.'), t('#')]], palette=palette),
+            NumpyRectangularTopology.from_array(
+                np.array([[2, 0]], dtype=np.uint16), palette
+            ),
+            RectangularCharSerializer(
+                topology_class=NumpyRectangularTopology, palette=palette
+            ).deserialize(',,.\n...'),
+        ]
+        self.assertEqual(palette.tiles, [t('.'), t('#'), t(',')])
+        self.assertEqual(topos[1][IntLocation2D(0, 0)], t(','))
+        for topo in topos:
+            self.assertIs(topo.palette, palette)
+            topo.to_graph(movement_strategy)
+        self.assertEqual(len(movement_strategy._compiled), 1)
+
+        # Repeated tiles of a plain sequence are merged
+        topo = NumpyRectangularTopology.from_array(
+            np.array([[0, 1, 2]], dtype=np.uint16), [t('.'), t('#'), t('.')]
+        )
+        self.assertEqual(topo.keys.tolist(), [[0, 1, 0]])
+
+    def test_rejected_updates(self):
+        t = KeyTile.from_key
+        palette = TilePalette()
+        matrix = [[t('.'), t('#')], [t('.'), t('.')]]
+        topos = [
+            RectangularTopology(matrix),
+            NumpyRectangularTopology(matrix, palette=palette),
+            HexTopology(matrix, palette=palette),
+        ]
+        for topo in topos:
+            with self.subTest(topology=type(topo).__name__):
+                loc = list(topo.all_locations())[0]
+                far = type(loc)(5, 5)
+                version = topo.version
+                topo.update_many([], [])
+                for locs, tiles, error in (
+                        ([loc], [t('~'), t('~')], ValueError),
+                        ([loc, loc], [t('~')], ValueError),
+                        ([far], [t('~')], IndexError),
+                ):
+                    with self.assertRaises(error):
+                        topo.update_many(locs, tiles)
+                self.assertEqual(topo.version, version)
+                self.assertFalse(topo.changed_since(version))
+                self.assertNotIn(t('~'), palette)
+                topo.update_many([loc], [t(',')])
+                self.assertEqual(topo.version, version + 1)
+                self.assertEqual(topo[loc], t(','))
+
+
+class TestHexTopology(TestCase):
+    topo_str = (
+        '..#..\n'
+        '.#,..\n'
+        '..,,.\n'
+        '#....\n'
+    )
+    weight_map = {('.', '.'): 1, ('.', ','): 2, (',', ','): 3}
+    layouts = (HEX_ODD_R, HEX_EVEN_R, HEX_AXIAL)
+
+    def _deserialize(self, layout=HEX_ODD_R):
+        return HexTopology([
+            [KeyTile.from_key(key) for key in line]
+            for line in self.topo_str.split()
+        ], layout=layout)
+
+    def test_location(self):
+        for layout in self.layouts:
+            for row in range(-3, 4):
+                for col in range(-3, 4):
+                    loc = HexLocation.from_offset(row, col, layout)
+                    self.assertEqual(loc.to_offset(layout), (row, col))
+        self.assertEqual(HexLocation(0, 0).distance(HexLocation(2, -1)), 2)
+        self.assertEqual(HexLocation(0, 0).distance(HexLocation(2, 1)), 3)
+        with self.assertRaises(ValueError):
+            HexLocation.get_row_shift('odd-q', 1)
+
+    def test_serialization(self):
+        topo = RectangularCharSerializer(
+            topology_class=HexTopology
+        ).deserialize(self.topo_str)
+        self.assertEqual(topo.shape, (4, 5))
+        self.assertEqual(
+            topo[HexLocation.from_offset(1, 2)], KeyTile.from_key(',')
+        )
+        self.assertEqual(
+            RectangularCharSerializer().serialize(topo).strip(),
+            self.topo_str.strip()
+        )
+        with self.assertRaises(IndexError):
+            topo[HexLocation(-1, 0)]
+
+    def test_neighbors(self):
+        class Movement(MovementStrategy):
+            def get_passability(self, from_tile, to_tile,
+                                from_loc, to_loc):
+                if to_tile.key != '#':
+                    return 2 if from_tile.key == ',' else 1
+
+        for layout in self.layouts:
+            topo = self._deserialize(layout)
+            # Interior hexagons have six neighbours
+            loc = HexLocation.from_offset(2, 3, layout)
+            affected = topo.get_affected_locations([loc])
+            self.assertEqual(len(affected), 7)
+            self.assertEqual(
+                sorted(to_loc.distance(loc) for to_loc in affected),
+                [0] + [1] * 6
+            )
+            for movement_strategy in (
+                    Movement(), SimpleHexMovement(self.weight_map)):
+                graph = topo.to_graph(movement_strategy)
+                compact = topo.to_graph(movement_strategy, compact=True)
+                self.assertEqual(compact.to_dict(), graph)
+                for loc in topo.all_locations():
+                    edges = dict(topo.iter_neighbors(loc, movement_strategy))
+                    self.assertEqual(edges, graph.get(loc, {}))
+                    self.assertTrue(all(
+                        to_loc.distance(loc) == 1 for to_loc in edges
+                    ))
+                    self.assertEqual(
+                        dict(topo.iter_predecessors(loc, movement_strategy)),
+                        {
+                            from_loc: edges[loc]
+                            for from_loc, edges in graph.items()
+                            if loc in edges
+                        }
+                    )
+
+    def test_update(self):
+        movement_strategy = SimpleHexMovement(self.weight_map)
+        topo = self._deserialize()
+        cache = GraphCache()
+        graph = cache.get_graph(topo, movement_strategy, compact=True)
+        topo.update_many(
+            [HexLocation.from_offset(0, 0), HexLocation.from_offset(3, 0)],
+            [KeyTile.from_key('#'), KeyTile.from_key('.')]
+        )
+        self.assertIs(
+            cache.get_graph(topo, movement_strategy, compact=True), graph
+        )
+        self.assertEqual(
+            graph.to_dict(), topo.to_graph(movement_strategy)
+        )
+        with tempfile.TemporaryDirectory() as path:
+            graph.save(path)
+            self.assertEqual(CSRGraph.load(path).to_dict(), graph.to_dict())
+
+
+def shift(loc):
+    # Shift test maps so that they span negative chunk coordinates
+    return IntLocation2D(loc.x - 4, loc.y - 5)
+
+
+class TestChunkedTopology(TestCase):
+    topo_str = (
+        '..#.......\n'
+        '.#,..###..\n'
+        '..,,...#,.\n'
+        '.###.#.#..\n'
+        '...#...#.#\n'
+        '.#...#....\n'
+        '.#.#####.#\n'
+        '...,,,....\n'
+    )
+    weight_map = {('.', '.'): 1, ('.', ','): 2, (',', ','): 3}
+    wall = KeyTile.from_key('#')
+
+    def _deserialize(self, store=None, memory_budget=2**20):
+        expected = RectangularCharSerializer(
+            topology_class=NumpyRectangularTopology
+        ).deserialize(self.topo_str)
+        topo = ChunkedTopology(
+            chunk_size=3, default_tile=self.wall, store=store,
+            memory_budget=memory_budget
+        )
+        topo.update_many(
+            [shift(loc) for loc in expected.all_locations()],
+            [expected[loc] for loc in expected.all_locations()]
+        )
+        return topo, expected
+
+    def _check_paths(self, topo, expected):
+        for diagonal in (False, True):
+            movement_strategy = SimpleRectangularMovement(
+                diagonal=diagonal, weight_map=self.weight_map
+            )
+            strategies = (DijkstraDistanceStrategy(), AStarDistanceStrategy())
+            for strategy in strategies:
+                for src, dst in (((0, 0), (7, 9)), ((7, 0), (0, 9)),
+                                 ((2, 3), (4, 8)), ((0, 0), (0, 2))):
+                    src, dst = IntLocation2D(*src), IntLocation2D(*dst)
+                    dist, path = strategy.get_path(
+                        topo, movement_strategy, shift(src), shift(dst)
+                    )
+                    expected_dist, expected_path = strategy.get_path(
+                        expected, movement_strategy, src, dst
+                    )
+                    self.assertAlmostEqual(dist, expected_dist, 6)
+                    if expected_path is None:
+                        self.assertIsNone(path)
+                        continue
+                    self.assertEqual(len(path), len(expected_path))
+                    self.assertEqual(path[0], shift(src))
+                    self.assertEqual(path[-1], shift(dst))
+
+    def test_getitem_setitem(self):
+        topo, expected = self._deserialize()
+        self.assertEqual(topo.loaded_chunks, 16)
+        self.assertEqual(topo[IntLocation2D(-3, -3)], KeyTile.from_key(','))
+        self.assertEqual(topo[IntLocation2D(1000, -1000)], self.wall)
+        topo[IntLocation2D(1000, -1000)] = self.wall
+        self.assertEqual(topo.loaded_chunks, 16)
+        topo[IntLocation2D(1000, -1000)] = KeyTile.from_key('.')
+        self.assertEqual(topo.loaded_chunks, 17)
+        self.assertEqual(topo[IntLocation2D(1000, -1000)].key, '.')
+        self.assertEqual(topo.version, 3)
+        with self.assertRaises(TypeError):
+            topo[(0, 0)]
+
+    def test_neighbors(self):
+        topo, expected = self._deserialize()
+        movement_strategy = SimpleRectangularMovement(
+            diagonal=True, weight_map=self.weight_map
+        )
+        for loc in expected.all_locations():
+            for method in ('iter_neighbors', 'iter_predecessors'):
+                self.assertEqual(
+                    dict(getattr(topo, method)(shift(loc), movement_strategy)),
+                    {
+                        shift(to_loc): cost for to_loc, cost in getattr(
+                            expected, method
+                        )(loc, movement_strategy)
+                    }
+                )
+        self._check_paths(topo, expected)
+
+    def test_store(self):
+        with tempfile.TemporaryDirectory() as path:
+            stores = (
+                lambda: DirectoryChunkStore(path + '/chunks'),
+                lambda: SQLiteChunkStore(path + '/chunks.db'),
+            )
+            for create_store in stores:
+                # Room for two chunks only
+                topo, expected = self._deserialize(create_store(), 36)
+                self.assertEqual(topo.loaded_chunks, 2)
+                self.assertGreater(topo.evictions, 0)
+                self._check_paths(topo, expected)
+                self.assertGreater(topo.loads, 0)
+                # Missing chunks are remembered within the same budget
+                for x in range(0, 3000, 3):
+                    topo[IntLocation2D(x, 0)]
+                self.assertLessEqual(len(topo._absent), 2)
+                topo.flush()
+                topo.store.close()
+
+                topo = ChunkedTopology(
+                    chunk_size=3, default_tile=self.wall,
+                    store=create_store()
+                )
+                self.assertEqual(len(list(topo.all_locations())), 16 * 9)
+                self._check_paths(topo, expected)
+                topo.store.close()
+
+    def test_update(self):
+        topo, expected = self._deserialize()
+        movement_strategy = SimpleRectangularMovement(
+            weight_map=self.weight_map
+        )
+        cache = GraphCache()
+        graph = cache.get_graph(topo, movement_strategy, compact=True)
+        self.assertEqual(graph.to_dict(), topo.to_graph(movement_strategy))
+        topo.update_many(
+            [IntLocation2D(-4, -3), IntLocation2D(-1, -2)],
+            [self.wall, KeyTile.from_key('.')]
+        )
+        self.assertIs(
+            cache.get_graph(topo, movement_strategy, compact=True), graph
+        )
+        self.assertEqual(graph.to_dict(), topo.to_graph(movement_strategy))
@@ -0,0 +1,238 @@
+import asyncio
+import random
+from types import SimpleNamespace
+from unittest import TestCase
+
+from topopy.control.client import ClientBase
+from topopy.primitives.location import HexLocation, IntLocation2D
+from topopy.primitives.movement import (
+    MovementStrategy, SimpleHexMovement, SimpleRectangularMovement
+)
+from topopy.primitives.topology import HexTopology, NumpyRectangularTopology
+from topopy.serialization.topology import RectangularCharSerializer
+from topopy.world import messages
+from topopy.world.spatial import GridSpatialIndex
+from topopy.world.world import TickWorld, TopoActor, World
+
+
+class TestGridSpatialIndex(TestCase):
+    def _distance_sq(self, loc, other):
+        return (loc.x - other.x)**2 + (loc.y - other.y)**2
+
+    def test_queries(self):
+        rnd = random.Random(0)
+        index = GridSpatialIndex(cell_size=4)
+        locs = {}
+        for actor_id in range(300):
+            locs[actor_id] = IntLocation2D(
+                rnd.randint(-50, 50), rnd.randint(-50, 50)
+            )
+            index.move(actor_id, locs[actor_id])
+        for actor_id in range(0, 300, 3):
+            # Moves within and across buckets
+            loc = locs[actor_id]
+            locs[actor_id] = IntLocation2D(loc.x + rnd.randint(-5, 5), loc.y)
+            index.move(actor_id, locs[actor_id])
+        for actor_id in range(0, 300, 7):
+            index.remove(actor_id)
+            del locs[actor_id]
+        index.remove(0)
+        self.assertEqual(len(index), len(locs))
+
+        for _ in range(50):
+            loc = IntLocation2D(rnd.randint(-70, 70), rnd.randint(-70, 70))
+            radius = rnd.choice((0, 1.5, 5, 12, 200))
+            self.assertEqual(
+                sorted(index.query_radius(loc, radius)),
+                sorted(
+                    actor_id for actor_id, actor_loc in locs.items()
+                    if self._distance_sq(loc, actor_loc) <= radius**2
+                )
+            )
+            self.assertEqual(
+                sorted(index.query_rect(loc.x, loc.y, loc.x + 9, loc.y + 3)),
+                sorted(
+                    actor_id for actor_id, (x, y) in locs.items()
+                    if loc.x <= x <= loc.x + 9 and loc.y <= y <= loc.y + 3
+                )
+            )
+            k = rnd.choice((1, 5, 20))
+            nearest = index.nearest(loc, k)
+            self.assertEqual(
+                [self._distance_sq(loc, locs[i]) for i in nearest],
+                sorted(
+                    self._distance_sq(loc, actor_loc)
+                    for actor_loc in locs.values()
+                )[:k]
+            )
+
+        self.assertEqual(GridSpatialIndex().nearest(IntLocation2D(0, 0)), [])
+
+
+class TestWorld(TestCase):
+    def test_spatial_index(self):
+        world = World(loop=None, client=None, topologies={}, actors=[])
+        actors = [SimpleNamespace(id=i) for i in range(3)]
+        dispatch = world.dispatcher.dispatch
+        for i, actor in enumerate(actors):
+            dispatch(messages.InhabitCell(actor, loc=IntLocation2D(i, i)))
+        dispatch(messages.VacateCell(actors[0], loc=IntLocation2D(0, 0)))
+        dispatch(messages.InhabitCell(actors[0], loc=IntLocation2D(9, 9)))
+        self.assertEqual(world.actors_by_loc[IntLocation2D(1, 1)], [1])
+        self.assertNotIn(IntLocation2D(0, 0), world.actors_by_loc)
+        self.assertEqual(
+            world.get_actors_in_radius(IntLocation2D(0, 0), 3), [1, 2]
+        )
+        self.assertEqual(world.get_nearest_actors(IntLocation2D(8, 8)), [0])
+        self.assertEqual(world.get_actors_in_rect(0, 0, 1, 1), [1])
+
+
+class TestTickWorld(TestCase):
+    def _move(self, world, actor, old_loc, new_loc):
+        dispatch = world.dispatcher.dispatch
+        if old_loc is not None:
+            dispatch(messages.VacateCell(actor, loc=IntLocation2D(*old_loc)))
+        dispatch(messages.InhabitCell(actor, loc=IntLocation2D(*new_loc)))
+
+    def test_tick(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        client = ClientBase(loop)
+        channel = loop.run_until_complete(client.subscribe('world'))
+        world = TickWorld(
+            loop=loop, client=client, topologies={}, actors=[]
+        )
+        actors = [SimpleNamespace(id=i) for i in range(5)]
+        for i, actor in enumerate(actors):
+            self._move(world, actor, None, (i, 0))
+        self.assertEqual(world.actors_by_loc, {})
+        delta = world.tick()
+        self.assertEqual(delta['tick'], 1)
+        self.assertEqual(len(delta['moves']), 5)
+        self.assertIs(channel.get_nowait(), delta)
+        self.assertEqual(world.actors_by_loc[IntLocation2D(4, 0)], [4])
+
+        # 0 and 1 swap, 2 enters the cell that 3 leaves, 3 and 4 try
+        # to enter the same cell and 4, rejected, makes 0 stay
+        self._move(world, actors[0], (0, 0), (1, 0))
+        self._move(world, actors[1], (1, 0), (0, 0))
+        self._move(world, actors[2], (2, 0), (3, 0))
+        self._move(world, actors[3], (3, 0), (9, 9))
+        self._move(world, actors[4], (4, 0), (9, 9))
+        self._move(world, actors[4], (9, 9), (8, 8))
+        self._move(world, actors[4], (8, 8), (9, 9))
+        delta = world.tick()
+        self.assertEqual(delta['rejected'], [4])
+        self.assertEqual(
+            {
+                actor_id: world.spatial_index.get_location(actor_id)
+                for actor_id in range(5)
+            }, {
+                0: (1, 0), 1: (0, 0), 2: (3, 0), 3: (9, 9), 4: (4, 0),
+            }
+        )
+        self.assertEqual(
+            sorted(world.actors_by_loc), [(0, 0), (1, 0), (3, 0), (4, 0),
+                                          (9, 9)]
+        )
+
+        # Rejections cascade back along a chain of moves
+        self._move(world, actors[3], (9, 9), (4, 0))
+        self._move(world, actors[2], (3, 0), (9, 9))
+        world.dispatcher.dispatch(
+            messages.VacateCell(actors[1], loc=IntLocation2D(0, 0))
+        )
+        delta = world.tick()
+        self.assertEqual(delta['rejected'], [3, 2])
+        self.assertEqual(delta['moves'], {1: (IntLocation2D(0, 0), None)})
+        self.assertNotIn(1, world.spatial_index)
+        self.assertEqual(world.tick()['moves'], {})
+
+
+class TestCheckMovements(TestCase):
+    topo_str = (
+        '..#.\n'
+        '.#,.\n'
+        '..,,\n'
+    )
+    weight_map = {('.', '.'): 1, ('.', ','): 2, (',', ','): 3}
+
+    def _is_open(self, topology, loc):
+        try:
+            return min(loc) >= 0 and topology[loc].key != '#'
+        except IndexError:
+            return False
+
+    def test_check_movements(self):
+        class Movement(MovementStrategy):
+            def get_passability(self, from_tile, to_tile,
+                                from_loc, to_loc):
+                if to_tile.key != '#':
+                    return 1
+
+        serializer = RectangularCharSerializer(
+            topology_class=NumpyRectangularTopology
+        )
+        topologies = {
+            'ground': serializer.deserialize(self.topo_str),
+            'plain': RectangularCharSerializer().deserialize(self.topo_str),
+            'hex': RectangularCharSerializer(
+                topology_class=HexTopology
+            ).deserialize(self.topo_str),
+        }
+        world = World(
+            loop=None, client=None, topologies=topologies, actors=[]
+        )
+        rnd = random.Random(0)
+        movements = {
+            'ground': (
+                SimpleRectangularMovement(weight_map=self.weight_map),
+                SimpleRectangularMovement(
+                    diagonal=True, weight_map=self.weight_map
+                ),
+                Movement(),
+            ),
+            'plain': (SimpleRectangularMovement(
+                diagonal=True, weight_map=self.weight_map
+            ),),
+            'hex': (SimpleHexMovement(self.weight_map),),
+        }
+        locs = {
+            'ground': [IntLocation2D(x, y) for x in range(-1, 4)
+                       for y in range(-1, 5)],
+            'hex': [HexLocation(q, r) for q in range(-2, 5)
+                    for r in range(-1, 4)],
+        }
+        locs['plain'] = locs['ground']
+
+        actor_ids = []
+        targets = []
+        for i in range(300):
+            name = rnd.choice(list(movements))
+            strategies = {name: rnd.choice(movements[name])}
+            if name == 'ground' and rnd.random() < 0.3:
+                strategies['plain'] = movements['plain'][0]
+            loc = rnd.choice(locs[name])
+            while not self._is_open(topologies[name], loc):
+                loc = rnd.choice(locs[name])
+            world.actors[i] = TopoActor(
+                loop=None, client=None, id=i, world=world,
+                loc=None if i % 50 == 0 else loc,
+                movement_strategies=strategies if i % 60 else {}
+            )
+            actor_ids.append(i)
+            # Mostly adjacent targets, sometimes jumps
+            x, y = loc
+            targets.append(type(loc)(
+                x + rnd.randint(-1, 1), y + rnd.randint(-1, 1)
+            ) if rnd.random() < 0.9 else rnd.choice(locs[name]))
+
+        mask = world.check_movements(actor_ids, targets)
+        self.assertEqual(mask.dtype, bool)
+        self.assertEqual(mask.tolist(), [
+            world.actors[actor_id].loc is None and
+            bool(world.actors[actor_id].movement_strategies) or
+            world.actors[actor_id].check_movement(target)
+            for actor_id, target in zip(actor_ids, targets)
+        ])
+        self.assertTrue(mask.any() and not mask.all())
@@ -29,8 +29,8 @@ class ClientBase:
             await subscriber.put_nowait(message)
 
     def send_nowait(self, channel: str, message: Message):
-        for subscriber in self.subscribers[self.ALL]:
+        for subscriber in self.subscribers.get(self.ALL, ()):
             subscriber.put_nowait(message)
 
-        for subscriber in self.subscribers[channel]:
+        for subscriber in self.subscribers.get(channel, ()):
             subscriber.put_nowait(message)
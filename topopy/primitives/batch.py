@@ -0,0 +1,176 @@
+"""
+Batch path queries.
+
+Queries are grouped by source (or by destination) so that a single
+Dijkstra search tree answers all queries of a group. Groups can be
+searched in worker processes that share a memory-mapped ``CSRGraph``.
+"""
+import os
+import tempfile
+from concurrent.futures import Executor  # noqa
+from typing import Dict, List, Optional, Sequence, Tuple  # noqa
+
+from .graph import CSRGraph, Graph, get_neighbor_function, reverse_graph
+from .location import Location
+from .movement import MovementStrategy
+from .topology import Graphable, Traversable
+from .utils import dijkstra
+
+
+BY_SOURCE = 'source'
+BY_DESTINATION = 'destination'
+AUTO = 'auto'
+
+PathResult = Tuple[Optional[float], Optional[List[Location]]]
+# (start, ends) searched forward, or backwards from start for destinations
+Group = Tuple[Location, List[Location]]
+
+# Graph loaded by a worker process: (path, files, reverse, graph)
+_worker_graph = None  # type: Tuple[str, Tuple, bool, CSRGraph]
+
+
+def group_queries(pairs: Sequence[Tuple[Location, Location]],
+                  group_by: str=AUTO) -> Tuple[bool, Dict[Location, List]]:
+    """
+    Group ``(src, dst)`` pairs by source or destination.
+
+    Return ``(reverse, groups)``, where ``groups`` maps the common node to
+    the list of the other ends and ``reverse`` tells whether pairs
+    were grouped by destination. ``AUTO`` picks the grouping
+    with fewer groups.
+    """
+    if group_by == AUTO:
+        sources = len({src for src, _ in pairs})
+        destinations = len({dst for _, dst in pairs})
+        group_by = BY_DESTINATION if destinations < sources else BY_SOURCE
+    if group_by not in (BY_SOURCE, BY_DESTINATION):
+        raise ValueError(group_by)
+
+    reverse = group_by == BY_DESTINATION
+    groups = {}  # type: Dict[Location, List]
+    for src, dst in pairs:
+        if reverse:
+            src, dst = dst, src
+        groups.setdefault(src, []).append(dst)
+    return reverse, groups
+
+
+def _search_groups(get_neighbors, groups: Sequence[Group], reverse: bool
+                   ) -> List[Dict[Location, PathResult]]:
+    results = []
+    for start, ends in groups:
+        group_results = dijkstra.find_paths(get_neighbors, start, ends)
+        if reverse:
+            group_results = {
+                end: (dist, path and path[::-1])
+                for end, (dist, path) in group_results.items()
+            }
+        results.append(group_results)
+    return results
+
+
+def _search_shared_groups(graph_path: str, reverse: bool,
+                          groups: Sequence[Group]
+                          ) -> List[Dict[Location, PathResult]]:
+    """Worker entry point: search groups on a memory-mapped graph"""
+    global _worker_graph
+    # Graphs saved again into the same directory are reloaded
+    files = tuple(sorted(
+        (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+        for entry in os.scandir(graph_path)
+    ))
+    key = (graph_path, files, reverse)
+    if _worker_graph is None or _worker_graph[:3] != key:
+        graph = CSRGraph.load(graph_path, mmap=True)
+        if reverse:
+            graph = graph.reversed()
+        _worker_graph = key + (graph,)
+    return _search_groups(_worker_graph[3].iter_neighbors, groups, reverse)
+
+
+def _split(items: List, parts: int) -> List[List]:
+    size = max(1, -(-len(items) // parts))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def get_paths(
+        topology: Graphable, movement_strategy: MovementStrategy,
+        pairs: Sequence[Tuple[Location, Location]],
+        group_by: str=AUTO, graph: Graph=None,
+        executor: Executor=None, graph_path: str=None, chunks: int=None,
+        workers: int=None
+) -> List[PathResult]:
+    """
+    Find shortest paths for many ``(src, dst)`` pairs.
+
+    Results are ``(distance, path)`` tuples in the order of ``pairs``
+    (``(None, None)`` for unreachable destinations).
+
+    Without ``executor`` groups are searched in this process, using
+    ``graph`` if given or the topology neighbours otherwise.
+
+    With an ``executor`` (normally a ``ProcessPoolExecutor``) the groups
+    are split into ``chunks`` tasks, 4 per worker by default for
+    ``workers`` workers (``os.cpu_count()`` by default, the default size
+    of a ``ProcessPoolExecutor``). Workers
+    memory-map a ``CSRGraph`` saved in ``graph_path``; if no path is
+    given, the graph (``graph`` or a newly built compact one) is saved
+    into a temporary directory for the duration of the call.
+    To avoid saving the graph on every call, save it once with
+    ``CSRGraph.save`` and pass its ``graph_path``.
+    """
+    pairs = list(pairs)
+    reverse, groups = group_queries(pairs, group_by)
+    if not pairs:
+        return []
+    group_list = list(groups.items())
+
+    if executor is None:
+        if graph is not None:
+            if reverse:
+                graph = reverse_graph(graph)
+            get_neighbors = get_neighbor_function(graph)
+        elif isinstance(topology, Traversable):
+            iter_next = (
+                topology.iter_predecessors if reverse
+                else topology.iter_neighbors
+            )
+
+            def get_neighbors(loc):
+                return iter_next(loc, movement_strategy)
+        else:
+            graph = topology.to_graph(movement_strategy)
+            if reverse:
+                graph = reverse_graph(graph)
+            get_neighbors = get_neighbor_function(graph)
+        group_results = _search_groups(get_neighbors, group_list, reverse)
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if graph_path is None:
+                if not isinstance(graph, CSRGraph):
+                    graph = topology.to_graph(movement_strategy, compact=True)
+                graph_path = os.path.join(tmp_dir, 'graph')
+                graph.save(graph_path)
+            if chunks is None:
+                chunks = 4 * (workers or os.cpu_count() or 1)
+            futures = [
+                executor.submit(
+                    _search_shared_groups, graph_path, reverse, chunk
+                )
+                for chunk in _split(group_list, chunks)
+            ]
+            group_results = [
+                result for future in futures for result in future.result()
+            ]
+
+    results_by_start = {
+        start: result
+        for (start, _), result in zip(group_list, group_results)
+    }
+    results = []
+    for src, dst in pairs:
+        if reverse:
+            results.append(results_by_start[dst][src])
+        else:
+            results.append(results_by_start[src][dst])
+    return results
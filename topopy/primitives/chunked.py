@@ -0,0 +1,466 @@
+import json
+import os
+import sqlite3
+import zlib
+from collections import OrderedDict
+from typing import (  # noqa
+    Any, Callable, Dict, Generator, Iterable, Iterator, List, Optional,
+    Sequence, Set, Tuple, Union
+)
+
+import numpy as np
+
+from .graph import CSRGraph
+from .location import IntLocation2D, Location2D
+from .movement import MovementStrategy
+from .tile import KeyTile, TilePalette
+from .topology import (
+    INF, RECTANGULAR_DIRECTIONS, DirectedEdge, GraphableTopology,
+    _OPPOSITE_DIRECTIONS
+)
+
+ChunkCoord = Tuple[int, int]
+#: Tile ids of a chunk and the tile keys they refer to
+ChunkData = Tuple[np.ndarray, List[Any]]
+
+
+class ChunkStore:
+    """
+    Backing store of the chunks of a ``ChunkedTopology``.
+
+    A chunk is saved as a square array of tile ids together with
+    the keys of the tiles they refer to, so stores do not depend on
+    the palette of a topology. Keys must be JSON-serializable.
+    """
+
+    def load(self, coord: ChunkCoord) -> Optional[ChunkData]:
+        """Return ``(ids, keys)`` of a chunk or ``None`` if it is absent"""
+        raise NotImplementedError
+
+    def save(self, coord: ChunkCoord, ids: np.ndarray, keys: List[Any]):
+        raise NotImplementedError
+
+    def iter_coords(self) -> Iterator[ChunkCoord]:
+        """Generate the coordinates of all stored chunks"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class DirectoryChunkStore(ChunkStore):
+    """Stores each chunk in a compressed ``.npz`` file of a directory"""
+
+    def __init__(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+
+    def _get_file_name(self, coord: ChunkCoord) -> str:
+        return os.path.join(self.path, '{}_{}.npz'.format(*coord))
+
+    def load(self, coord: ChunkCoord) -> Optional[ChunkData]:
+        try:
+            with np.load(self._get_file_name(coord)) as data:
+                return data['ids'], json.loads(str(data['keys']))
+        except FileNotFoundError:
+            return None
+
+    def save(self, coord: ChunkCoord, ids: np.ndarray, keys: List[Any]):
+        file_name = self._get_file_name(coord)
+        # Write to a temporary file first, so that readers never see
+        # a partially written chunk
+        temp_name = file_name + '.tmp.npz'
+        np.savez_compressed(temp_name, ids=ids, keys=json.dumps(keys))
+        os.replace(temp_name, file_name)
+
+    def iter_coords(self) -> Iterator[ChunkCoord]:
+        for file_name in os.listdir(self.path):
+            name, extension = os.path.splitext(file_name)
+            if extension == '.npz' and not name.endswith('.tmp'):
+                x, y = name.split('_')
+                yield int(x), int(y)
+
+
+class SQLiteChunkStore(ChunkStore):
+    """Stores chunks as zlib-compressed rows of an SQLite database"""
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS chunks ('
+            'x INTEGER, y INTEGER, size INTEGER, dtype TEXT, ids BLOB, '
+            'keys TEXT, PRIMARY KEY (x, y))'
+        )
+
+    def load(self, coord: ChunkCoord) -> Optional[ChunkData]:
+        row = self.connection.execute(
+            'SELECT size, dtype, ids, keys FROM chunks WHERE x = ? AND y = ?',
+            coord
+        ).fetchone()
+        if row is None:
+            return None
+        size, dtype, ids, keys = row
+        ids = np.frombuffer(zlib.decompress(ids), dtype=dtype)
+        return ids.reshape(size, size), json.loads(keys)
+
+    def save(self, coord: ChunkCoord, ids: np.ndarray, keys: List[Any]):
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?, ?)', (
+                    coord[0], coord[1], len(ids), ids.dtype.str,
+                    zlib.compress(np.ascontiguousarray(ids).tobytes(), 1),
+                    json.dumps(keys)
+                )
+            )
+
+    def iter_coords(self) -> Iterator[ChunkCoord]:
+        return iter(self.connection.execute('SELECT x, y FROM chunks'))
+
+    def close(self):
+        self.connection.close()
+
+
+class ChunkedTopology(GraphableTopology):
+    """
+    Unbounded rectangular topology stored in square chunks.
+
+    Chunks of ``chunk_size`` by ``chunk_size`` tile ids (into
+    ``palette``, see ``TileArrayMixin``) are kept in a dict
+    keyed by chunk coordinate; cells of absent chunks hold
+    ``default_tile``. Chunks are loaded lazily from ``store`` and
+    the least recently used ones are evicted once loaded chunks take
+    more than ``memory_budget`` bytes. Modified chunks are saved back
+    on eviction and on ``flush``; without a store they are never
+    evicted. As many chunks missing from the store are remembered,
+    least recently used ones are forgotten.
+
+    Searches generate neighbours on demand across chunk boundaries.
+    Since the map has no bounds, ``default_tile`` should usually be
+    impassable: otherwise a search for an unreachable destination
+    never ends. ``to_graph`` and ``all_locations`` only cover cells
+    of stored and loaded chunks.
+    """
+
+    __slots__ = 'chunk_size', 'default_tile', 'store', 'memory_budget', \
+        'tile_factory', 'palette', 'loads', 'evictions', \
+        '_chunks', '_dirty', '_absent', '_default_id'
+
+    location_class = IntLocation2D
+    directions = RECTANGULAR_DIRECTIONS
+    key_dtype = np.uint16
+
+    def __init__(self, chunk_size: int=64,
+                 default_tile: KeyTile=KeyTile.from_key(' '),
+                 store: ChunkStore=None, memory_budget: int=64 * 2**20,
+                 tile_factory: Callable[[Any], KeyTile]=KeyTile.from_key,
+                 palette: TilePalette=None):
+        if chunk_size < 1:
+            raise ValueError('Chunk size must be positive')
+        self.chunk_size = chunk_size
+        self.default_tile = default_tile
+        self.store = store
+        self.memory_budget = memory_budget
+        self.tile_factory = tile_factory
+        self.palette = TilePalette() if palette is None else palette
+        self.loads = 0
+        self.evictions = 0
+        self._chunks = OrderedDict()  # type: Dict[ChunkCoord, np.ndarray]
+        self._dirty = set()  # type: Set[ChunkCoord]
+        # Chunks known to be missing from the store, in LRU order
+        self._absent = OrderedDict()  # type: Dict[ChunkCoord, None]
+        self._default_id = self.get_tile_id(default_tile)
+        self._init_changes()
+
+    def get_tile_id(self, tile: KeyTile) -> int:
+        """Return the id of the tile, adding it to the palette if needed"""
+        return self.palette.get_id(tile)
+
+    @property
+    def loaded_chunks(self) -> int:
+        return len(self._chunks)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory taken by the loaded chunks"""
+        return len(self._chunks) * self.chunk_size**2 * \
+            np.dtype(self.key_dtype).itemsize
+
+    def _get_chunk(self, coord: ChunkCoord) -> Optional[np.ndarray]:
+        """Return the ids of a chunk, loading it if needed"""
+        chunks = self._chunks
+        chunk = chunks.get(coord)
+        if chunk is not None:
+            chunks.move_to_end(coord)
+            return chunk
+        if self.store is None:
+            return None
+        absent = self._absent
+        if coord in absent:
+            absent.move_to_end(coord)
+            return None
+
+        data = self.store.load(coord)
+        if data is None:
+            absent[coord] = None
+            if len(absent) > self._get_capacity():
+                absent.popitem(last=False)
+            return None
+        ids, keys = data
+        tile_ids = np.array(
+            self.palette.get_ids(map(self.tile_factory, keys)),
+            dtype=self.key_dtype
+        )
+        chunk = tile_ids[ids]
+        self.loads += 1
+        self._add_chunk(coord, chunk)
+        return chunk
+
+    def _add_chunk(self, coord: ChunkCoord, chunk: np.ndarray):
+        self._chunks[coord] = chunk
+        self._absent.pop(coord, None)
+        self._evict()
+
+    def _get_capacity(self) -> int:
+        """Number of chunks that fit in ``memory_budget``"""
+        chunk_bytes = self.chunk_size**2 * np.dtype(self.key_dtype).itemsize
+        return max(1, self.memory_budget // chunk_bytes)
+
+    def _evict(self):
+        chunks = self._chunks
+        excess = len(chunks) - self._get_capacity()
+        if excess <= 0:
+            return
+        # The most recently used chunk is never evicted
+        for coord in list(chunks)[:-1]:
+            if excess <= 0:
+                break
+            if coord in self._dirty:
+                if self.store is None:
+                    continue
+                self._save(coord)
+            del chunks[coord]
+            self.evictions += 1
+            excess -= 1
+
+    def _save(self, coord: ChunkCoord):
+        chunk = self._chunks[coord]
+        used = np.unique(chunk)
+        ids = np.searchsorted(used, chunk).astype(self.key_dtype)
+        self.store.save(
+            coord, ids, [self.palette[i].key for i in used.tolist()]
+        )
+        self._dirty.discard(coord)
+
+    def flush(self):
+        """Save all modified chunks to the store"""
+        if self.store is None:
+            raise ValueError('Topology has no store')
+        for coord in list(self._dirty):
+            self._save(coord)
+
+    def _get_id(self, x: int, y: int) -> int:
+        size = self.chunk_size
+        chunk = self._get_chunk((x // size, y // size))
+        if chunk is None:
+            return self._default_id
+        return chunk.item(x % size, y % size)
+
+    def __getitem__(self, loc: Location2D):
+        if not isinstance(loc, self.location_class):
+            raise TypeError(loc.__class__.__name__)
+
+        return self.palette.tiles[self._get_id(loc.x, loc.y)]
+
+    def _set_tile(self, loc: Location2D, value: KeyTile):
+        if not isinstance(loc, self.location_class):
+            raise TypeError(loc.__class__.__name__)
+
+        size = self.chunk_size
+        coord = (loc.x // size, loc.y // size)
+        tile_id = self.get_tile_id(value)
+        chunk = self._get_chunk(coord)
+        if chunk is None:
+            if tile_id == self._default_id:
+                return
+            chunk = np.full((size, size), self._default_id, self.key_dtype)
+            self._add_chunk(coord, chunk)
+        chunk[loc.x % size, loc.y % size] = tile_id
+        self._dirty.add(coord)
+
+    def write_array(self, keys: np.ndarray,
+                    palette: Union[TilePalette, Sequence[KeyTile]],
+                    origin: Tuple[int, int]=(0, 0)):
+        """
+        Write a 2D array of ids into ``palette`` with ``keys[0, 0]`` at
+        ``origin``, chunk by chunk.
+
+        The change is not recorded location by location: cached graphs
+        are rebuilt.
+        """
+        if keys.ndim != 2:
+            raise ValueError('Keys must be a 2D array')
+        tile_ids = np.array(
+            self.palette.get_ids(palette), dtype=self.key_dtype
+        )
+        size = self.chunk_size
+        x0, y0 = origin
+        x1, y1 = x0 + keys.shape[0], y0 + keys.shape[1]
+        for chunk_x in range(x0 // size, -(-x1 // size)):
+            for chunk_y in range(y0 // size, -(-y1 // size)):
+                coord = (chunk_x, chunk_y)
+                # Part of the array in this chunk, in map coordinates
+                left, right = max(x0, chunk_x * size), \
+                    min(x1, (chunk_x + 1) * size)
+                bottom, top = max(y0, chunk_y * size), \
+                    min(y1, (chunk_y + 1) * size)
+                chunk = self._get_chunk(coord)
+                if chunk is None:
+                    chunk = np.full(
+                        (size, size), self._default_id, self.key_dtype
+                    )
+                    self._add_chunk(coord, chunk)
+                chunk[
+                    left - chunk_x * size:right - chunk_x * size,
+                    bottom - chunk_y * size:top - chunk_y * size
+                ] = tile_ids[keys[left - x0:right - x0, bottom - y0:top - y0]]
+                self._dirty.add(coord)
+        self._invalidate_changes()
+
+    def _get_window(self, x: int, y: int) -> List[List[int]]:
+        """Return the ids of the 3x3 cells around ``(x, y)``"""
+        size = self.chunk_size
+        local_x = x % size
+        local_y = y % size
+        if 0 < local_x < size - 1 and 0 < local_y < size - 1:
+            chunk = self._get_chunk((x // size, y // size))
+            if chunk is None:
+                return [[self._default_id] * 3] * 3
+            return chunk[
+                local_x - 1:local_x + 2, local_y - 1:local_y + 2
+            ].tolist()
+        # On a chunk border
+        get_id = self._get_id
+        return [
+            [get_id(x1, y1) for y1 in range(y - 1, y + 2)]
+            for x1 in range(x - 1, x + 2)
+        ]
+
+    def get_affected_locations(self, locs: Iterable[Location2D]
+                               ) -> Set[Location2D]:
+        location_class = self.location_class
+        affected = set()
+        for x, y in locs:
+            for x1 in range(x - 1, x + 2):
+                for y1 in range(y - 1, y + 2):
+                    affected.add(location_class(x1, y1))
+        return affected
+
+    def get_edges(self, loc: Location2D) -> List[DirectedEdge]:
+        x, y = loc
+        window = self._get_window(x, y)
+        palette = self.palette.tiles
+        from_tile = palette[window[1][1]]
+        return [
+            DirectedEdge(
+                loc, self.location_class(x + dx, y + dy), from_tile,
+                palette[window[dx + 1][dy + 1]]
+            )
+            for dx, dy in RECTANGULAR_DIRECTIONS
+        ]
+
+    def iter_neighbors(
+            self, loc: Location2D, movement_strategy: MovementStrategy
+    ) -> Generator[Tuple[Location2D, float], None, None]:
+        x, y = loc
+        window = self._get_window(x, y)
+        location_class = self.location_class
+        compiled = movement_strategy.compile(
+            self.palette, RECTANGULAR_DIRECTIONS
+        )
+        if compiled is not None:
+            costs = compiled.lists[window[1][1]]
+            for d, (dx, dy) in enumerate(RECTANGULAR_DIRECTIONS):
+                cost = costs[window[dx + 1][dy + 1]][d]
+                if cost != INF:
+                    yield location_class(x + dx, y + dy), cost
+            return
+
+        palette = self.palette.tiles
+        from_tile = palette[window[1][1]]
+        get_passability = movement_strategy.get_passability
+        for dx, dy in RECTANGULAR_DIRECTIONS:
+            to_loc = location_class(x + dx, y + dy)
+            p = get_passability(
+                from_tile, palette[window[dx + 1][dy + 1]], loc, to_loc
+            )
+            if p is not None:
+                yield to_loc, p
+
+    def iter_predecessors(
+            self, loc: Location2D, movement_strategy: MovementStrategy
+    ) -> Generator[Tuple[Location2D, float], None, None]:
+        x, y = loc
+        window = self._get_window(x, y)
+        location_class = self.location_class
+        compiled = movement_strategy.compile(
+            self.palette, RECTANGULAR_DIRECTIONS
+        )
+        if compiled is not None:
+            lists = compiled.lists
+            to_id = window[1][1]
+            for d, (dx, dy) in enumerate(RECTANGULAR_DIRECTIONS):
+                cost = lists[window[dx + 1][dy + 1]][to_id][
+                    _OPPOSITE_DIRECTIONS[d]
+                ]
+                if cost != INF:
+                    yield location_class(x + dx, y + dy), cost
+            return
+
+        palette = self.palette.tiles
+        to_tile = palette[window[1][1]]
+        get_passability = movement_strategy.get_passability
+        for dx, dy in RECTANGULAR_DIRECTIONS:
+            from_loc = location_class(x + dx, y + dy)
+            p = get_passability(
+                palette[window[dx + 1][dy + 1]], to_tile, from_loc, loc
+            )
+            if p is not None:
+                yield from_loc, p
+
+    def iter_chunk_coords(self) -> Iterator[ChunkCoord]:
+        """Generate the coordinates of all stored and loaded chunks"""
+        coords = set(self._chunks)
+        if self.store is not None:
+            coords.update(self.store.iter_coords())
+        return iter(sorted(coords))
+
+    def all_locations(self) -> Generator[Location2D, None, None]:
+        size = self.chunk_size
+        location_class = self.location_class
+        for chunk_x, chunk_y in self.iter_chunk_coords():
+            for x in range(chunk_x * size, (chunk_x + 1) * size):
+                for y in range(chunk_y * size, (chunk_y + 1) * size):
+                    yield location_class(x, y)
+
+    def to_graph(self, movement_strategy: MovementStrategy,
+                 compact: bool=False):
+        index = self.get_location_index()
+        ids = index.ids
+
+        def get_neighbors(loc: Location2D) -> List[Tuple[Location2D, float]]:
+            # Drop edges leading out of the known chunks
+            return [
+                (to_loc, cost)
+                for to_loc, cost in self.iter_neighbors(loc, movement_strategy)
+                if to_loc in ids
+            ]
+
+        if compact:
+            return CSRGraph.from_neighbors(index, get_neighbors)
+
+        graph = {}
+        for loc in index.locations:
+            edges = dict(get_neighbors(loc))
+            if edges:
+                graph[loc] = edges
+        return graph
@@ -0,0 +1,263 @@
+import time
+from heapq import heapify, heappop, heappush
+from typing import Dict, List, Optional, Tuple  # noqa
+
+import numpy as np
+
+from .graph import CSRGraph, Graph, LocationIndex, TopologyCache
+from .location import Location
+
+INF = float('inf')
+EPSILON = 1 + 1e-9
+
+
+def _to_csr(rows: List[List[Tuple[int, float, int]]], index: LocationIndex
+            ) -> Tuple[CSRGraph, np.ndarray]:
+    """Convert ``[(neighbor, weight, middle)]`` rows to a graph and middles"""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in rows], out=indptr[1:])
+    edges = [edge for row in rows for edge in row]
+    indices = np.array([edge[0] for edge in edges], dtype=np.int32)
+    weights = np.array([edge[1] for edge in edges], dtype=np.float32)
+    middles = np.array([edge[2] for edge in edges], dtype=np.int32)
+    return CSRGraph(indptr, indices, weights, index), middles
+
+
+class ContractionHierarchy:
+    """
+    Contraction hierarchy (Geisberger et al., 2008) of a weighted graph.
+
+    Nodes are contracted one by one in the order of their edge
+    difference; a shortcut replaces each shortest path through the
+    contracted node that has no witness path around it. Queries are
+    bidirectional Dijkstra searches that only go up the hierarchy:
+    forwards along ``up`` from the source and backwards along ``down``
+    from the destination. Shortcuts are unpacked with ``up_middles`` and
+    ``down_middles`` (``-1`` for original edges).
+    """
+
+    __slots__ = 'rank', 'up', 'up_middles', 'down', 'down_middles', \
+        'shortcut_count', 'preprocessing_time'
+
+    #: Settled nodes after which a witness search gives up
+    #: (more shortcuts, faster preprocessing)
+    witness_limit = 64
+
+    def __init__(self, rank: np.ndarray, up: CSRGraph, up_middles: np.ndarray,
+                 down: CSRGraph, down_middles: np.ndarray,
+                 shortcut_count: int=0, preprocessing_time: float=0):
+        self.rank = rank
+        self.up = up
+        self.up_middles = up_middles
+        self.down = down
+        self.down_middles = down_middles
+        self.shortcut_count = shortcut_count
+        self.preprocessing_time = preprocessing_time
+
+    @property
+    def index(self) -> LocationIndex:
+        return self.up.index
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.rank.nbytes + self.up.nbytes + self.up_middles.nbytes +
+            self.down.nbytes + self.down_middles.nbytes
+        )
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        return {
+            'nodes': len(self.rank),
+            'edges': self.up.edge_count + self.down.edge_count,
+            'shortcuts': self.shortcut_count,
+            'nbytes': self.nbytes,
+            'preprocessing_time': self.preprocessing_time,
+        }
+
+    @classmethod
+    def build(cls, graph: Graph) -> 'ContractionHierarchy':
+        start_time = time.perf_counter()
+        if not isinstance(graph, CSRGraph):
+            graph = CSRGraph.from_dict(graph)
+        node_count = len(graph)
+        out_edges = [{} for _ in range(node_count)]  # type: List[Dict]
+        in_edges = [{} for _ in range(node_count)]  # type: List[Dict]
+        for u in range(node_count):
+            for v, weight in graph.iter_id_neighbors(u):
+                if v != u and weight < out_edges[u].get(v, INF):
+                    out_edges[u][v] = in_edges[v][u] = weight
+        # (u, w) -> contracted node of the shortcut u -> w
+        middles = {}  # type: Dict[Tuple[int, int], int]
+        witness_limit = cls.witness_limit
+
+        def find_shortcuts(v: int) -> List[Tuple[int, int, float]]:
+            shortcuts = []
+            targets = out_edges[v]
+            for u, in_weight in in_edges[v].items():
+                max_cost = in_weight + max(targets.values(), default=0)
+                # Witness search from u around v
+                distances = {u: 0}
+                settled = 0
+                remaining = len(targets) - (u in targets)
+                heap = [(0, u)]
+                while heap and settled < witness_limit and remaining:
+                    distance, x = heappop(heap)
+                    if distance > distances[x]:
+                        continue
+                    if distance > max_cost:
+                        break
+                    settled += 1
+                    if x in targets and x != u:
+                        remaining -= 1
+                    for y, weight in out_edges[x].items():
+                        if y == v:
+                            continue
+                        y_distance = distance + weight
+                        if y_distance < distances.get(y, INF):
+                            distances[y] = y_distance
+                            heappush(heap, (y_distance, y))
+                for w, out_weight in targets.items():
+                    weight = in_weight + out_weight
+                    # Tolerate rounding: sums of equal paths may differ
+                    if w != u and distances.get(w, INF) > weight * EPSILON:
+                        shortcuts.append((u, w, weight))
+            return shortcuts
+
+        deleted_neighbors = [0] * node_count
+
+        def get_priority(v: int, shortcuts: List) -> int:
+            return (
+                len(shortcuts) - len(in_edges[v]) - len(out_edges[v]) +
+                deleted_neighbors[v]
+            )
+
+        heap = [
+            (get_priority(v, find_shortcuts(v)), v)
+            for v in range(node_count)
+        ]
+        heapify(heap)
+        rank = np.empty(node_count, dtype=np.int64)
+        up_rows = [[] for _ in range(node_count)]  # type: List[List]
+        down_rows = [[] for _ in range(node_count)]  # type: List[List]
+        shortcut_count = 0
+        next_rank = 0
+        while heap:
+            _, v = heappop(heap)
+            # Lazy update: contract v only if it is still the best node
+            shortcuts = find_shortcuts(v)
+            priority = get_priority(v, shortcuts)
+            if heap and priority > heap[0][0]:
+                heappush(heap, (priority, v))
+                continue
+
+            rank[v] = next_rank
+            next_rank += 1
+            for w, weight in out_edges[v].items():
+                up_rows[v].append((w, weight, middles.get((v, w), -1)))
+                del in_edges[w][v]
+                deleted_neighbors[w] += 1
+            for u, weight in in_edges[v].items():
+                down_rows[v].append((u, weight, middles.get((u, v), -1)))
+                del out_edges[u][v]
+                deleted_neighbors[u] += 1
+            out_edges[v] = in_edges[v] = None
+            for u, w, weight in shortcuts:
+                if weight < out_edges[u].get(w, INF):
+                    out_edges[u][w] = in_edges[w][u] = weight
+                    middles[u, w] = v
+                    shortcut_count += 1
+
+        up, up_middles = _to_csr(up_rows, graph.index)
+        down, down_middles = _to_csr(down_rows, graph.index)
+        return cls(
+            rank, up, up_middles, down, down_middles,
+            shortcut_count, time.perf_counter() - start_time
+        )
+
+    def _find_middle(self, u: int, w: int) -> int:
+        """Contracted node of the shortcut ``u -> w``, ``-1`` if none"""
+        if self.rank[u] < self.rank[w]:
+            graph, middles, row, target = self.up, self.up_middles, u, w
+        else:
+            graph, middles, row, target = self.down, self.down_middles, w, u
+        start, end = graph.indptr[row:row + 2].tolist()
+        offset = graph.indices[start:end].tolist().index(target)
+        return int(middles[start + offset])
+
+    def _unpack(self, nodes: List[int]) -> List[int]:
+        path = [nodes[0]]
+        stack = list(zip(nodes[-2::-1], nodes[:0:-1]))
+        while stack:
+            u, w = stack.pop()
+            middle = self._find_middle(u, w)
+            if middle < 0:
+                path.append(w)
+            else:
+                stack.append((middle, w))
+                stack.append((u, middle))
+        return path
+
+    def find_path(self, src: Location, dst: Location
+                  ) -> Tuple[Optional[float], Optional[List[Location]]]:
+        """
+        Return ``(distance, path)`` from ``src`` to ``dst``,
+        or ``(None, None)`` if there is no path.
+        """
+        index = self.index
+        source, target = index.get_id(src), index.get_id(dst)
+        if source == target:
+            return 0, [src]
+
+        graphs = (self.up, self.down)
+        distances = ({source: 0}, {target: 0})
+        parents = ({source: None}, {target: None})
+        heaps = ([(0, source)], [(0, target)])
+        best, meeting = INF, None
+        while True:
+            forward = heaps[0][0][0] if heaps[0] else INF
+            backward = heaps[1][0][0] if heaps[1] else INF
+            if min(forward, backward) >= best:
+                break
+            side = 0 if forward <= backward else 1
+            distance, node = heappop(heaps[side])
+            if distance > distances[side][node]:
+                continue
+            other = distances[1 - side].get(node)
+            if other is not None and distance + other < best:
+                best, meeting = distance + other, node
+            for neighbor, weight in graphs[side].iter_id_neighbors(node):
+                neighbor_distance = distance + weight
+                if neighbor_distance < distances[side].get(neighbor, INF):
+                    distances[side][neighbor] = neighbor_distance
+                    parents[side][neighbor] = node
+                    heappush(heaps[side], (neighbor_distance, neighbor))
+
+        if meeting is None:
+            return None, None
+        nodes = []
+        node = meeting
+        while node is not None:
+            nodes.append(node)
+            node = parents[0][node]
+        nodes.reverse()
+        node = parents[1][meeting]
+        while node is not None:
+            nodes.append(node)
+            node = parents[1][node]
+        return best, [index.get_location(node) for node in self._unpack(nodes)]
+
+
+class ContractionCache(TopologyCache):
+    """
+    Cache of contraction hierarchies.
+
+    Hierarchies are rebuilt from scratch when ``get`` finds them stale,
+    so this cache suits maps that stay static for a long time
+    (``ContractionHierarchyStrategy`` rebuilds them only on request).
+    """
+
+    def build(self, topology, movement_strategy) -> ContractionHierarchy:
+        return ContractionHierarchy.build(
+            topology.to_graph(movement_strategy, compact=True)
+        )
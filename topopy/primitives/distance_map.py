@@ -0,0 +1,154 @@
+from heapq import heappop, heappush
+from itertools import count
+from typing import FrozenSet, Iterable, List, Optional, Tuple  # noqa
+
+import numpy as np
+
+from .graph import LocationIndex, TopologyCache
+from .location import Location
+from .movement import MovementStrategy
+from .topology import GraphableTopology, RECTANGULAR_DIRECTIONS
+
+
+class DistanceMap:
+    """
+    Distances from every cell of a grid topology to the nearest
+    of ``goals`` (a flow field).
+
+    Built by a single reverse Dijkstra search from all goals at once,
+    so any number of actors heading for the same goals can share it.
+    Arrays have the shape of the topology and cells are numbered by
+    ``index``, e.g. ``distances[x, y]`` for rectangular topologies.
+    ``distances`` are ``inf`` for cells that cannot reach a goal,
+    ``next_steps`` are indexes of the first step in ``directions``
+    (``-1`` at goals and unreachable cells).
+    """
+
+    __slots__ = 'goals', 'distances', 'next_steps', 'index', 'directions', \
+        '_flat_distances', '_flat_next_steps'
+
+    def __init__(self, goals: FrozenSet[Location], distances: np.ndarray,
+                 next_steps: np.ndarray, index: LocationIndex,
+                 directions: Tuple[Tuple[int, int], ...]=(
+                     RECTANGULAR_DIRECTIONS
+                 )):
+        self.goals = goals
+        self.distances = distances
+        self.next_steps = next_steps
+        self.index = index
+        self.directions = directions
+        self._flat_distances = distances.reshape(-1)
+        self._flat_next_steps = next_steps.reshape(-1)
+
+    @classmethod
+    def build(cls, topology: GraphableTopology,
+              movement_strategy: MovementStrategy,
+              goals: Iterable[Location]) -> 'DistanceMap':
+        """
+        Build the map of a topology with ``shape``, ``directions``
+        and a ``get_location_index`` that numbers cells row by row
+        (e.g. ``RectangularTopology`` and ``HexTopology``).
+        """
+        goals = frozenset(goals)
+        iter_predecessors = topology.iter_predecessors
+        distance_to_goal = {}
+        next_locs = {}
+        visited = set()
+        tie_breaker = count()
+        heap = []
+        for goal in goals:
+            topology[goal]  # Type and bounds check
+            distance_to_goal[goal] = 0
+            heap.append((0, next(tie_breaker), goal))
+
+        while heap:
+            distance, _, current = heappop(heap)
+            if current in visited:
+                continue
+            visited.add(current)
+
+            for predecessor, weight in iter_predecessors(
+                    current, movement_strategy):
+                if predecessor in visited:
+                    continue
+                predecessor_distance = distance + weight
+                if predecessor_distance < distance_to_goal.get(
+                        predecessor, float('inf')):
+                    distance_to_goal[predecessor] = predecessor_distance
+                    next_locs[predecessor] = current
+                    heappush(heap, (
+                        predecessor_distance, next(tie_breaker), predecessor
+                    ))
+
+        index = topology.get_location_index()
+        get_id = index.get_id
+        distances = np.full(len(index), np.inf)
+        if distance_to_goal:
+            distances[[get_id(loc) for loc in distance_to_goal]] = list(
+                distance_to_goal.values()
+            )
+
+        directions = topology.directions
+        next_steps = np.full(len(index), -1, dtype=np.int8)
+        if next_locs:
+            direction_index = {
+                direction: d for d, direction in enumerate(directions)
+            }
+            next_steps[[get_id(loc) for loc in next_locs]] = [
+                direction_index[(
+                    to_loc[0] - loc[0], to_loc[1] - loc[1]
+                )]
+                for loc, to_loc in next_locs.items()
+            ]
+        return cls(
+            goals, distances.reshape(topology.shape),
+            next_steps.reshape(topology.shape), index, directions
+        )
+
+    def get_distance(self, loc: Location) -> Optional[float]:
+        """Distance to the nearest goal, ``None`` if none is reachable"""
+        distance = self._flat_distances[self.index.get_id(loc)]
+        return None if distance == np.inf else float(distance)
+
+    def get_next(self, loc: Location) -> Optional[Location]:
+        """First step towards the nearest goal, ``None`` at goals too"""
+        d = self._flat_next_steps[self.index.get_id(loc)]
+        if d < 0:
+            return None
+        dx, dy = self.directions[d]
+        return loc.__class__(loc[0] + dx, loc[1] + dy)
+
+    def get_path(self, loc: Location
+                 ) -> Tuple[Optional[float], Optional[List[Location]]]:
+        """
+        Return ``(distance, path)`` from ``loc`` to the nearest goal,
+        or ``(None, None)`` if there is no path.
+        """
+        distance = self.get_distance(loc)
+        if distance is None:
+            return None, None
+
+        path = [loc]
+        next_loc = self.get_next(loc)
+        while next_loc is not None:
+            path.append(next_loc)
+            next_loc = self.get_next(next_loc)
+        return distance, path
+
+
+class DistanceMapCache(TopologyCache):
+    """
+    Cache of distance maps keyed on their goals.
+
+    A map is rebuilt once the topology version changes.
+    """
+
+    def build(self, topology, movement_strategy,
+              goals: FrozenSet[Location]) -> DistanceMap:
+        return DistanceMap.build(topology, movement_strategy, goals)
+
+    def get_distance_map(
+            self, topology: GraphableTopology,
+            movement_strategy: MovementStrategy, goals: Iterable[Location]
+    ) -> DistanceMap:
+        return self.get(topology, movement_strategy, frozenset(goals))
@@ -0,0 +1,599 @@
+import importlib
+import json
+import os
+from collections import OrderedDict
+from typing import (  # noqa
+    Any, Callable, Dict, Hashable, Iterable, Iterator, List, Sequence, Set,
+    Tuple, Type, Union
+)
+
+import numpy as np
+
+from .location import HexLocation, Location
+
+
+class LocationIndex:
+    """Bidirectional mapping between locations and integer node ids"""
+
+    __slots__ = ()
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def get_id(self, loc: Location) -> int:
+        """Return the id of ``loc`` or raise ``KeyError``"""
+        raise NotImplementedError
+
+    def get_location(self, node_id: int) -> Location:
+        raise NotImplementedError
+
+    def save(self, path: str):
+        raise NotImplementedError
+
+    @classmethod
+    def load(cls, path: str, mmap: bool=True) -> 'LocationIndex':
+        raise NotImplementedError
+
+
+def _class_path(cls: type) -> str:
+    return '{}.{}'.format(cls.__module__, cls.__qualname__)
+
+
+def _import_class(path: str) -> type:
+    module_name, _, class_name = path.rpartition('.')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class GridLocationIndex(LocationIndex):
+    """
+    Row-major ids of the cells of a rectangular grid.
+
+    Ids are computed arithmetically, so the index takes no memory.
+    """
+
+    __slots__ = 'shape', 'location_class'
+
+    def __init__(self, shape: Tuple[int, int], location_class: Type[Location]):
+        self.shape = tuple(shape)
+        self.location_class = location_class
+
+    def __len__(self) -> int:
+        return self.shape[0] * self.shape[1]
+
+    def get_id(self, loc: Location) -> int:
+        x, y = loc
+        x_limit, y_limit = self.shape
+        if not (0 <= x < x_limit and 0 <= y < y_limit):
+            raise KeyError(loc)
+        return x * y_limit + y
+
+    def get_location(self, node_id: int) -> Location:
+        return self.location_class(*divmod(node_id, self.shape[1]))
+
+    def save(self, path: str):
+        with open(os.path.join(path, 'index.json'), 'w') as f:
+            json.dump({
+                'shape': self.shape,
+                'location_class': _class_path(self.location_class),
+            }, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool=True) -> 'GridLocationIndex':
+        with open(os.path.join(path, 'index.json')) as f:
+            data = json.load(f)
+        return cls(data['shape'], _import_class(data['location_class']))
+
+
+class ListLocationIndex(LocationIndex):
+    """Index over an arbitrary sequence of locations"""
+
+    __slots__ = 'locations', 'ids'
+
+    def __init__(self, locations: Sequence[Location]):
+        self.locations = list(locations)
+        self.ids = {loc: i for i, loc in enumerate(self.locations)}
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def get_id(self, loc: Location) -> int:
+        return self.ids[loc]
+
+    def get_location(self, node_id: int) -> Location:
+        return self.locations[node_id]
+
+    def save(self, path: str):
+        location_class = type(self.locations[0]) if self.locations else None
+        with open(os.path.join(path, 'index.json'), 'w') as f:
+            json.dump({
+                'location_class': location_class and _class_path(
+                    location_class
+                ),
+            }, f)
+        np.save(
+            os.path.join(path, 'locations.npy'),
+            np.array(self.locations, dtype=np.int64)
+        )
+
+    @classmethod
+    def load(cls, path: str, mmap: bool=True) -> 'ListLocationIndex':
+        with open(os.path.join(path, 'index.json')) as f:
+            data = json.load(f)
+        coords = np.load(os.path.join(path, 'locations.npy')).tolist()
+        if data['location_class'] is None:
+            return cls([])
+        location_class = _import_class(data['location_class'])
+        return cls([location_class(*loc) for loc in coords])
+
+
+class HexLocationIndex(LocationIndex):
+    """
+    Row-major ids of the hexagons of a ``HexTopology``.
+
+    Hexagons are numbered by their row and column in ``layout``
+    (see ``HexLocation.get_row_shift``), so the index takes no memory.
+    """
+
+    __slots__ = 'shape', 'layout'
+
+    def __init__(self, shape: Tuple[int, int], layout: str):
+        self.shape = tuple(shape)
+        self.layout = layout
+
+    def __len__(self) -> int:
+        return self.shape[0] * self.shape[1]
+
+    def get_id(self, loc: HexLocation) -> int:
+        q, r = loc
+        col = q + HexLocation.get_row_shift(self.layout, r)
+        row_limit, col_limit = self.shape
+        if not (0 <= r < row_limit and 0 <= col < col_limit):
+            raise KeyError(loc)
+        return r * col_limit + col
+
+    def get_location(self, node_id: int) -> HexLocation:
+        return HexLocation.from_offset(
+            *divmod(node_id, self.shape[1]), layout=self.layout
+        )
+
+    def save(self, path: str):
+        with open(os.path.join(path, 'index.json'), 'w') as f:
+            json.dump({'shape': self.shape, 'layout': self.layout}, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool=True) -> 'HexLocationIndex':
+        with open(os.path.join(path, 'index.json')) as f:
+            data = json.load(f)
+        return cls(data['shape'], data['layout'])
+
+
+class CSRGraph:
+    """
+    Weighted directed graph in compressed sparse row format.
+
+    The edges of node ``i`` go to ``indices[indptr[i]:indptr[i + 1]]``
+    and cost ``weights[indptr[i]:indptr[i + 1]]``.
+    ``index`` maps locations to node ids and back.
+
+    Compared to a dict of dicts the graph takes about 12 bytes per edge,
+    and it can be saved to a directory and memory-mapped by
+    several processes.
+    """
+
+    __slots__ = 'indptr', 'indices', 'weights', 'index'
+
+    index_classes = {
+        'grid': GridLocationIndex,
+        'hex': HexLocationIndex,
+        'list': ListLocationIndex,
+    }
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray,
+                 weights: np.ndarray, index: LocationIndex):
+        if len(indptr) != len(index) + 1:
+            raise ValueError('indptr must have one item per node plus one')
+        if len(indices) != len(weights):
+            raise ValueError('indices and weights must be of the same length')
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.index = index
+
+    @classmethod
+    def from_neighbors(
+            cls, index: LocationIndex,
+            get_neighbors: Callable[[Location],
+                                    Iterable[Tuple[Location, float]]]
+    ) -> 'CSRGraph':
+        """Build the graph by listing the neighbours of every node"""
+        indptr = [0]
+        indices = []  # type: List[int]
+        weights = []  # type: List[float]
+        get_id = index.get_id
+        for node_id in range(len(index)):
+            for to_loc, cost in get_neighbors(index.get_location(node_id)):
+                indices.append(get_id(to_loc))
+                weights.append(cost)
+            indptr.append(len(indices))
+        return cls(
+            np.array(indptr, dtype=np.int64),
+            np.array(indices, dtype=np.int32),
+            np.array(weights, dtype=np.float32),
+            index
+        )
+
+    @classmethod
+    def from_dict(cls, graph: Dict[Location, Dict[Location, float]],
+                  index: LocationIndex=None) -> 'CSRGraph':
+        if index is None:
+            nodes = dict.fromkeys(graph)
+            for edges in graph.values():
+                nodes.update(dict.fromkeys(edges))
+            index = ListLocationIndex(nodes)
+        no_edges = {}
+        return cls.from_neighbors(
+            index, lambda loc: graph.get(loc, no_edges).items()
+        )
+
+    def to_dict(self) -> Dict[Location, Dict[Location, float]]:
+        """Convert to the dict-of-dicts format (nodes with edges only)"""
+        graph = {}
+        for node_id in range(len(self.index)):
+            edges = dict(self.iter_neighbors(self.index.get_location(node_id)))
+            if edges:
+                graph[self.index.get_location(node_id)] = edges
+        return graph
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory taken by the edge arrays"""
+        return self.indptr.nbytes + self.indices.nbytes + self.weights.nbytes
+
+    def iter_id_neighbors(
+            self, node_id: int
+    ) -> Iterator[Tuple[int, float]]:
+        start, end = self.indptr[node_id:node_id + 2].tolist()
+        return zip(
+            self.indices[start:end].tolist(),
+            self.weights[start:end].tolist()
+        )
+
+    def iter_neighbors(
+            self, loc: Location
+    ) -> Iterator[Tuple[Location, float]]:
+        """Same as ``Traversable.iter_neighbors`` for a fixed movement"""
+        try:
+            node_id = self.index.get_id(loc)
+        except KeyError:
+            return
+        get_location = self.index.get_location
+        for to_id, cost in self.iter_id_neighbors(node_id):
+            yield get_location(to_id), cost
+
+    def reversed(self) -> 'CSRGraph':
+        """Return the graph with all edges reversed"""
+        node_count = len(self.index)
+        sources = np.repeat(
+            np.arange(node_count, dtype=np.int32), np.diff(self.indptr)
+        )
+        order = np.argsort(self.indices, kind='stable')
+        indptr = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(self.indices, minlength=node_count), out=indptr[1:]
+        )
+        return self.__class__(
+            indptr, sources[order], self.weights[order], self.index
+        )
+
+    def replace_rows(self, rows: Dict[int, Sequence[Tuple[int, float]]]):
+        """
+        Replace all outgoing edges of the given nodes.
+
+        ``rows`` maps node ids to lists of ``(to_id, cost)``.
+        If no row changes its length, edges are overwritten in place;
+        otherwise the arrays are respliced with vectorized copies.
+        Read-only (memory-mapped) arrays are copied first.
+        """
+        if not rows:
+            return
+
+        indptr = self.indptr
+        if all(
+                len(edges) == indptr[node_id + 1] - indptr[node_id]
+                for node_id, edges in rows.items()
+        ):
+            if not (self.indices.flags.writeable and
+                    self.weights.flags.writeable):
+                self.indices = np.array(self.indices)
+                self.weights = np.array(self.weights)
+            for node_id, edges in rows.items():
+                start = indptr[node_id]
+                end = start + len(edges)
+                if edges:
+                    to_ids, costs = zip(*edges)
+                    self.indices[start:end] = to_ids
+                    self.weights[start:end] = costs
+            return
+
+        counts = np.diff(indptr)
+        changed = np.fromiter(rows, dtype=np.int64, count=len(rows))
+        # Copy the edges of unchanged rows to their new positions
+        edge_rows = np.repeat(np.arange(len(counts)), counts)
+        keep = ~np.isin(edge_rows, changed)
+        counts[changed] = [len(rows[node_id]) for node_id in changed.tolist()]
+        new_indptr = np.zeros_like(indptr)
+        np.cumsum(counts, out=new_indptr[1:])
+        new_indices = np.empty(new_indptr[-1], dtype=self.indices.dtype)
+        new_weights = np.empty(new_indptr[-1], dtype=self.weights.dtype)
+        kept_rows = edge_rows[keep]
+        positions = (
+            new_indptr[kept_rows] +
+            np.flatnonzero(keep) - indptr[kept_rows]
+        )
+        new_indices[positions] = self.indices[keep]
+        new_weights[positions] = self.weights[keep]
+        for node_id, edges in rows.items():
+            start = new_indptr[node_id]
+            if edges:
+                to_ids, costs = zip(*edges)
+                new_indices[start:start + len(edges)] = to_ids
+                new_weights[start:start + len(edges)] = costs
+
+        self.indptr = new_indptr
+        self.indices = new_indices
+        self.weights = new_weights
+
+    def save(self, path: str):
+        """
+        Save the graph into directory ``path``.
+
+        Arrays are replaced rather than overwritten, so graphs already
+        memory-mapped from ``path`` keep their contents.
+        """
+        os.makedirs(path, exist_ok=True)
+        for name in ('indptr', 'indices', 'weights'):
+            file_name = os.path.join(path, name + '.npy')
+            with open(file_name + '.tmp', 'wb') as f:
+                np.save(f, getattr(self, name))
+            os.replace(file_name + '.tmp', file_name)
+        for index_type, index_class in self.index_classes.items():
+            if isinstance(self.index, index_class):
+                break
+        else:
+            raise TypeError(type(self.index).__name__)
+        self.index.save(path)
+        with open(os.path.join(path, 'graph.json'), 'w') as f:
+            json.dump({'index': index_type}, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool=True) -> 'CSRGraph':
+        """
+        Load a graph saved with ``save``.
+
+        With ``mmap`` the arrays are memory-mapped read-only,
+        so processes loading the same graph share its memory.
+        """
+        mmap_mode = 'r' if mmap else None
+        with open(os.path.join(path, 'graph.json')) as f:
+            index_type = json.load(f)['index']
+        arrays = [
+            np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode)
+            for name in ('indptr', 'indices', 'weights')
+        ]
+        index = cls.index_classes[index_type].load(path, mmap=mmap)
+        return cls(*arrays, index=index)
+
+
+Graph = Union[Dict[Location, Dict[Location, float]], CSRGraph]
+
+
+def reverse_graph(graph: Graph) -> Graph:
+    """Return a graph of the same kind with all edges reversed"""
+    if isinstance(graph, CSRGraph):
+        return graph.reversed()
+
+    reversed_graph = {}
+    for from_loc, edges in graph.items():
+        for to_loc, cost in edges.items():
+            if to_loc not in reversed_graph:
+                reversed_graph[to_loc] = {}
+            reversed_graph[to_loc][from_loc] = cost
+    return reversed_graph
+
+
+def patch_graph(graph: Graph, topology, movement_strategy,
+                locs: Iterable[Location], reverse: bool=False) -> bool:
+    """
+    Update ``graph`` in place after the tiles at ``locs`` have changed.
+
+    Only the edges of the affected cells (``locs`` and their neighbours)
+    are recomputed. Return ``False`` if the graph cannot be patched
+    (e.g. a location is missing from its index) and must be rebuilt.
+    With ``reverse``, ``graph`` is a reversed graph (see ``reverse_graph``)
+    and its rows are recomputed from predecessors.
+    """
+    affected = topology.get_affected_locations(locs)
+    iter_neighbors = (
+        topology.iter_predecessors if reverse else topology.iter_neighbors
+    )
+
+    if isinstance(graph, CSRGraph):
+        get_id = graph.index.get_id
+        try:
+            rows = {
+                get_id(loc): [
+                    (get_id(to_loc), cost)
+                    for to_loc, cost in iter_neighbors(loc, movement_strategy)
+                ]
+                for loc in affected
+            }
+        except KeyError:
+            return False
+        graph.replace_rows(rows)
+        return True
+
+    for loc in affected:
+        edges = dict(iter_neighbors(loc, movement_strategy))
+        if edges:
+            graph[loc] = edges
+        else:
+            graph.pop(loc, None)
+    return True
+
+
+def get_neighbor_function(
+        graph: Graph
+) -> Callable[[Location], Iterable[Tuple[Location, float]]]:
+    """Return a function listing ``(to_loc, cost)`` of a node of ``graph``"""
+    if isinstance(graph, CSRGraph):
+        return graph.iter_neighbors
+
+    no_edges = {}
+    return lambda loc: graph.get(loc, no_edges).items()
+
+
+class TopologyCache:
+    """
+    Bounded LRU cache of data derived from topologies.
+
+    Entries are keyed on the topology object, the fingerprint of the
+    movement strategy and an optional extra key. An entry is stale
+    as soon as ``topology.version`` changes.
+    Subclasses define ``build``.
+    """
+
+    def __init__(self, max_size: int=16):
+        if max_size < 1:
+            raise ValueError('Cache size must be positive')
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.updates = 0
+        # key -> (topology, version, value)
+        self._entries = OrderedDict()  # type: Dict[Hashable, Tuple]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def build(self, topology, movement_strategy, *key) -> Any:
+        raise NotImplementedError
+
+    def update(self, value, topology, movement_strategy,
+               changed: Set[Location], *key) -> bool:
+        """
+        Bring a stale ``value`` up to date in place.
+
+        ``changed`` are the locations modified since it was built.
+        Return ``False`` if it has to be rebuilt instead.
+        """
+        return False
+
+    def get(self, topology, movement_strategy, *key) -> Any:
+        """Return the cached value, building it if missing or stale"""
+        cache_key = (id(topology), movement_strategy.fingerprint) + key
+        entry = self._entries.get(cache_key)
+        if (
+                entry is not None and entry[0] is topology and
+                entry[1] == topology.version
+        ):
+            self.hits += 1
+            self._entries.move_to_end(cache_key)
+            return entry[2]
+
+        self.misses += 1
+        if entry is not None and entry[0] is topology:
+            changed = topology.changed_since(entry[1])
+            if changed is not None and self.update(
+                    entry[2], topology, movement_strategy, changed, *key):
+                self.updates += 1
+                self._entries[cache_key] = (
+                    topology, topology.version, entry[2]
+                )
+                self._entries.move_to_end(cache_key)
+                return entry[2]
+
+        value = self.build(topology, movement_strategy, *key)
+        self.put(value, topology, movement_strategy, *key)
+        return value
+
+    def peek(self, topology, movement_strategy, *key) -> Tuple[Any, bool]:
+        """
+        Return ``(value, current)`` without building or updating,
+        ``(None, False)`` if nothing is cached. A value that is not
+        ``current`` was built for an older version of ``topology``.
+        """
+        cache_key = (id(topology), movement_strategy.fingerprint) + key
+        entry = self._entries.get(cache_key)
+        if entry is None or entry[0] is not topology:
+            return None, False
+        if entry[1] != topology.version:
+            return entry[2], False
+        self.hits += 1
+        self._entries.move_to_end(cache_key)
+        return entry[2], True
+
+    def put(self, value, topology, movement_strategy, *key):
+        """
+        Store a ``value`` built elsewhere (e.g. loaded from disk)
+        for the current version of ``topology``
+        """
+        cache_key = (id(topology), movement_strategy.fingerprint) + key
+        self._entries[cache_key] = (topology, topology.version, value)
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'updates': self.updates,
+        }
+
+
+class GraphCache(TopologyCache):
+    """
+    Cache of graphs built by ``Graphable.to_graph``.
+
+    When a few tiles change, the cached graph is patched in place
+    (see ``patch_graph``) if the topology can tell what changed.
+    Changes of more than ``max_patch_size`` locations cause a rebuild.
+    Reversed graphs (for backward searches) are cached separately.
+    """
+
+    max_patch_size = 4096
+
+    def build(self, topology, movement_strategy, compact: bool=False,
+              reverse: bool=False) -> Graph:
+        graph = topology.to_graph(movement_strategy, compact=compact)
+        return reverse_graph(graph) if reverse else graph
+
+    def update(self, graph: Graph, topology, movement_strategy,
+               changed: Set[Location], compact: bool=False,
+               reverse: bool=False) -> bool:
+        if len(changed) > self.max_patch_size:
+            return False
+        return patch_graph(
+            graph, topology, movement_strategy, changed, reverse=reverse
+        )
+
+    def get_graph(self, topology, movement_strategy,
+                  compact: bool=False, reverse: bool=False) -> Graph:
+        if reverse:
+            return self.get(topology, movement_strategy, compact, reverse)
+        return self.get(topology, movement_strategy, compact)
@@ -0,0 +1,153 @@
+from .location import HexLocation, Location
+from .movement import (
+    MovementStrategy, SimpleHexMovement, SimpleRectangularMovement
+)
+
+
+class Heuristic:
+    """
+    Lower bound estimate of the distance between two locations
+    """
+
+    __slots__ = ()
+
+    def __call__(self, from_loc: Location, to_loc: Location) -> float:
+        raise NotImplementedError
+
+
+class ZeroHeuristic(Heuristic):
+    """Heuristic that knows nothing; turns A* into Dijkstra"""
+
+    __slots__ = ()
+
+    def __call__(self, from_loc: Location, to_loc: Location) -> float:
+        return 0
+
+
+class GridHeuristic(Heuristic):
+    """
+    Base class for heuristics on 2D grids.
+
+    ``straight`` and ``diagonal`` are the cheapest costs of a single
+    straight and diagonal step (``diagonal`` is ``None``
+    if diagonal steps are not allowed).
+    """
+
+    __slots__ = 'straight', 'diagonal'
+
+    def __init__(self, straight: float=1, diagonal: float=None):
+        self.straight = straight
+        if diagonal is not None:
+            # Two straight steps are never worse than one diagonal step
+            diagonal = min(diagonal, 2 * straight)
+        self.diagonal = diagonal
+
+    @classmethod
+    def from_movement(cls, movement_strategy: SimpleRectangularMovement):
+        """
+        Create an admissible heuristic for the given movement strategy.
+
+        Step costs are scaled by the minimum weight in
+        ``movement_strategy.weight_map``, so the estimate never
+        exceeds the real distance.
+        """
+        min_weight = max(0, min(
+            (weight for weight in movement_strategy.weight_map.values()
+             if weight is not None),
+            default=0
+        ))
+        diff_map = movement_strategy.diff_map
+        diagonal = diff_map[2]
+        return cls(
+            straight=diff_map[1] * min_weight,
+            diagonal=None if diagonal is None else diagonal * min_weight
+        )
+
+
+class ManhattanHeuristic(GridHeuristic):
+    """
+    Sum of coordinate differences.
+
+    If diagonal steps are allowed, the straight step cost is capped by
+    half the diagonal one to stay admissible.
+    """
+
+    __slots__ = ()
+
+    def __call__(self, from_loc: Location, to_loc: Location) -> float:
+        step = self.straight
+        if self.diagonal is not None:
+            step = min(step, self.diagonal / 2)
+        return step * (abs(from_loc.x - to_loc.x) + abs(from_loc.y - to_loc.y))
+
+
+class OctileHeuristic(GridHeuristic):
+    """
+    Exact distance on an open 8-connected grid.
+
+    Falls back to the Manhattan distance if diagonal steps
+    are not allowed.
+    """
+
+    __slots__ = ()
+
+    def __call__(self, from_loc: Location, to_loc: Location) -> float:
+        dx = abs(from_loc.x - to_loc.x)
+        dy = abs(from_loc.y - to_loc.y)
+        diagonal = self.diagonal
+        if diagonal is None:
+            diagonal = 2 * self.straight
+        if dx < dy:
+            dx, dy = dy, dx
+        return self.straight * (dx - dy) + diagonal * dy
+
+
+class EuclideanHeuristic(GridHeuristic):
+    """Straight-line distance"""
+
+    __slots__ = ()
+
+    def __call__(self, from_loc: Location, to_loc: Location) -> float:
+        step = self.straight
+        if self.diagonal is not None:
+            step = min(step, self.diagonal / 2**0.5)
+        return step * (
+            (from_loc.x - to_loc.x)**2 + (from_loc.y - to_loc.y)**2
+        )**0.5
+
+
+class HexHeuristic(Heuristic):
+    """Number of steps between hexagons times the cheapest step cost"""
+
+    __slots__ = 'step',
+
+    def __init__(self, step: float=1):
+        self.step = step
+
+    @classmethod
+    def from_movement(cls, movement_strategy: SimpleHexMovement):
+        """Create an admissible heuristic for the given movement strategy"""
+        return cls(max(0, min(
+            (weight for weight in movement_strategy.weight_map.values()
+             if weight is not None),
+            default=0
+        )))
+
+    def __call__(self, from_loc: HexLocation, to_loc: HexLocation) -> float:
+        dq = from_loc.q - to_loc.q
+        dr = from_loc.r - to_loc.r
+        return self.step * (abs(dq) + abs(dr) + abs(dq + dr)) / 2
+
+
+def default_heuristic(movement_strategy: MovementStrategy) -> Heuristic:
+    """
+    The tightest admissible heuristic for the movement strategy
+    (``ZeroHeuristic`` for movement strategies it does not know)
+    """
+    if isinstance(movement_strategy, SimpleHexMovement):
+        return HexHeuristic.from_movement(movement_strategy)
+    if not isinstance(movement_strategy, SimpleRectangularMovement):
+        return ZeroHeuristic()
+    if movement_strategy.diff_map[2] is None:
+        return ManhattanHeuristic.from_movement(movement_strategy)
+    return OctileHeuristic.from_movement(movement_strategy)
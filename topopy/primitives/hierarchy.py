@@ -0,0 +1,344 @@
+from itertools import chain
+from typing import Dict, List, Optional, Set, Tuple  # noqa
+
+from .graph import TopologyCache
+from .heuristic import Heuristic
+from .location import Location2D
+from .movement import MovementStrategy
+from .topology import RectangularTopology
+from .utils import astar, dijkstra
+
+Cluster = Tuple[int, int]
+# (cluster, axis): border between ``cluster`` and the next cluster
+# along ``axis`` (0 for x, 1 for y). Axes 2 and 3 are the diagonals
+# through the corner after ``cluster``: 2 from ``cluster`` to the next
+# cluster along both axes, 3 between the next clusters along x and y
+Border = Tuple[Cluster, int]
+
+
+class ClusterAbstraction:
+    """
+    Abstract graph of a rectangular topology for HPA* (Botea et al., 2004).
+
+    The grid is split into ``cluster_size`` x ``cluster_size`` clusters.
+    Steps across a cluster border, diagonal ones included, are grouped
+    into entrances (runs of neighbouring cells passable across the
+    border). Each entrance contributes one transition in its middle,
+    or one at each end if it is at least ``wide_entrance`` cells wide.
+    Diagonal steps across the corners where four clusters meet are
+    transitions of their own. Transition cells are the nodes of the
+    abstract graph, connected by the transitions themselves and by their
+    shortest paths within a cluster.
+
+    Clusters are abstracted lazily, when a search reaches them
+    (``precompute`` abstracts all of them), and ``invalidate`` drops
+    only the clusters around changed locations.
+    """
+
+    wide_entrance = 6
+
+    def __init__(self, topology: RectangularTopology,
+                 movement_strategy: MovementStrategy, cluster_size: int=16):
+        if cluster_size < 2:
+            raise ValueError('Cluster size must be at least 2')
+        self.topology = topology
+        self.movement_strategy = movement_strategy
+        self.cluster_size = cluster_size
+        # cluster -> {node: {neighbor node: cost}}
+        self._clusters = {}  # type: Dict[Cluster, Dict]
+        # border -> [(node, node across the border)]
+        self._borders = {}  # type: Dict[Border, List]
+        self.expanded_clusters = 0
+
+    def __len__(self) -> int:
+        """Number of abstracted clusters"""
+        return len(self._clusters)
+
+    @property
+    def cluster_count(self) -> Tuple[int, int]:
+        size = self.cluster_size
+        x_size, y_size = self.topology.shape
+        return -(-x_size // size), -(-y_size // size)
+
+    def get_cluster(self, loc: Location2D) -> Cluster:
+        return loc.x // self.cluster_size, loc.y // self.cluster_size
+
+    def _get_bounds(self, cluster: Cluster) -> Tuple[int, int, int, int]:
+        size = self.cluster_size
+        x_size, y_size = self.topology.shape
+        x0, y0 = cluster[0] * size, cluster[1] * size
+        return x0, y0, min(x0 + size, x_size), min(y0 + size, y_size)
+
+    def _get_cost(self, from_loc: Location2D, to_loc: Location2D
+                  ) -> Optional[float]:
+        topology = self.topology
+        return self.movement_strategy.get_passability(
+            topology[from_loc], topology[to_loc], from_loc, to_loc
+        )
+
+    def get_local_neighbor_function(self, cluster: Cluster,
+                                    predecessors: bool=False):
+        """Neighbour function that does not leave ``cluster``"""
+        x0, y0, x1, y1 = self._get_bounds(cluster)
+        movement_strategy = self.movement_strategy
+        iter_edges = (
+            self.topology.iter_predecessors if predecessors
+            else self.topology.iter_neighbors
+        )
+
+        def get_neighbors(loc):
+            return [
+                (neighbor, weight)
+                for neighbor, weight in iter_edges(loc, movement_strategy)
+                if x0 <= neighbor.x < x1 and y0 <= neighbor.y < y1
+            ]
+        return get_neighbors
+
+    def _get_border_clusters(self, border: Border
+                             ) -> Tuple[Cluster, Cluster]:
+        """Return the clusters on sides 0 and 1 of ``border``"""
+        (cx, cy), axis = border
+        if axis == 0:
+            return (cx, cy), (cx + 1, cy)
+        if axis == 1:
+            return (cx, cy), (cx, cy + 1)
+        if axis == 2:
+            return (cx, cy), (cx + 1, cy + 1)
+        return (cx + 1, cy), (cx, cy + 1)
+
+    def _get_crossings(self, loc: Location2D, cluster: Cluster
+                       ) -> Set[Location2D]:
+        """Return the cells of ``cluster`` with an edge to or from ``loc``"""
+        x0, y0, x1, y1 = self._get_bounds(cluster)
+        topology = self.topology
+        movement_strategy = self.movement_strategy
+        return {
+            neighbor
+            for neighbor, _ in chain(
+                topology.iter_neighbors(loc, movement_strategy),
+                topology.iter_predecessors(loc, movement_strategy)
+            )
+            if x0 <= neighbor.x < x1 and y0 <= neighbor.y < y1
+        }
+
+    def _get_transitions(self, border: Border) -> List:
+        transitions = self._borders.get(border)
+        if transitions is not None:
+            return transitions
+
+        cluster, axis = border
+        other = self._get_border_clusters(border)[1]
+        x0, y0, x1, y1 = self._get_bounds(cluster)
+        location_class = self.topology.location_class
+        if axis >= 2:
+            if axis == 2:
+                a, b = location_class(x1 - 1, y1 - 1), location_class(x1, y1)
+            else:
+                a, b = location_class(x1, y1 - 1), location_class(x1 - 1, y1)
+            transitions = []
+            if b in self._get_crossings(a, other):
+                transitions.append((a, b))
+            self._borders[border] = transitions
+            return transitions
+
+        if axis == 0:
+            cells = [location_class(x1 - 1, y) for y in range(y0, y1)]
+        else:
+            cells = [location_class(x, y1 - 1) for x in range(x0, x1)]
+
+        # Pairs of cells connected across the border, in order along it
+        pairs = sorted(
+            ((a, b) for a in cells for b in self._get_crossings(a, other)),
+            key=lambda pair: (pair[0][1 - axis], pair[1][1 - axis])
+        )
+        transitions = []
+        run = []
+        for pair in pairs + [None]:
+            # Cells of a run must be neighbours on both sides
+            if pair is not None and (not run or all(
+                    abs(pair[side][1 - axis] - run[-1][side][1 - axis]) <= 1
+                    for side in (0, 1)
+            )):
+                run.append(pair)
+                continue
+            if len(run) >= self.wide_entrance:
+                transitions.extend((run[0], run[-1]))
+            elif run:
+                transitions.append(run[len(run) // 2])
+            run = [pair]
+
+        self._borders[border] = transitions
+        return transitions
+
+    def _iter_cluster_borders(self, cluster: Cluster):
+        """Generate ``(border, side)`` for borders of ``cluster``"""
+        cx, cy = cluster
+        x_count, y_count = self.cluster_count
+        for border, side in (
+                (((cx - 1, cy), 0), 1), ((cluster, 0), 0),
+                (((cx, cy - 1), 1), 1), ((cluster, 1), 0),
+                (((cx - 1, cy - 1), 2), 1), ((cluster, 2), 0),
+                (((cx - 1, cy), 3), 0), (((cx, cy - 1), 3), 1),
+        ):
+            if all(
+                    0 <= x < x_count and 0 <= y < y_count
+                    for x, y in self._get_border_clusters(border)
+            ):
+                yield border, side
+
+    def get_cluster_edges(self, cluster: Cluster) -> Dict:
+        """
+        Return ``{node: {neighbor: cost}}`` for the transition nodes
+        of ``cluster``, building them if needed
+        """
+        edges = self._clusters.get(cluster)
+        if edges is not None:
+            return edges
+
+        self.expanded_clusters += 1
+        edges = {}
+        for border, side in self._iter_cluster_borders(cluster):
+            for transition in self._get_transitions(border):
+                node, other = transition[side], transition[1 - side]
+                node_edges = edges.setdefault(node, {})
+                cost = self._get_cost(node, other)
+                if cost is not None:
+                    node_edges[other] = cost
+
+        # Every node searches the same cells, generate their edges once
+        local_edges = {}
+        get_local_neighbors = self.get_local_neighbor_function(cluster)
+
+        def get_neighbors(loc):
+            neighbors = local_edges.get(loc)
+            if neighbors is None:
+                neighbors = local_edges[loc] = get_local_neighbors(loc)
+            return neighbors
+
+        nodes = list(edges)
+        for node in nodes:
+            paths = dijkstra.find_paths(get_neighbors, node, nodes)
+            for other, (dist, _) in paths.items():
+                if dist is not None and other != node:
+                    edges[node][other] = dist
+
+        self._clusters[cluster] = edges
+        return edges
+
+    def precompute(self):
+        x_count, y_count = self.cluster_count
+        for cx in range(x_count):
+            for cy in range(y_count):
+                self.get_cluster_edges((cx, cy))
+
+    def invalidate(self, locs: Set[Location2D]):
+        """Forget the clusters whose edges may depend on ``locs``"""
+        clusters = {
+            self.get_cluster(loc)
+            for loc in self.topology.get_affected_locations(locs)
+        }
+        borders = set()
+        for cluster in clusters:
+            for border, _ in self._iter_cluster_borders(cluster):
+                borders.add(border)
+        for border in borders:
+            transitions = self._borders.pop(border, None)
+            if border[1] >= 2 and transitions == self._get_transitions(
+                    border):
+                # The cluster across the corner keeps its edges: changes
+                # next to its cells would have put it in ``clusters``
+                continue
+            for cluster in self._get_border_clusters(border):
+                self._clusters.pop(cluster, None)
+        for cluster in clusters:
+            self._clusters.pop(cluster, None)
+
+    def refine(self, nodes: List[Location2D], heuristic: Heuristic
+               ) -> List[Location2D]:
+        """Expand an abstract path into a path of neighbouring cells"""
+        path = [nodes[0]]
+        for node, next_node in zip(nodes, nodes[1:]):
+            cluster = self.get_cluster(node)
+            if cluster != self.get_cluster(next_node):
+                path.append(next_node)
+                continue
+            _, local_path = astar.find_path(
+                self.get_local_neighbor_function(cluster), node, next_node,
+                heuristic=lambda loc: heuristic(loc, next_node)
+            )
+            path.extend(local_path[1:])
+        return path
+
+    def get_path(self, src: Location2D, dst: Location2D, heuristic: Heuristic
+                 ) -> Tuple[Optional[float], Optional[List[Location2D]]]:
+        """
+        Find a near-shortest path by searching the abstract graph
+        and refining it within clusters.
+        """
+        if src == dst:
+            return 0, [src]
+
+        src_cluster = self.get_cluster(src)
+        dst_cluster = self.get_cluster(dst)
+
+        # Connect src and dst to the transition nodes of their clusters
+        src_targets = list(self.get_cluster_edges(src_cluster))
+        if dst_cluster == src_cluster:
+            src_targets.append(dst)
+        src_edges = [
+            (node, dist) for node, (dist, _) in dijkstra.find_paths(
+                self.get_local_neighbor_function(src_cluster), src,
+                src_targets
+            ).items()
+            if dist is not None and node != src
+        ]
+        dst_edges = {
+            node: dist for node, (dist, _) in dijkstra.find_paths(
+                self.get_local_neighbor_function(dst_cluster, True), dst,
+                list(self.get_cluster_edges(dst_cluster))
+            ).items()
+            if dist is not None and node != dst
+        }
+
+        def get_neighbors(node):
+            edges = list(
+                self.get_cluster_edges(self.get_cluster(node))
+                .get(node, {}).items()
+            )
+            if node == src:
+                edges.extend(src_edges)
+            if node in dst_edges:
+                edges.append((dst, dst_edges[node]))
+            return edges
+
+        dist, nodes = astar.find_path(
+            get_neighbors, src, dst,
+            heuristic=lambda loc: heuristic(loc, dst)
+        )
+        if nodes is None:
+            return None, None
+        return dist, self.refine(nodes, heuristic)
+
+
+class ClusterCache(TopologyCache):
+    """
+    Cache of cluster abstractions.
+
+    When tiles change, only the clusters around them are dropped
+    and abstracted again on demand.
+    """
+
+    def build(self, topology, movement_strategy, cluster_size: int=16
+              ) -> ClusterAbstraction:
+        return ClusterAbstraction(topology, movement_strategy, cluster_size)
+
+    def update(self, abstraction: ClusterAbstraction, topology,
+               movement_strategy, changed: Set[Location2D],
+               cluster_size: int=16) -> bool:
+        abstraction.invalidate(changed)
+        return True
+
+    def get_abstraction(self, topology: RectangularTopology,
+                        movement_strategy: MovementStrategy,
+                        cluster_size: int=16) -> ClusterAbstraction:
+        return self.get(topology, movement_strategy, cluster_size)
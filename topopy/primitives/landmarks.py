@@ -0,0 +1,271 @@
+import json
+import os
+import random
+from heapq import heappop, heappush
+from typing import Callable, List, Tuple  # noqa
+
+import numpy as np
+
+from .graph import CSRGraph, LocationIndex, TopologyCache
+from .location import Location
+
+FARTHEST = 'farthest'
+AVOID = 'avoid'
+
+#: Distance stored for nodes that cannot be reached. It is finite
+#: so that bounds never become ``inf - inf``
+UNREACHABLE = np.float32(1e30)
+
+
+def get_landmark_path(topology_path: str) -> str:
+    """Directory of the landmark table saved next to a topology file"""
+    return topology_path + '.landmarks'
+
+
+def _get_distances(graph: CSRGraph, source: int
+                   ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Dijkstra from ``source`` over node ids.
+
+    Return distances (``inf`` if unreachable) and parents (``-1`` for
+    the source and unreachable nodes) of all nodes.
+    """
+    distances = np.full(len(graph), np.inf)
+    parents = np.full(len(graph), -1, dtype=np.int64)
+    tentative = {source: 0}
+    tentative_parents = {}
+    heap = [(0, source)]
+    iter_id_neighbors = graph.iter_id_neighbors
+    while heap:
+        distance, node = heappop(heap)
+        if distance > tentative[node]:
+            continue
+        for neighbor, weight in iter_id_neighbors(node):
+            neighbor_distance = distance + weight
+            if neighbor_distance < tentative.get(neighbor, float('inf')):
+                tentative[neighbor] = neighbor_distance
+                tentative_parents[neighbor] = node
+                heappush(heap, (neighbor_distance, neighbor))
+    distances[list(tentative)] = list(tentative.values())
+    if tentative_parents:
+        parents[list(tentative_parents)] = list(tentative_parents.values())
+    return distances, parents
+
+
+class LandmarkTable:
+    """
+    Distances between ``landmarks`` and all nodes of a graph for ALT
+    (A*, landmarks, triangle inequality; Goldberg & Harrelson, 2005).
+
+    For ``K`` landmarks, ``distances[n, k]`` is the distance from
+    landmark ``k`` to node ``n`` and ``distances[n, K + k]`` is minus
+    the distance back, so that a lower bound takes a single subtraction.
+    The table is float32 with ``UNREACHABLE`` for missing paths; node ids
+    are those of ``index``. Tables can be saved and memory-mapped back,
+    so that the preprocessing survives process restarts.
+    """
+
+    __slots__ = 'landmarks', 'distances', 'index', 'tolerance'
+
+    def __init__(self, landmarks: np.ndarray, distances: np.ndarray,
+                 index: LocationIndex):
+        self.landmarks = landmarks
+        self.distances = distances
+        self.index = index
+        # float32 rounding must not make the bounds overestimate
+        reachable = np.abs(distances[np.abs(distances) < UNREACHABLE])
+        self.tolerance = 4 * float(np.finfo(np.float32).eps) * float(
+            reachable.max() if reachable.size else 0
+        )
+
+    def __len__(self) -> int:
+        return len(self.landmarks)
+
+    @property
+    def from_landmarks(self) -> np.ndarray:
+        return self.distances[:, :len(self.landmarks)]
+
+    @property
+    def to_landmarks(self) -> np.ndarray:
+        return -self.distances[:, len(self.landmarks):]
+
+    @property
+    def nbytes(self) -> int:
+        return self.distances.nbytes
+
+    @classmethod
+    def build(cls, graph: CSRGraph, count: int=8, selection: str=FARTHEST,
+              seed: int=0) -> 'LandmarkTable':
+        """
+        Select ``count`` landmarks and compute their distance tables.
+
+        ``FARTHEST`` repeatedly picks the node farthest from the chosen
+        landmarks. ``AVOID`` (Goldberg & Werneck, 2005) picks landmarks
+        in the parts of a random shortest path tree where the current
+        bounds are weakest.
+        """
+        if selection not in (FARTHEST, AVOID):
+            raise ValueError(selection)
+        reverse_graph = graph.reversed()
+        rnd = random.Random(seed)
+        node_count = len(graph)
+        # Nodes without edges (e.g. walls) make useless landmarks
+        candidates = np.flatnonzero(
+            (np.diff(graph.indptr) > 0) | (np.diff(reverse_graph.indptr) > 0)
+        )
+        count = min(count, len(candidates))
+        distances = np.empty((node_count, 2 * count), dtype=np.float32)
+        distances[:, :count] = UNREACHABLE
+        distances[:, count:] = -UNREACHABLE
+        landmarks = []  # type: List[int]
+        # Distance from the closest landmark, for FARTHEST
+        closest = np.full(node_count, np.inf)
+
+        for k in range(count):
+            if selection == AVOID:
+                landmark = cls._select_avoid(
+                    graph, candidates, landmarks,
+                    distances[:, :k], -distances[:, count:count + k], rnd
+                )
+            elif landmarks:
+                landmark = cls._select_farthest(closest, candidates)
+            else:
+                # The node farthest from a random one, which should
+                # not be in a small isolated area
+                root_distances = max(
+                    (_get_distances(graph, int(rnd.choice(candidates)))[0]
+                     for _ in range(4)),
+                    key=lambda d: np.isfinite(d).sum()
+                )
+                root_distances[np.isinf(root_distances)] = -1
+                landmark = int(
+                    candidates[np.argmax(root_distances[candidates])]
+                )
+            landmarks.append(landmark)
+
+            landmark_distances, _ = _get_distances(graph, landmark)
+            reachable = np.isfinite(landmark_distances)
+            distances[reachable, k] = landmark_distances[reachable]
+            np.minimum(closest, landmark_distances, out=closest)
+            landmark_distances, _ = _get_distances(reverse_graph, landmark)
+            reachable = np.isfinite(landmark_distances)
+            distances[reachable, count + k] = -landmark_distances[reachable]
+
+        return cls(np.array(landmarks, dtype=np.int64), distances,
+                   graph.index)
+
+    @staticmethod
+    def _select_farthest(closest: np.ndarray, candidates: np.ndarray) -> int:
+        distances = closest[candidates]
+        reached = np.isfinite(distances)
+        if distances[reached].max(initial=0) > 0:
+            return int(candidates[
+                np.argmax(np.where(reached, distances, -1))
+            ])
+        # The reached area is covered, start on another one
+        return int(candidates[np.argmin(reached)])
+
+    @staticmethod
+    def _select_avoid(graph: CSRGraph, candidates: np.ndarray,
+                      landmarks: List[int], from_landmarks: np.ndarray,
+                      to_landmarks: np.ndarray, rnd: random.Random) -> int:
+        root = int(rnd.choice(candidates))
+        distances, parents = _get_distances(graph, root)
+        reached = np.flatnonzero(np.isfinite(distances))
+
+        # Weight: how much the current bound underestimates d(root, v)
+        weights = np.zeros(len(graph))
+        if landmarks:
+            bounds = np.maximum(
+                from_landmarks[reached] - from_landmarks[root],
+                to_landmarks[root] - to_landmarks[reached]
+            ).max(axis=1).clip(min=0)
+        else:
+            bounds = 0
+        weights[reached] = distances[reached] - bounds
+
+        # Subtree sizes, children before parents; subtrees containing
+        # a landmark already get size 0
+        sizes = weights
+        covered = np.zeros(len(graph), dtype=bool)
+        covered[landmarks] = True
+        for node in reached[np.argsort(-distances[reached])].tolist():
+            if covered[node]:
+                sizes[node] = 0
+            parent = parents[node]
+            if parent >= 0:
+                sizes[parent] += sizes[node]
+                covered[parent] |= covered[node]
+
+        children = {}
+        for node in reached.tolist():
+            if parents[node] >= 0:
+                children.setdefault(int(parents[node]), []).append(node)
+        node = root
+        while True:
+            best = max(children.get(node, ()), key=sizes.__getitem__,
+                       default=None)
+            if best is None or sizes[best] <= 0:
+                break
+            node = best
+        if node in landmarks:
+            # Everything is covered, fall back to the farthest node
+            return int(reached[np.argmax(distances[reached])])
+        return node
+
+    def get_heuristic(self, dst: Location) -> Callable[[Location], float]:
+        """Return a lower bound of the distance to ``dst`` for a node"""
+        get_id = self.index.get_id
+        distances = self.distances
+        # Both d(L, dst) - d(L, n) and d(n, L) - d(dst, L) are
+        # ``distances[dst] - distances[n]``
+        dst_distances = np.array(distances[get_id(dst)])
+        tolerance = self.tolerance
+
+        def heuristic(loc: Location) -> float:
+            bound = float((dst_distances - distances[get_id(loc)]).max())
+            return bound - tolerance if bound > tolerance else 0
+        return heuristic
+
+    def save(self, path: str):
+        """Save the table into directory ``path``"""
+        os.makedirs(path, exist_ok=True)
+        for name in ('landmarks', 'distances'):
+            np.save(os.path.join(path, name + '.npy'), getattr(self, name))
+        for index_type, index_class in CSRGraph.index_classes.items():
+            if isinstance(self.index, index_class):
+                break
+        else:
+            raise TypeError(type(self.index).__name__)
+        self.index.save(path)
+        with open(os.path.join(path, 'landmarks.json'), 'w') as f:
+            json.dump({'index': index_type}, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool=True) -> 'LandmarkTable':
+        """Load a table saved with ``save``, memory-mapped by default"""
+        with open(os.path.join(path, 'landmarks.json')) as f:
+            meta = json.load(f)
+        mmap_mode = 'r' if mmap else None
+        arrays = [
+            np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode)
+            for name in ('landmarks', 'distances')
+        ]
+        index = CSRGraph.index_classes[meta['index']].load(path, mmap=mmap)
+        return cls(*arrays, index=index)
+
+
+class LandmarkCache(TopologyCache):
+    """
+    Cache of landmark tables.
+
+    Tables are expensive to build and cannot be patched, so this cache
+    suits maps that rarely change.
+    """
+
+    def build(self, topology, movement_strategy, count: int=8,
+              selection: str=FARTHEST) -> LandmarkTable:
+        return LandmarkTable.build(
+            topology.to_graph(movement_strategy, compact=True),
+            count, selection
+        )
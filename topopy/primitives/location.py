@@ -1,6 +1,6 @@
 from collections import namedtuple
 from functools import wraps
-from typing import Callable
+from typing import Callable, Tuple
 
 
 class Location:
@@ -28,3 +28,56 @@ class Location2D(_Location2D, Location):
 class IntLocation2D(Location2D):
     """2D-location with integer coordinates"""
     __slots__ = ()
+
+
+#: Layouts of hexagons stored in rows (see ``HexLocation.get_row_shift``)
+HEX_AXIAL = 'axial'
+HEX_ODD_R = 'odd-r'
+HEX_EVEN_R = 'even-r'
+
+_HexLocation = namedtuple('_HexLocation', ('q', 'r'))
+
+
+class HexLocation(_HexLocation, Location):
+    """
+    Axial coordinates of a hexagon with pointy tops.
+
+    ``r`` is the row and ``q`` grows to the right along it, so that
+    the six neighbours are always at the same offsets
+    (see ``HEX_DIRECTIONS`` in ``topology``).
+    """
+
+    __slots__ = ()
+
+    @staticmethod
+    def get_row_shift(layout: str, r: int) -> int:
+        """
+        Return how much ``q`` must be shifted to get the column
+        of row ``r`` in ``layout``.
+
+        ``HEX_AXIAL`` stores ``q`` as is (a rhombus-shaped map),
+        ``HEX_ODD_R`` and ``HEX_EVEN_R`` shift odd or even rows by half
+        a hexagon to the right (a rectangle-shaped map).
+        """
+        if layout == HEX_ODD_R:
+            return r >> 1
+        if layout == HEX_EVEN_R:
+            return (r + 1) >> 1
+        if layout == HEX_AXIAL:
+            return 0
+        raise ValueError(layout)
+
+    @classmethod
+    def from_offset(cls, row: int, col: int, layout: str=HEX_ODD_R
+                    ) -> 'HexLocation':
+        return cls(col - cls.get_row_shift(layout, row), row)
+
+    def to_offset(self, layout: str=HEX_ODD_R) -> Tuple[int, int]:
+        """Return ``(row, col)`` of the hexagon in ``layout``"""
+        return self.r, self.q + self.get_row_shift(layout, self.r)
+
+    def distance(self, other: 'HexLocation') -> int:
+        """Number of steps to ``other``"""
+        dq = self.q - other.q
+        dr = self.r - other.r
+        return (abs(dq) + abs(dr) + abs(dq + dr)) // 2
@@ -1,6 +1,9 @@
-from typing import Optional
+from collections import OrderedDict
+from typing import FrozenSet, Hashable, Optional, Sequence, Tuple  # noqa
 
-from .location import Location
+import numpy as np
+
+from .location import Location, Location2D
 from .tile import Tile, KeyTile
 
 
@@ -8,18 +11,114 @@ SQRT_2 = 2.0**0.5
 SQRT_3 = 3.0**0.5
 
 
+Direction = Tuple[int, int]
+
+
+class CompiledMovement:
+    """
+    Costs of a movement strategy tabulated over a tile palette.
+
+    ``costs[i, j, d]`` is the cost of moving by ``directions[d]`` from
+    tile ``palette[i]`` to tile ``palette[j]`` (``inf`` if impossible).
+    ``lists`` holds the same table as nested lists, which are faster
+    than the array for lookups one edge at a time.
+    """
+
+    __slots__ = 'palette', 'palette_size', 'directions', 'costs', 'lists'
+
+    def __init__(self, palette: Sequence[Tile],
+                 directions: Sequence[Direction], costs: np.ndarray):
+        self.palette = palette
+        self.palette_size = len(palette)
+        self.directions = directions
+        self.costs = costs
+        self.lists = costs.tolist()
+
+
 class MovementStrategy:
+    #: Whether costs depend only on the two tiles and the step between
+    #: their locations, so that ``compile`` can tabulate them
+    compilable = False
+
+    #: Number of compiled tables kept by each strategy
+    max_compiled = 8
+
     def get_passability(self, from_tile: Tile, to_tile: Tile,
                         from_loc: Location, to_loc: Location) -> Optional[int]:
         raise NotImplemented
 
+    def compile(self, palette: Sequence[Tile],
+                directions: Sequence[Direction]
+                ) -> Optional[CompiledMovement]:
+        """
+        Tabulate the costs of moving between tiles of ``palette`` by
+        ``directions``, or return ``None`` if the strategy is not
+        ``compilable``.
+
+        Tables are cached on the strategy, which must not change
+        afterwards. ``palette`` may grow (e.g. the palette of
+        ``NumpyRectangularTopology``): a longer palette is recompiled.
+        """
+        if not self.compilable:
+            return None
+        cache = getattr(self, '_compiled', None)
+        if cache is None:
+            cache = self._compiled = OrderedDict()
+        key = (id(palette), directions)
+        compiled = cache.get(key)
+        if (
+                compiled is None or compiled.palette is not palette or
+                compiled.palette_size != len(palette)
+        ):
+            compiled = CompiledMovement(
+                palette, directions, self.compile_costs(palette, directions)
+            )
+            cache[key] = compiled
+            while len(cache) > self.max_compiled:
+                cache.popitem(last=False)
+        return compiled
+
+    def compile_costs(self, palette: Sequence[Tile],
+                      directions: Sequence[Direction]) -> np.ndarray:
+        """
+        Return the ``costs`` table of ``CompiledMovement``.
+
+        By default ``get_passability`` is called for every pair of tiles
+        and direction; subclasses may compute the table faster.
+        """
+        costs = np.full(
+            (len(palette), len(palette), len(directions)), np.inf
+        )
+        from_loc = Location2D(0, 0)
+        for d, direction in enumerate(directions):
+            to_loc = Location2D(*direction)
+            for i, from_tile in enumerate(palette):
+                for j, to_tile in enumerate(palette):
+                    cost = self.get_passability(
+                        from_tile, to_tile, from_loc, to_loc
+                    )
+                    if cost is not None:
+                        costs[i, j, d] = cost
+        return costs
+
+    @property
+    def fingerprint(self) -> Hashable:
+        """
+        Hashable value that is equal for strategies with the same behavior.
+
+        By default a strategy is only equivalent to itself.
+        """
+        return self
+
 
 class SimpleRectangularMovement(MovementStrategy):
     """
     Simple movement that supports only ``KeyTile``
     """
 
-    __slots__ = 'diff_map', 'weight_map'
+    __slots__ = 'diff_map', 'weight_map', '_compiled'
+
+    compilable = True
 
     diff_map_diag = (None, 1, SQRT_2, SQRT_3)
     diff_map_no_diag = (None, 1, None, None)
@@ -32,6 +131,48 @@ class SimpleRectangularMovement(MovementStrategy):
 
         self.weight_map = weight_map
 
+    @property
+    def fingerprint(self) -> Hashable:
+        return (
+            self.__class__, self.diff_map,
+            frozenset((self.weight_map or {}).items())
+        )
+
+    def get_uniform_weight(self) -> Optional[Tuple[FrozenSet, float]]:
+        """
+        Check whether movement costs do not depend on tiles.
+
+        Return ``(keys, weight)`` if moving between any two tiles with keys
+        from ``keys`` costs ``weight`` and no other moves are possible,
+        ``None`` otherwise.
+        """
+        weights = {
+            pair: weight for pair, weight in (self.weight_map or {}).items()
+            if weight is not None
+        }
+        keys = frozenset(key for pair in weights for key in pair)
+        if len(set(weights.values())) != 1 or len(weights) != len(keys)**2:
+            return None
+        return keys, next(iter(weights.values()))
+
+    def compile_costs(self, palette: Sequence[KeyTile],
+                      directions: Sequence[Direction]) -> np.ndarray:
+        tile_ids = {tile.key: i for i, tile in enumerate(palette)}
+        weights = np.full((len(palette),) * 2, np.inf)
+        for (from_key, to_key), weight in (self.weight_map or {}).items():
+            if (
+                    weight is not None and from_key in tile_ids and
+                    to_key in tile_ids
+            ):
+                weights[tile_ids[from_key], tile_ids[to_key]] = weight
+
+        costs = np.full(weights.shape + (len(directions),), np.inf)
+        for d, direction in enumerate(directions):
+            step = self.diff_map[sum(int(delta != 0) for delta in direction)]
+            if step is not None:
+                costs[:, :, d] = weights * step
+        return costs
+
     def get_passability(self, from_tile: KeyTile, to_tile: KeyTile,
                         from_loc: Location, to_loc: Location) -> Optional[int]:
         diff = 0
@@ -43,3 +184,41 @@ class SimpleRectangularMovement(MovementStrategy):
             tile_weight = self.weight_map.get((from_tile.key, to_tile.key))
             if tile_weight is not None:
                 return passability * tile_weight
+
+
+class SimpleHexMovement(MovementStrategy):
+    """
+    Movement between neighbouring hexagons with ``KeyTile``s.
+
+    Every step costs ``weight_map[(from_key, to_key)]``; pairs missing
+    from it (or mapped to ``None``) are impassable.
+    """
+
+    __slots__ = 'weight_map', '_compiled'
+
+    compilable = True
+
+    def __init__(self, weight_map=None):
+        self.weight_map = weight_map
+
+    @property
+    def fingerprint(self) -> Hashable:
+        return self.__class__, frozenset((self.weight_map or {}).items())
+
+    def compile_costs(self, palette: Sequence[KeyTile],
+                      directions: Sequence[Direction]) -> np.ndarray:
+        tile_ids = {tile.key: i for i, tile in enumerate(palette)}
+        costs = np.full(
+            (len(palette), len(palette), len(directions)), np.inf
+        )
+        for (from_key, to_key), weight in (self.weight_map or {}).items():
+            if (
+                    weight is not None and from_key in tile_ids and
+                    to_key in tile_ids
+            ):
+                costs[tile_ids[from_key], tile_ids[to_key]] = weight
+        return costs
+
+    def get_passability(self, from_tile: KeyTile, to_tile: KeyTile,
+                        from_loc: Location, to_loc: Location) -> Optional[int]:
+        return self.weight_map.get((from_tile.key, to_tile.key))
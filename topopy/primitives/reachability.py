@@ -0,0 +1,313 @@
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple  # noqa
+
+import numpy as np
+
+from .graph import CSRGraph, TopologyCache
+from .location import Location
+
+
+def _is_symmetric(graph: CSRGraph) -> bool:
+    """Check whether every edge ``u -> v`` has a ``v -> u`` counterpart"""
+    node_count = len(graph)
+    sources = np.repeat(
+        np.arange(node_count, dtype=np.int64), np.diff(graph.indptr)
+    )
+    targets = graph.indices.astype(np.int64)
+    return np.array_equal(
+        np.unique(sources * node_count + targets),
+        np.unique(targets * node_count + sources)
+    )
+
+
+def _label_weak_components(graph: CSRGraph, symmetric: bool) -> np.ndarray:
+    """Label the components of ``graph`` with edge directions ignored"""
+    adjacency = [(graph.indptr.tolist(), graph.indices.tolist())]
+    if not symmetric:
+        reverse = graph.reversed()
+        adjacency.append((reverse.indptr.tolist(), reverse.indices.tolist()))
+    labels = [-1] * len(graph)
+    for root in range(len(graph)):
+        if labels[root] >= 0:
+            continue
+        labels[root] = root
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            for indptr, indices in adjacency:
+                for neighbor in indices[indptr[node]:indptr[node + 1]]:
+                    if labels[neighbor] < 0:
+                        labels[neighbor] = root
+                        stack.append(neighbor)
+    return np.array(labels, dtype=np.int64)
+
+
+def _label_strong_components(graph: CSRGraph) -> np.ndarray:
+    """
+    Label strongly connected components with Tarjan's algorithm.
+
+    Components are numbered in the order they are completed, which is
+    a reverse topological order: an edge between two components always
+    goes to the one with the smaller number.
+    """
+    indptr = graph.indptr.tolist()
+    indices = graph.indices.tolist()
+    node_count = len(graph)
+    order = [-1] * node_count
+    low = [0] * node_count
+    labels = [-1] * node_count
+    stack = []  # type: List[int]
+    next_order = 0
+    next_label = 0
+    for root in range(node_count):
+        if order[root] >= 0:
+            continue
+        order[root] = low[root] = next_order
+        next_order += 1
+        stack.append(root)
+        # (node, position of the next edge to follow)
+        calls = [(root, indptr[root])]
+        while calls:
+            node, position = calls[-1]
+            end = indptr[node + 1]
+            while position < end:
+                neighbor = indices[position]
+                position += 1
+                if order[neighbor] < 0:
+                    calls[-1] = (node, position)
+                    order[neighbor] = low[neighbor] = next_order
+                    next_order += 1
+                    stack.append(neighbor)
+                    calls.append((neighbor, indptr[neighbor]))
+                    break
+                if labels[neighbor] < 0 and order[neighbor] < low[node]:
+                    low[node] = order[neighbor]
+            else:
+                calls.pop()
+                if calls:
+                    parent = calls[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == order[node]:
+                    while True:
+                        member = stack.pop()
+                        labels[member] = next_label
+                        if member == node:
+                            break
+                    next_label += 1
+    return np.array(labels, dtype=np.int64)
+
+
+class ReachabilityIndex:
+    """
+    Connected components of a graph for O(1) reachability checks.
+
+    ``weak`` labels the components with edge directions ignored:
+    nodes with different labels can never reach each other. For
+    directed graphs ``strong`` also labels strongly connected components
+    in reverse topological order, so a node can only reach nodes with
+    the same or a smaller label (``None`` for symmetric graphs).
+
+    The index keeps a compact copy of the graph and is updated
+    in place when tiles change. Added edges merge components; removed
+    ones are checked with searches of at most ``max_search_size`` nodes
+    around them, and only components that these searches cannot tell
+    apart are searched in full. In directed graphs, changes that may
+    create or break a cycle require a rebuild.
+    """
+
+    __slots__ = 'graph', 'weak', 'strong', '_next_label'
+
+    #: Nodes a search may visit to check that a removed edge
+    #: did not split a component
+    max_search_size = 4096
+
+    def __init__(self, graph: CSRGraph, weak: np.ndarray,
+                 strong: np.ndarray=None):
+        self.graph = graph
+        self.weak = weak
+        self.strong = strong
+        self._next_label = int(weak.max(initial=-1)) + 1
+
+    @property
+    def symmetric(self) -> bool:
+        return self.strong is None
+
+    @property
+    def component_count(self) -> int:
+        """Number of (weakly) connected components"""
+        return len(np.unique(self.weak))
+
+    @classmethod
+    def build(cls, graph: CSRGraph) -> 'ReachabilityIndex':
+        symmetric = _is_symmetric(graph)
+        weak = _label_weak_components(graph, symmetric)
+        strong = None if symmetric else _label_strong_components(graph)
+        return cls(graph, weak, strong)
+
+    def is_reachable(self, src: Location, dst: Location) -> Optional[bool]:
+        """
+        Return ``False`` if ``dst`` certainly cannot be reached from
+        ``src``, ``True`` if it certainly can and ``None`` if only
+        a search can tell (directed graphs, or unknown locations).
+        """
+        get_id = self.graph.index.get_id
+        try:
+            source, target = get_id(src), get_id(dst)
+        except KeyError:
+            return None
+        if self.weak[source] != self.weak[target]:
+            return False
+        if self.strong is None:
+            return True
+        source_label, target_label = self.strong[source], self.strong[target]
+        if source_label == target_label:
+            return True
+        if source_label < target_label:
+            return False
+        return None
+
+    def update(self, topology, movement_strategy,
+               changed: Set[Location]) -> bool:
+        """
+        Update the index after the tiles at ``changed`` have changed.
+
+        Return ``False`` if it has to be rebuilt instead.
+        """
+        graph = self.graph
+        get_id = graph.index.get_id
+        try:
+            rows = {
+                get_id(loc): [
+                    (get_id(to_loc), cost)
+                    for to_loc, cost in topology.iter_neighbors(
+                        loc, movement_strategy
+                    )
+                ]
+                for loc in topology.get_affected_locations(changed)
+            }
+        except KeyError:
+            return False
+
+        added = []  # type: List[Tuple[int, int]]
+        removed = []  # type: List[Tuple[int, int]]
+        new_targets = {}  # type: Dict[int, Set[int]]
+        for node, edges in rows.items():
+            start, end = graph.indptr[node:node + 2].tolist()
+            old = set(graph.indices[start:end].tolist())
+            new = new_targets[node] = {to_id for to_id, _ in edges}
+            added.extend((node, to_id) for to_id in new - old)
+            removed.extend((node, to_id) for to_id in old - new)
+
+        strong = self.strong
+        if strong is None:
+            # Rows of unchanged nodes stay the same, so both directions
+            # of a changed edge must be among the new rows
+            if not all(
+                    u in new_targets.get(v, ()) for u, v in added
+            ) or any(
+                    v not in new_targets or u in new_targets[v]
+                    for u, v in removed
+            ):
+                return False
+        else:
+            # Edges that go down the topological order keep the strong
+            # components valid; others may create or break a cycle
+            if any(strong[u] < strong[v] for u, v in added) or any(
+                    strong[u] == strong[v] for u, v in removed):
+                return False
+
+        graph.replace_rows(rows)
+        weak = self.weak
+        for u, v in added:
+            if weak[u] != weak[v]:
+                weak[weak == weak[v]] = weak[u]
+        if strong is None and removed:
+            self._split({node for edge in removed for node in edge})
+        # Weak labels of directed graphs are not split: merged labels
+        # only make ``is_reachable`` less decisive, never wrong
+        return True
+
+    def _search(self, root: int, targets: Set[int], limit: int=None
+                ) -> Tuple[Set[int], bool]:
+        """
+        Breadth-first search from ``root``, discarding reached nodes from
+        ``targets``. With a ``limit``, stop once all targets are reached
+        or ``limit`` nodes are seen. Return the seen nodes and whether
+        they are the whole component.
+        """
+        iter_id_neighbors = self.graph.iter_id_neighbors
+        seen = {root}
+        queue = deque((root,))
+        while queue and (
+                limit is None or (targets and len(seen) < limit)):
+            node = queue.popleft()
+            for neighbor, _ in iter_id_neighbors(node):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+                    targets.discard(neighbor)
+        return seen, not queue
+
+    def _relabel(self, nodes: Set[int]):
+        self.weak[list(nodes)] = self._next_label
+        self._next_label += 1
+
+    def _split(self, endpoints: Set[int]):
+        """
+        Relabel the components that removed edges have split.
+
+        Every new component contains an endpoint of a removed edge.
+        Endpoints are searched from until their whole component is
+        found, which gets a new label, or until they reach all other
+        endpoints with the same label, usually around the changed tiles.
+        Only if several searches of a label stop early are their whole
+        components searched for.
+        """
+        weak = self.weak
+        labels = {}  # type: Dict[int, Set[int]]
+        for node in endpoints:
+            labels.setdefault(int(weak[node]), set()).add(node)
+
+        for label, nodes in labels.items():
+            # Roots of searches that stopped before finding
+            # their whole component
+            open_roots = []
+            while nodes:
+                root = nodes.pop()
+                seen, complete = self._search(
+                    root, nodes, self.max_search_size
+                )
+                if complete:
+                    self._relabel(seen)
+                else:
+                    open_roots.append(root)
+            # All but one of the remaining components get new labels
+            for root in open_roots[1:]:
+                if weak[root] == label:
+                    self._relabel(self._search(root, set())[0])
+
+
+class ReachabilityCache(TopologyCache):
+    """
+    Cache of reachability indexes.
+
+    Indexes are updated in place when a few tiles change.
+    Changes of more than ``max_patch_size`` locations cause a rebuild.
+    """
+
+    max_patch_size = 4096
+
+    def build(self, topology, movement_strategy) -> ReachabilityIndex:
+        return ReachabilityIndex.build(
+            topology.to_graph(movement_strategy, compact=True)
+        )
+
+    def update(self, index: ReachabilityIndex, topology, movement_strategy,
+               changed: Set[Location]) -> bool:
+        if len(changed) > self.max_patch_size:
+            return False
+        return index.update(topology, movement_strategy, changed)
+
+    def is_reachable(self, topology, movement_strategy,
+                     src: Location, dst: Location) -> Optional[bool]:
+        return self.get(topology, movement_strategy).is_reachable(src, dst)
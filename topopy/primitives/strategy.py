@@ -1,9 +1,29 @@
-from typing import List, Tuple
+from collections import OrderedDict
+from typing import (  # noqa
+    Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple,
+    Type
+)
+
+import numpy as np
 
 from topopy.primitives import exc
-from .movement import MovementStrategy
-from .topology import Topology, Graphable, Location
-from .utils import dijkstra
+from .heuristic import GridHeuristic, Heuristic, default_heuristic
+from .hierarchy import ClusterAbstraction, ClusterCache
+from .landmarks import FARTHEST, LandmarkCache, LandmarkTable
+from .contraction import ContractionCache, ContractionHierarchy
+from .distance_map import DistanceMap, DistanceMapCache
+from .movement import (
+    MovementStrategy, SimpleHexMovement, SimpleRectangularMovement
+)
+from .graph import Graph, GraphCache, get_neighbor_function, reverse_graph
+from .reachability import ReachabilityCache
+from .tile import KeyTile
+from .topology import (
+    Topology, Graphable, GraphableTopology, Location, NumpyRectangularTopology,
+    RectangularTopology, Traversable
+)
+from .utils import astar, bidirectional, dijkstra, jps
+from .utils.dstar_lite import DStarLite
 
 
 class Strategy:
@@ -25,21 +45,681 @@ class DistanceStrategy(Strategy):
     """Abstract base class for distance resolution strategies"""
 
     def get_path(
-            self, topology: Topology, actor: MovementStrategy,
-            src: Location, dst: Location
-    ) -> Tuple[int, List[Location]]:
+            self, topology: Topology, movement_strategy: MovementStrategy,
+            src: Location, dst: Location, graph: Graph=None
+    ) -> Tuple[Optional[float], Optional[List[Location]]]:
+        """
+        Find the shortest path from ``src`` to ``dst``.
+
+        ``graph`` is an optional prebuilt graph of the topology for
+        the movement strategy (dict of dicts or ``CSRGraph``).
+
+        Return ``(None, None)`` if ``dst`` cannot be reached.
+        """
         raise NotImplementedError
 
 
-class DijkstraDistanceStrategy(DistanceStrategy):
+#: Movement strategies that ``default_heuristic`` supports
+SIMPLE_MOVEMENTS = (SimpleRectangularMovement, SimpleHexMovement)
+
+NeighborFunction = Callable[[Location], Iterable[Tuple[Location, float]]]
+
+
+class GraphDistanceStrategy(DistanceStrategy):
+    """
+    Base class for strategies that search the weighted graph of a topology.
+
+    A graph passed to ``get_path`` is always searched as is.
+    Otherwise, if a ``graph_cache`` is given, the graph is taken from it
+    and rebuilt only when the topology changes.
+    Otherwise, if ``implicit`` is set (default) and the topology is
+    ``Traversable``, neighbours are generated on demand and the full graph
+    is never built. If not, ``to_graph`` is called for each query.
+    ``compact`` is passed to ``to_graph`` in both cases.
+    """
+
+    requires_interfaces = (
+        Graphable,
+    )
+
+    def __init__(self, implicit: bool=True, compact: bool=False,
+                 graph_cache: GraphCache=None):
+        self.implicit = implicit
+        self.compact = compact
+        self.graph_cache = graph_cache
+
+    def get_neighbor_function(
+            self, topology: Graphable, movement_strategy: MovementStrategy,
+            graph: Graph=None
+    ) -> NeighborFunction:
+        if graph is None and self.graph_cache is not None:
+            graph = self.graph_cache.get_graph(
+                topology, movement_strategy, compact=self.compact
+            )
+
+        if graph is None:
+            if self.implicit and isinstance(topology, Traversable):
+                iter_neighbors = topology.iter_neighbors
+                return lambda loc: iter_neighbors(loc, movement_strategy)
+
+            graph = topology.to_graph(movement_strategy, compact=self.compact)
+
+        return get_neighbor_function(graph)
+
+    def get_predecessor_function(
+            self, topology: Graphable, movement_strategy: MovementStrategy,
+            graph: Graph=None
+    ) -> NeighborFunction:
+        """
+        Same as ``get_neighbor_function``, but for incoming edges.
+
+        A ``graph`` passed explicitly is reversed on every call.
+        """
+        if graph is not None:
+            return get_neighbor_function(reverse_graph(graph))
+
+        if self.graph_cache is not None:
+            graph = self.graph_cache.get_graph(
+                topology, movement_strategy, compact=self.compact,
+                reverse=True
+            )
+        elif self.implicit and isinstance(topology, Traversable):
+            iter_predecessors = topology.iter_predecessors
+            return lambda loc: iter_predecessors(loc, movement_strategy)
+        else:
+            graph = reverse_graph(
+                topology.to_graph(movement_strategy, compact=self.compact)
+            )
+        return get_neighbor_function(graph)
+
+
+class DijkstraDistanceStrategy(GraphDistanceStrategy):
+    def get_path(
+            self, topology: Graphable, movement_strategy: MovementStrategy,
+            src: Location, dst: Location, graph: Graph=None
+    ) -> Tuple[Optional[float], Optional[List[Location]]]:
+        dist, path = dijkstra.find_path(
+            self.get_neighbor_function(topology, movement_strategy, graph),
+            src, dst
+        )
+        return dist, path
+
+
+class AStarDistanceStrategy(GraphDistanceStrategy):
+    """
+    A* search guided by a grid heuristic.
+
+    The heuristic is created for each query with
+    ``heuristic_class.from_movement(movement_strategy)``, so it is
+    admissible for the given movement. If no class is given,
+    the tightest one for the movement is used (see
+    ``default_heuristic``).
+    """
+
+    weight = 1
+
+    def __init__(self, heuristic_class: Type[GridHeuristic]=None, **kwargs):
+        super().__init__(**kwargs)
+        self.heuristic_class = heuristic_class
+
+    def get_heuristic(self, movement_strategy: MovementStrategy
+                      ) -> Heuristic:
+        if self.heuristic_class is None:
+            return default_heuristic(movement_strategy)
+        return self.heuristic_class.from_movement(movement_strategy)
+
+    def get_path(
+            self, topology: Graphable,
+            movement_strategy: SimpleRectangularMovement,
+            src: Location, dst: Location, graph: Graph=None
+    ) -> Tuple[Optional[float], Optional[List[Location]]]:
+        heuristic = self.get_heuristic(movement_strategy)
+        dist, path = astar.find_path(
+            self.get_neighbor_function(topology, movement_strategy, graph),
+            src, dst,
+            heuristic=lambda loc: heuristic(loc, dst),
+            weight=self.weight
+        )
+        return dist, path
+
+
+class BidirectionalDijkstraDistanceStrategy(GraphDistanceStrategy):
+    """
+    Dijkstra searching from both ends at once.
+
+    Each search covers about half the distance, so on open maps
+    about half as many nodes are expanded as with one search.
+    """
+
+    def get_path(
+            self, topology: Graphable, movement_strategy: MovementStrategy,
+            src: Location, dst: Location, graph: Graph=None
+    ) -> Tuple[Optional[float], Optional[List[Location]]]:
+        return bidirectional.find_path(
+            self.get_neighbor_function(topology, movement_strategy, graph),
+            self.get_predecessor_function(
+                topology, movement_strategy, graph
+            ),
+            src, dst
+        )
+
+
+class BidirectionalAStarDistanceStrategy(AStarDistanceStrategy):
+    """
+    A* searching from both ends at once.
+
+    Both searches use the average potential
+    ``(h(loc, dst) - h(src, loc)) / 2``, which keeps the result exact.
+    """
+
+    def get_path(
+            self, topology: Graphable,
+            movement_strategy: SimpleRectangularMovement,
+            src: Location, dst: Location, graph: Graph=None
+    ) -> Tuple[Optional[float], Optional[List[Location]]]:
+        heuristic = self.get_heuristic(movement_strategy)
+        return bidirectional.find_path(
+            self.get_neighbor_function(topology, movement_strategy, graph),
+            self.get_predecessor_function(
+                topology, movement_strategy, graph
+            ),
+            src, dst,
+            potential=lambda loc: (
+                heuristic(loc, dst) - heuristic(src, loc)
+            ) / 2
+        )
+
+
+class WeightedAStarDistanceStrategy(AStarDistanceStrategy):
+    """
+    Bounded-suboptimal A*.
+
+    The heuristic is inflated by ``weight``, so fewer nodes are expanded
+    and the path is at most ``weight`` times longer than the shortest one.
+    """
+
+    def __init__(self, weight: float=1.5, **kwargs):
+        if weight < 1:
+            raise ValueError('Weight must be at least 1')
+        super().__init__(**kwargs)
+        self.weight = weight
+
+
+class ALTDistanceStrategy(GraphDistanceStrategy):
+    """
+    A* guided by landmark lower bounds (ALT).
+
+    A ``LandmarkTable`` of ``landmark_count`` landmarks is built once per
+    topology version, which takes ``2 * landmark_count`` full searches,
+    and kept in ``landmark_cache``. Queries stay exact and expand fewer
+    nodes than with grid heuristics alone (which are still used when the
+    movement allows), especially on maps with walls and dead ends.
+    Use ``save_landmarks`` and ``load_landmarks`` to keep the tables
+    across restarts for maps that rarely change.
+    """
+
+    def __init__(self, landmark_count: int=8, selection: str=FARTHEST,
+                 landmark_cache: LandmarkCache=None, **kwargs):
+        super().__init__(**kwargs)
+        self.landmark_count = landmark_count
+        self.selection = selection
+        self.landmark_cache = landmark_cache or LandmarkCache()
+
+    def get_landmarks(self, topology: Graphable,
+                      movement_strategy: MovementStrategy) -> LandmarkTable:
+        return self.landmark_cache.get(
+            topology, movement_strategy, self.landmark_count, self.selection
+        )
+
+    def save_landmarks(self, topology: Graphable,
+                       movement_strategy: MovementStrategy, path: str):
+        """Save the landmark table of ``topology`` into directory ``path``"""
+        self.get_landmarks(topology, movement_strategy).save(path)
+
+    def load_landmarks(self, topology: Graphable,
+                       movement_strategy: MovementStrategy, path: str,
+                       mmap: bool=True) -> LandmarkTable:
+        """
+        Use the landmark table saved in ``path`` for the current version
+        of ``topology``. The table must have been built for the same
+        tiles and movement strategy.
+        """
+        table = LandmarkTable.load(path, mmap=mmap)
+        if len(table.index) != len(topology.get_location_index()):
+            raise ValueError('Landmark table does not match the topology')
+        self.landmark_cache.put(
+            table, topology, movement_strategy,
+            self.landmark_count, self.selection
+        )
+        return table
+
+    def get_path(
+            self, topology: Graphable, movement_strategy: MovementStrategy,
+            src: Location, dst: Location, graph: Graph=None
+    ) -> Tuple[Optional[float], Optional[List[Location]]]:
+        heuristic = self.get_landmarks(
+            topology, movement_strategy
+        ).get_heuristic(dst)
+        if isinstance(movement_strategy, SIMPLE_MOVEMENTS):
+            # Landmark bounds are weak near the destination,
+            # where the grid heuristic is tight
+            landmark_heuristic = heuristic
+            grid_heuristic = default_heuristic(movement_strategy)
+
+            def heuristic(loc):
+                return max(landmark_heuristic(loc), grid_heuristic(loc, dst))
+        return astar.find_path(
+            self.get_neighbor_function(topology, movement_strategy, graph),
+            src, dst, heuristic=heuristic
+        )
+
+
+class DStarLitePlanner:
+    """
+    Incremental path planner for a single goal.
+
+    The planner keeps its search tree between calls. Call ``move_to``
+    when the actor moves and ``set_blocked`` when cells get occupied
+    (e.g. from ``World.actors_by_loc``); tile changes are picked up
+    from the topology changelog. Each ``get_path`` repairs only
+    the part of the tree affected by the changes.
+    """
+
+    def __init__(self, topology: GraphableTopology,
+                 movement_strategy: MovementStrategy,
+                 start: Location, goal: Location, heuristic: Heuristic):
+        self.topology = topology
+        self.movement_strategy = movement_strategy
+        self.goal = goal
+        self.heuristic = heuristic
+        self.blocked = frozenset()
+        self._version = topology.version
+        self._search = self._create_search(start)
+
+    def _create_search(self, start: Location) -> DStarLite:
+        return DStarLite(
+            self._get_neighbors, self._get_predecessors, start, self.goal,
+            self.heuristic
+        )
+
+    def _get_neighbors(self, loc: Location):
+        blocked = self.blocked
+        for to_loc, cost in self.topology.iter_neighbors(
+                loc, self.movement_strategy):
+            if to_loc not in blocked:
+                yield to_loc, cost
+
+    def _get_predecessors(self, loc: Location):
+        if loc in self.blocked:
+            return ()
+        return self.topology.iter_predecessors(loc, self.movement_strategy)
+
+    @property
+    def start(self) -> Location:
+        return self._search.start
+
+    @property
+    def expanded(self) -> int:
+        """Number of nodes expanded since the planner was created"""
+        return self._search.expanded
+
+    def move_to(self, loc: Location):
+        self._search.move_to(loc)
+
+    def set_blocked(self, locs: Iterable[Location]):
+        """Make the given cells impassable (replaces the previous set)"""
+        blocked = frozenset(locs)
+        changed = blocked.symmetric_difference(self.blocked)
+        self.blocked = blocked
+        if changed:
+            self._search.update_nodes(
+                self.topology.get_affected_locations(changed)
+            )
+
+    def _sync(self):
+        version = self.topology.version
+        if version == self._version:
+            return
+        changed = self.topology.changed_since(self._version)
+        if changed is None:
+            self._search = self._create_search(self._search.start)
+        else:
+            self._search.update_nodes(
+                self.topology.get_affected_locations(changed)
+            )
+        self._version = version
+
+    def get_path(self) -> Tuple[Optional[float], Optional[List[Location]]]:
+        self._sync()
+        return self._search.get_path()
+
+
+class DStarLiteDistanceStrategy(DistanceStrategy):
+    """
+    Stateful strategy for replanning on changing maps (D* Lite).
+
+    A planner is kept for each ``(actor, goal)`` pair (the ``actor`` key
+    is optional), and queries are answered by repairing its previous
+    search instead of searching from scratch. At most ``max_planners``
+    planners are kept, least recently used ones are dropped.
+    """
+
+    requires_interfaces = (
+        GraphableTopology,
+    )
+
+    def __init__(self, heuristic_class: Type[GridHeuristic]=None,
+                 max_planners: int=1024):
+        self.heuristic_class = heuristic_class
+        self.max_planners = max_planners
+        self._planners = OrderedDict()  # type: Dict[Hashable, Any]
+
+    def get_heuristic(self, movement_strategy: MovementStrategy
+                      ) -> Heuristic:
+        if self.heuristic_class is not None:
+            return self.heuristic_class.from_movement(movement_strategy)
+        return default_heuristic(movement_strategy)
+
+    def get_planner(
+            self, topology: GraphableTopology,
+            movement_strategy: MovementStrategy,
+            src: Location, dst: Location, actor: Hashable=None
+    ) -> DStarLitePlanner:
+        """Return the planner of ``actor`` for ``dst``, moved to ``src``"""
+        key = (actor, id(topology), movement_strategy.fingerprint, dst)
+        planner = self._planners.get(key)
+        if planner is None or planner.topology is not topology:
+            planner = DStarLitePlanner(
+                topology, movement_strategy, src, dst,
+                self.get_heuristic(movement_strategy)
+            )
+            self._planners[key] = planner
+            while len(self._planners) > self.max_planners:
+                self._planners.popitem(last=False)
+        else:
+            planner.move_to(src)
+        self._planners.move_to_end(key)
+        return planner
+
+    def forget(self, actor: Hashable=None):
+        """Drop all planners of ``actor``"""
+        for key in [key for key in self._planners if key[0] == actor]:
+            del self._planners[key]
+
+    def get_path(
+            self, topology: GraphableTopology,
+            movement_strategy: MovementStrategy,
+            src: Location, dst: Location, graph: Graph=None
+    ) -> Tuple[Optional[float], Optional[List[Location]]]:
+        """``graph`` is ignored: planners always search the topology"""
+        return self.get_planner(
+            topology, movement_strategy, src, dst
+        ).get_path()
+
+
+class JumpPointSearchStrategy(DistanceStrategy):
+    """
+    Jump Point Search for uniform-cost 8-connected rectangular grids.
+
+    Applies when the movement allows diagonal steps and
+    ``SimpleRectangularMovement.get_uniform_weight`` finds a single
+    cost for all moves. Symmetric paths are pruned, so far fewer nodes
+    are expanded than with A* while the distance stays optimal.
+    Other queries are passed to ``fallback`` (A* by default).
+    """
+
     requires_interfaces = (
         Graphable,
     )
 
+    def __init__(self, fallback: DistanceStrategy=None):
+        self.fallback = fallback or AStarDistanceStrategy()
+        # (topology, version, keys, walkable rows) of the last array grid
+        self._grid_cache = None  # type: Tuple
+
+    def _get_walkable(
+            self, topology: RectangularTopology, keys: FrozenSet
+    ) -> Callable[[int, int], bool]:
+        x_limit, y_limit = topology.shape
+        if isinstance(topology, NumpyRectangularTopology):
+            cached = self._grid_cache
+            if (
+                    cached is not None and cached[0] is topology and
+                    cached[1] == topology.version and cached[2] == keys
+            ):
+                rows = cached[3]
+            else:
+                find = topology.palette.find
+                tile_ids = [
+                    tile_id for tile_id in (
+                        find(KeyTile.from_key(key)) for key in keys
+                    ) if tile_id is not None
+                ]
+                rows = np.isin(topology.keys, tile_ids).tolist()
+                self._grid_cache = (topology, topology.version, keys, rows)
+
+            def walkable(x, y):
+                return 0 <= x < x_limit and 0 <= y < y_limit and rows[x][y]
+        else:
+            matrix = topology.matrix
+
+            def walkable(x, y):
+                return (
+                    0 <= x < x_limit and 0 <= y < y_limit and
+                    matrix[x][y].key in keys
+                )
+
+        return walkable
+
     def get_path(
             self, topology: Graphable, movement_strategy: MovementStrategy,
-            src: Location, dst: Location
-    ) -> Tuple[int, List[Location]]:
-        graph = topology.to_graph(movement_strategy)
-        dist, path = dijkstra.get_shortest_path(graph, src, dst)
+            src: Location, dst: Location, graph: Graph=None
+    ) -> Tuple[Optional[float], Optional[List[Location]]]:
+        uniform = None
+        if (
+                isinstance(topology, RectangularTopology) and
+                isinstance(movement_strategy, SimpleRectangularMovement) and
+                movement_strategy.diff_map[2] is not None
+        ):
+            uniform = movement_strategy.get_uniform_weight()
+        if uniform is None:
+            return self.fallback.get_path(
+                topology, movement_strategy, src, dst, graph=graph
+            )
+
+        keys, weight = uniform
+        dist, path = jps.find_path(
+            self._get_walkable(topology, keys), tuple(src), tuple(dst),
+            straight=movement_strategy.diff_map[1] * weight,
+            diagonal=movement_strategy.diff_map[2] * weight
+        )
+        if path is None:
+            return None, None
+        location_class = topology.location_class
+        return dist, [location_class(x, y) for x, y in path]
+
+
+class DistanceMapStrategy(DistanceStrategy):
+    """
+    Answers queries from cached distance maps of their destinations.
+
+    Building a map costs one full search, but afterwards every query for
+    the same destination takes time proportional to the path length.
+    Suited to many actors heading for a few shared goals.
+    Works with grid topologies (see ``DistanceMap.build``).
+    """
+
+    requires_interfaces = (
+        GraphableTopology,
+    )
+
+    def __init__(self, cache: DistanceMapCache=None):
+        self.cache = cache or DistanceMapCache()
+
+    def get_distance_map(
+            self, topology: GraphableTopology,
+            movement_strategy: MovementStrategy, goals: Iterable[Location]
+    ) -> DistanceMap:
+        return self.cache.get_distance_map(
+            topology, movement_strategy, goals
+        )
+
+    def get_path(
+            self, topology: GraphableTopology,
+            movement_strategy: MovementStrategy,
+            src: Location, dst: Location, graph: Graph=None
+    ) -> Tuple[Optional[float], Optional[List[Location]]]:
+        """``graph`` is ignored: maps are built from the topology"""
+        return self.get_distance_map(
+            topology, movement_strategy, (dst,)
+        ).get_path(src)
+
+
+class HierarchicalDistanceStrategy(DistanceStrategy):
+    """
+    Hierarchical path-finding (HPA*) for large rectangular topologies.
+
+    Queries between clusters that are not neighbours search the cached
+    ``ClusterAbstraction`` and refine the result within clusters.
+    Paths are near-optimal (usually within a few percent), but far fewer
+    nodes are expanded on long queries. Shorter queries and other
+    topologies are passed to ``fallback`` (A* by default), and so are
+    queries that the abstraction finds no path for (it may miss
+    entrances of directed movements) unless ``reachability`` rules
+    a path out.
+    """
+
+    requires_interfaces = (
+        Graphable,
+    )
+
+    def __init__(self, cluster_size: int=16, cache: ClusterCache=None,
+                 fallback: DistanceStrategy=None,
+                 reachability: ReachabilityCache=None):
+        self.cluster_size = cluster_size
+        self.cache = cache or ClusterCache()
+        self.fallback = fallback or AStarDistanceStrategy()
+        self.reachability = reachability or ReachabilityCache()
+
+    def get_abstraction(self, topology: RectangularTopology,
+                        movement_strategy: MovementStrategy
+                        ) -> ClusterAbstraction:
+        return self.cache.get_abstraction(
+            topology, movement_strategy, self.cluster_size
+        )
+
+    def get_path(
+            self, topology: Graphable, movement_strategy: MovementStrategy,
+            src: Location, dst: Location, graph: Graph=None
+    ) -> Tuple[Optional[float], Optional[List[Location]]]:
+        size = self.cluster_size
+        if (
+                not isinstance(topology, RectangularTopology) or (
+                    abs(src.x // size - dst.x // size) <= 1 and
+                    abs(src.y // size - dst.y // size) <= 1
+                )
+        ):
+            return self.fallback.get_path(
+                topology, movement_strategy, src, dst, graph=graph
+            )
+
+        dist, path = self.get_abstraction(
+            topology, movement_strategy
+        ).get_path(src, dst, default_heuristic(movement_strategy))
+        if path is None and self.reachability.is_reachable(
+                topology, movement_strategy, src, dst) is not False:
+            return self.fallback.get_path(
+                topology, movement_strategy, src, dst, graph=graph
+            )
         return dist, path
+
+
+class ContractionHierarchyStrategy(DistanceStrategy):
+    """
+    Exact queries on a ``ContractionHierarchy`` of the topology.
+
+    Queries settle only a few hundred nodes even on large maps, but
+    preprocessing runs in Python and grows faster than the map: about
+    1 s for 32x32 grids, 7 s for 64x64 and a minute for 128x128.
+    Suited to maps of up to a few thousand cells that stay static while
+    many queries run.
+
+    The hierarchy is built by the first query. After the topology
+    changes, queries are answered by ``fallback`` (A* by default)
+    instead of waiting for a new hierarchy, until ``rebuild`` is called.
+    ``get_hierarchy(...).stats`` reports the preprocessing time,
+    the number of shortcuts and the memory taken.
+    """
+
+    requires_interfaces = (
+        Graphable,
+    )
+
+    def __init__(self, cache: ContractionCache=None,
+                 fallback: DistanceStrategy=None):
+        self.cache = cache or ContractionCache()
+        self.fallback = fallback or AStarDistanceStrategy()
+
+    def get_hierarchy(self, topology: Graphable,
+                      movement_strategy: MovementStrategy
+                      ) -> ContractionHierarchy:
+        """Return the hierarchy of the topology, building it if needed"""
+        return self.cache.get(topology, movement_strategy)
+
+    def rebuild(self, topology: Graphable,
+                movement_strategy: MovementStrategy) -> bool:
+        """
+        Rebuild a hierarchy made stale by changes of the topology.
+        Return ``False`` if it was already up to date.
+        """
+        _, current = self.cache.peek(topology, movement_strategy)
+        if current:
+            return False
+        self.get_hierarchy(topology, movement_strategy)
+        return True
+
+    def get_path(
+            self, topology: Graphable, movement_strategy: MovementStrategy,
+            src: Location, dst: Location, graph: Graph=None
+    ) -> Tuple[Optional[float], Optional[List[Location]]]:
+        """``graph`` is only passed to ``fallback``"""
+        hierarchy, current = self.cache.peek(topology, movement_strategy)
+        if hierarchy is None:
+            hierarchy = self.get_hierarchy(topology, movement_strategy)
+        elif not current:
+            return self.fallback.get_path(
+                topology, movement_strategy, src, dst, graph
+            )
+        return hierarchy.find_path(src, dst)
+
+
+class ReachabilityCheckStrategy(DistanceStrategy):
+    """
+    Rejects queries between disconnected locations before searching.
+
+    Components are kept in a ``ReachabilityCache`` and updated
+    incrementally on tile changes, so a query for an unreachable
+    destination returns ``(None, None)`` in constant time instead of
+    exploring the whole area around the source. Other queries are
+    passed to ``strategy`` (A* by default).
+    """
+
+    requires_interfaces = (
+        Graphable,
+    )
+
+    def __init__(self, strategy: DistanceStrategy=None,
+                 cache: ReachabilityCache=None):
+        self.strategy = strategy or AStarDistanceStrategy()
+        self.cache = cache or ReachabilityCache()
+
+    def get_path(
+            self, topology: Graphable, movement_strategy: MovementStrategy,
+            src: Location, dst: Location, graph: Graph=None
+    ) -> Tuple[Optional[float], Optional[List[Location]]]:
+        if self.cache.is_reachable(
+                topology, movement_strategy, src, dst) is False:
+            return None, None
+        return self.strategy.get_path(
+            topology, movement_strategy, src, dst, graph=graph
+        )
@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import Any
+from typing import Any, Dict, Iterable, Iterator, List, Optional  # noqa
 
 
 class Tile:
@@ -18,7 +18,7 @@ class KeyTile(Tile):
     __slots__ = 'key',
 
     @classmethod
-    @lru_cache(None)
+    @lru_cache(2**16)
     def from_key(cls, key: Any):
         return KeyTile(key)
 
@@ -31,8 +31,67 @@ class KeyTile(Tile):
         else:
             return super().__eq__(other)
 
+    def __hash__(self):
+        return hash(self.key)
+
     def __repr__(self):
         return '{0}({1!r})'.format(self.__class__.__name__, self.key)
 
     def __str__(self):
         return str(self.key)
+
+
+class TilePalette:
+    """
+    Tiles interned to small integer ids.
+
+    ``tiles[i]`` is the tile with id ``i`` and ``ids`` maps tiles back
+    to their ids. Ids are given in order and never change, so arrays of
+    ids (see ``TileArrayMixin``) and movement cost tables compiled for
+    the palette (see ``MovementStrategy.compile``) stay valid as it
+    grows. Topologies created with the same palette share both.
+
+    A palette holds at most ``max_size`` tiles, the range of the
+    ``uint16`` arrays of ids by default.
+    """
+
+    __slots__ = 'tiles', 'ids', 'max_size'
+
+    def __init__(self, tiles: Iterable[Tile]=(), max_size: int=2**16):
+        self.tiles = []  # type: List[Tile]
+        self.ids = {}  # type: Dict[Tile, int]
+        self.max_size = max_size
+        self.get_ids(tiles)
+
+    def __len__(self) -> int:
+        return len(self.tiles)
+
+    def __getitem__(self, tile_id: int) -> Tile:
+        return self.tiles[tile_id]
+
+    def __iter__(self) -> Iterator[Tile]:
+        return iter(self.tiles)
+
+    def __contains__(self, tile: Tile) -> bool:
+        return tile in self.ids
+
+    def __repr__(self):
+        return '{0}({1!r})'.format(self.__class__.__name__, self.tiles)
+
+    def get_id(self, tile: Tile) -> int:
+        """Return the id of the tile, adding it to the palette if needed"""
+        tile_id = self.ids.get(tile)
+        if tile_id is None:
+            tile_id = len(self.tiles)
+            if tile_id >= self.max_size:
+                raise ValueError('Too many different tiles')
+            self.tiles.append(tile)
+            self.ids[tile] = tile_id
+        return tile_id
+
+    def get_ids(self, tiles: Iterable[Tile]) -> List[int]:
+        return [self.get_id(tile) for tile in tiles]
+
+    def find(self, tile: Tile) -> Optional[int]:
+        """Return the id of the tile, or ``None`` if it is not interned"""
+        return self.ids.get(tile)
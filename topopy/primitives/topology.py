@@ -1,19 +1,73 @@
-from collections import defaultdict
-from typing import Generator, List, NamedTuple, Type  #noqa
+from collections import deque
+from typing import (  # noqa
+    Any, Deque, Dict, Generator, Iterable, Iterator, List, NamedTuple,
+    Optional, Sequence, Set, Tuple, Type, Union
+)
 
-from .location import Location, Location2D, IntLocation2D
-from .movement import MovementStrategy
-from .tile import Tile
+import numpy as np
+
+from .graph import (
+    CSRGraph, Graph, GridLocationIndex, HexLocationIndex, ListLocationIndex,
+    LocationIndex
+)
+from .location import (
+    HEX_ODD_R, HexLocation, IntLocation2D, Location, Location2D
+)
+from .movement import CompiledMovement, MovementStrategy
+from .tile import KeyTile, Tile, TilePalette
 
 
 SQRT_2 = 2.0**0.5
+INF = float('inf')
+
+#: Offsets of the neighbours of a rectangular cell, straight ones first
+RECTANGULAR_DIRECTIONS = (
+    (-1, 0), (1, 0), (0, -1), (0, 1),
+    (-1, -1), (-1, 1), (1, -1), (1, 1),
+)
+#: Index of the opposite of each of ``RECTANGULAR_DIRECTIONS``
+_OPPOSITE_DIRECTIONS = tuple(
+    RECTANGULAR_DIRECTIONS.index((-dx, -dy))
+    for dx, dy in RECTANGULAR_DIRECTIONS
+)
+
+#: ``(dq, dr)`` offsets of the neighbours of a hexagon
+HEX_DIRECTIONS = (
+    (1, 0), (-1, 0), (0, 1), (0, -1), (1, -1), (-1, 1),
+)
+_OPPOSITE_HEX_DIRECTIONS = tuple(
+    HEX_DIRECTIONS.index((-dq, -dr)) for dq, dr in HEX_DIRECTIONS
+)
+
+
+def _check_matrix(matrix: List[List[Tile]]):
+    if not matrix:
+        raise ValueError('Matrix cannot be empty')
+    row_len = len(matrix[0])
+    for row in matrix:
+        if len(row) != row_len:
+            raise ValueError('Matrix rows must be of the same length')
 
 
 class Topology:
-    """Base class for all topologies"""
+    """
+    Base class for all topologies.
+
+    ``version`` must change whenever the topology is modified,
+    so that data derived from it (e.g. cached graphs) can be invalidated.
+    Topologies that do not track it are considered immutable.
+    """
 
     __slots__ = ()
     location_class = None  # type: Type[Location]
+    version = 0
+
+    def changed_since(self, version: int) -> Optional[Set[Location]]:
+        """
+        Return the locations modified after ``version``,
+        or ``None`` if they are not known.
+        """
+        return None
 
 
 class Graphable:
@@ -21,7 +75,31 @@ class Graphable:
 
     __slots__ = ()
 
-    def to_graph(self, movement_strategy: MovementStrategy) -> dict:
+    def to_graph(self, movement_strategy: MovementStrategy,
+                 compact: bool=False) -> Graph:
+        """
+        Build the weighted graph of the topology.
+
+        Return a dict of dicts ``{from_loc: {to_loc: cost}}``,
+        or a ``CSRGraph`` if ``compact`` is set.
+        """
+        raise NotImplementedError
+
+
+class Traversable:
+    """Interface for topologies that can list weighted neighbours lazily"""
+
+    __slots__ = ()
+
+    def iter_neighbors(
+            self, loc: Location, movement_strategy: MovementStrategy
+    ) -> Iterator[Tuple[Location, float]]:
+        raise NotImplementedError
+
+    def iter_predecessors(
+            self, loc: Location, movement_strategy: MovementStrategy
+    ) -> Iterator[Tuple[Location, float]]:
+        """Generate ``(from_loc, cost)`` for every passable edge to ``loc``"""
         raise NotImplementedError
 
 
@@ -33,10 +111,68 @@ DirectedEdge = NamedTuple('DirectedEdge', (
 ))
 
 
-class GraphableTopology(Topology, Graphable):
-    """Topology that can be converted to a weighted graph."""
-
-    __slots__ = ()
+class GraphableTopology(Topology, Graphable, Traversable):
+    """
+    Topology that can be converted to a weighted graph.
+
+    Every modification increments ``version`` and is recorded in
+    a bounded changelog, so that graphs built for an older version
+    can be patched instead of rebuilt (see ``changed_since``).
+    Subclasses must call ``_init_changes`` on creation and implement
+    ``_set_tile``.
+    """
+
+    __slots__ = 'version', '_changelog', '_changelog_start'
+
+    #: Maximum number of changed locations remembered
+    changelog_size = 65536
+
+    def _init_changes(self):
+        self.version = 0
+        self._changelog = deque()  # type: Deque[Tuple[int, Location]]
+        # All changes made after this version are in the changelog
+        self._changelog_start = 0
+
+    def _record_changes(self, locs: Iterable[Location]):
+        self.version += 1
+        changelog = self._changelog
+        for loc in locs:
+            changelog.append((self.version, loc))
+        while len(changelog) > self.changelog_size:
+            self._changelog_start = changelog.popleft()[0]
+
+    def _invalidate_changes(self):
+        """
+        Record a change of too many locations to list, so that graphs
+        built for older versions are rebuilt.
+        """
+        self.version += 1
+        self._changelog.clear()
+        self._changelog_start = self.version
+
+    def changed_since(self, version: int) -> Optional[Set[Location]]:
+        if version < self._changelog_start:
+            return None
+        changed = set()
+        for loc_version, loc in reversed(self._changelog):
+            if loc_version <= version:
+                break
+            changed.add(loc)
+        return changed
+
+    def get_affected_locations(self, locs: Iterable[Location]
+                               ) -> Set[Location]:
+        """
+        Return the sources of all edges that may change
+        when the tiles at ``locs`` change.
+
+        The neighbourhood relation is assumed to be symmetric.
+        """
+        affected = set()
+        for loc in locs:
+            affected.add(loc)
+            affected.update(edge.to_loc for edge in self.get_edges(loc))
+        return affected
 
     def get_edges(self, loc: Location) -> List[DirectedEdge]:
         raise NotImplementedError
@@ -47,38 +183,104 @@ class GraphableTopology(Topology, Graphable):
     def __getitem__(self, loc: Location):
         raise NotImplementedError
 
-    def __setitem__(self, loc: Location, value: Tile):
+    def _set_tile(self, loc: Location, value: Tile):
+        """Replace the tile without recording the change"""
         raise NotImplementedError
 
-    def to_graph(self, movement_strategy: MovementStrategy) -> dict:
-        graph = defaultdict(dict)
+    def __setitem__(self, loc: Location, value: Tile):
+        self._set_tile(loc, value)
+        self._record_changes((loc,))
+
+    def update_many(self, locs: Iterable[Location], tiles: Iterable[Tile]):
+        """
+        Replace several tiles at once.
+
+        All changes share a single version, so cached graphs
+        are patched only once. Nothing changes, not even the version,
+        if ``locs`` is empty.
+        """
+        locs = list(locs)
+        tiles = list(tiles)
+        if len(locs) != len(tiles):
+            raise ValueError('locs and tiles must be of the same length')
+        if not locs:
+            return
+        for loc, tile in zip(locs, tiles):
+            self._set_tile(loc, tile)
+        self._record_changes(locs)
+
+    def iter_neighbors(
+            self, loc: Location, movement_strategy: MovementStrategy
+    ) -> Generator[Tuple[Location, float], None, None]:
+        """
+        Generate ``(to_loc, cost)`` for every passable edge from ``loc``.
+
+        Edges are computed on demand, so searches that use this
+        instead of ``to_graph`` only touch the cells they explore.
+        """
+        for from_loc, to_loc, from_tile, to_tile in self.get_edges(loc):
+            p = movement_strategy.get_passability(
+                from_loc=from_loc, to_loc=to_loc,
+                from_tile=from_tile, to_tile=to_tile
+            )
+            if p is not None:
+                yield to_loc, p
+
+    def iter_predecessors(
+            self, loc: Location, movement_strategy: MovementStrategy
+    ) -> Generator[Tuple[Location, float], None, None]:
+        # The neighbourhood relation is assumed to be symmetric
+        for to_loc, from_loc, to_tile, from_tile in self.get_edges(loc):
+            p = movement_strategy.get_passability(
+                from_loc=from_loc, to_loc=to_loc,
+                from_tile=from_tile, to_tile=to_tile
+            )
+            if p is not None:
+                yield from_loc, p
+
+    def get_location_index(self) -> LocationIndex:
+        """Index used to number the nodes of a compact graph"""
+        return ListLocationIndex(self.all_locations())
+
+    def to_graph(self, movement_strategy: MovementStrategy,
+                 compact: bool=False) -> Graph:
+        if compact:
+            return CSRGraph.from_neighbors(
+                self.get_location_index(),
+                lambda loc: self.iter_neighbors(loc, movement_strategy)
+            )
+
+        graph = {}
         for loc in self.all_locations():
-            for from_loc, to_loc, from_tile, to_tile in self.get_edges(loc):
-                p = movement_strategy.get_passability(
-                    from_loc=from_loc, to_loc=to_loc,
-                    from_tile=from_tile, to_tile=to_tile
-                )
-                if p is not None:
-                    graph[from_loc][to_loc] = p
+            edges = dict(self.iter_neighbors(loc, movement_strategy))
+            if edges:
+                graph[loc] = edges
 
-        return dict(graph)
+        return graph
 
 
 class RectangularTopology(GraphableTopology):
     """Rectangular matrix-based topology with 2D coordinates."""
 
+    #: Offsets of the neighbours of a location
+    directions = RECTANGULAR_DIRECTIONS
+
     __slots__ = 'matrix', 'tile_class'
     location_class = IntLocation2D
 
     def __init__(self, matrix: List[List[Tile]]):
-        if not matrix:
-            raise ValueError('Matrix cannot be empty')
-        row_len = len(matrix[0])
-        for row in matrix:
-            if len(row) != row_len:
-                raise ValueError('Matrix rows must be of the same length')
-
+        self._check_matrix(matrix)
         self.matrix = matrix
+        self._init_changes()
+
+    _check_matrix = staticmethod(_check_matrix)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.matrix), len(self.matrix[0])
+
+    def get_location_index(self) -> GridLocationIndex:
+        return GridLocationIndex(self.shape, self.location_class)
 
     def __getitem__(self, loc: Location2D):
         if not isinstance(loc, self.location_class):
@@ -86,12 +288,23 @@ class RectangularTopology(GraphableTopology):
 
         return self.matrix[loc.x][loc.y]
 
-    def __setitem__(self, loc: Location2D, value: Tile):
+    def _set_tile(self, loc: Location2D, value: Tile):
         if not isinstance(loc, self.location_class):
             raise TypeError(loc.__class__.__name__)
 
         self.matrix[loc.x][loc.y] = value
 
+    def get_affected_locations(self, locs: Iterable[Location2D]
+                               ) -> Set[Location2D]:
+        x_limit, y_limit = self.shape
+        location_class = self.location_class
+        affected = set()
+        for x, y in locs:
+            for x1 in range(max(0, x - 1), min(x_limit, x + 2)):
+                for y1 in range(max(0, y - 1), min(y_limit, y + 2)):
+                    affected.add(location_class(x1, y1))
+        return affected
+
     def get_edges(self, loc: Location2D) -> List[DirectedEdge]:
         x_limit = len(self.matrix)
         y_limit = len(self.matrix[0])
@@ -107,12 +320,625 @@ class RectangularTopology(GraphableTopology):
 
         return edges
 
+    def iter_neighbors(
+            self, loc: Location2D, movement_strategy: MovementStrategy
+    ) -> Generator[Tuple[Location2D, float], None, None]:
+        # Same as the generic version, but without building DirectedEdge
+        matrix = self.matrix
+        x, y = loc
+        x_limit = len(matrix)
+        y_limit = len(matrix[0])
+        from_tile = matrix[x][y]
+        location_class = self.location_class
+        get_passability = movement_strategy.get_passability
+        for x1 in range(max(0, x - 1), min(x_limit, x + 2)):
+            row = matrix[x1]
+            for y1 in range(max(0, y - 1), min(y_limit, y + 2)):
+                if x1 == x and y1 == y:
+                    continue
+                to_loc = location_class(x1, y1)
+                p = get_passability(from_tile, row[y1], loc, to_loc)
+                if p is not None:
+                    yield to_loc, p
+
+    def iter_predecessors(
+            self, loc: Location2D, movement_strategy: MovementStrategy
+    ) -> Generator[Tuple[Location2D, float], None, None]:
+        matrix = self.matrix
+        x, y = loc
+        x_limit = len(matrix)
+        y_limit = len(matrix[0])
+        to_tile = matrix[x][y]
+        location_class = self.location_class
+        get_passability = movement_strategy.get_passability
+        for x1 in range(max(0, x - 1), min(x_limit, x + 2)):
+            row = matrix[x1]
+            for y1 in range(max(0, y - 1), min(y_limit, y + 2)):
+                if x1 == x and y1 == y:
+                    continue
+                from_loc = location_class(x1, y1)
+                p = get_passability(row[y1], to_tile, from_loc, loc)
+                if p is not None:
+                    yield from_loc, p
+
     def all_locations(self) -> Generator[Location2D, None, None]:
         for x in range(len(self.matrix)):
             for y in range(len(self.matrix[x])):
                 yield self.location_class(x, y)
 
 
+class TileArrayMixin:
+    """
+    Storage of ``KeyTile``s as a 2D integer array.
+
+    ``keys[row, col]`` is the id of a tile in ``palette``, a
+    ``TilePalette`` that may be shared with other topologies.
+    Subclasses define the ``keys`` and ``palette`` slots.
+    """
+
+    __slots__ = ()
+
+    key_dtype = np.uint16
+
+    def _init_tiles(self, matrix: List[List[KeyTile]],
+                    palette: TilePalette=None):
+        _check_matrix(matrix)
+        self.palette = TilePalette() if palette is None else palette
+        get_id = self.palette.get_id
+        self.keys = np.array(
+            [[get_id(tile) for tile in row] for row in matrix],
+            dtype=self.key_dtype
+        )
+
+    def _init_array(self, keys: np.ndarray,
+                    palette: Union[TilePalette, Sequence[KeyTile]]):
+        if keys.ndim != 2 or not keys.size:
+            raise ValueError('Matrix must be a non-empty 2D array')
+        if not isinstance(palette, TilePalette):
+            tiles = palette
+            palette = TilePalette()
+            tile_ids = palette.get_ids(tiles)
+            if tile_ids != list(range(len(tile_ids))):
+                # Repeated tiles
+                keys = np.array(tile_ids, dtype=self.key_dtype)[keys]
+        self.keys = keys
+        self.palette = palette
+
+    def get_tile_id(self, tile: KeyTile) -> int:
+        """Return the id of the tile, adding it to the palette if needed"""
+        return self.palette.get_id(tile)
+
+    @property
+    def matrix(self) -> List[List[KeyTile]]:
+        """Tiles as nested lists (a copy, for compatibility)"""
+        palette = self.palette.tiles
+        return [[palette[i] for i in row] for row in self.keys.tolist()]
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.keys.shape
+
+
+class NumpyRectangularTopology(TileArrayMixin, RectangularTopology):
+    """
+    ``RectangularTopology`` that stores tiles as a 2D integer array
+    (see ``TileArrayMixin``), ``keys[x, y]`` for location ``(x, y)``.
+    """
+
+    __slots__ = 'keys', 'palette'
+
+    def __init__(self, matrix: List[List[KeyTile]],
+                 palette: TilePalette=None):
+        self._init_tiles(matrix, palette)
+        self._init_changes()
+
+    @classmethod
+    def from_array(cls, keys: np.ndarray,
+                   palette: Union[TilePalette, Sequence[KeyTile]]
+                   ) -> 'NumpyRectangularTopology':
+        """
+        Create a topology from an array of ids into ``palette``, which
+        is shared if it is a ``TilePalette``.
+        """
+        topology = cls.__new__(cls)
+        topology._init_array(keys, palette)
+        topology._init_changes()
+        return topology
+
+    def get_cells(self, coords: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the rows and columns in ``keys`` of an ``(n, 2)`` array of
+        location coordinates, which may be out of bounds.
+        """
+        return coords[:, 0], coords[:, 1]
+
+    def __getitem__(self, loc: Location2D):
+        if not isinstance(loc, self.location_class):
+            raise TypeError(loc.__class__.__name__)
+
+        return self.palette.tiles[self.keys[loc.x, loc.y]]
+
+    def _set_tile(self, loc: Location2D, value: KeyTile):
+        if not isinstance(loc, self.location_class):
+            raise TypeError(loc.__class__.__name__)
+
+        self.keys[loc.x, loc.y] = self.get_tile_id(value)
+
+    def update_many(self, locs: Iterable[Location2D],
+                    tiles: Iterable[KeyTile]):
+        locs = list(locs)
+        tiles = list(tiles)
+        if len(locs) != len(tiles):
+            raise ValueError('locs and tiles must be of the same length')
+        if not locs:
+            return
+        for loc in locs:
+            if not isinstance(loc, self.location_class):
+                raise TypeError(loc.__class__.__name__)
+        xs, ys = zip(*locs)
+        xs, ys = list(xs), list(ys)
+        # Raise IndexError before new tiles are added to the palette
+        self.keys[xs, ys]
+        self.keys[xs, ys] = [self.get_tile_id(tile) for tile in tiles]
+        self._record_changes(locs)
+
+    def get_edges(self, loc: Location2D) -> List[DirectedEdge]:
+        x_limit, y_limit = self.keys.shape
+        from_tile = self[loc]
+        edges = []
+        for x1 in range(max(0, loc.x - 1), min(x_limit, loc.x + 2)):
+            for y1 in range(max(0, loc.y - 1), min(y_limit, loc.y + 2)):
+                if x1 == loc.x and y1 == loc.y:
+                    continue
+                to_loc = self.location_class(x1, y1)
+                edges.append(
+                    DirectedEdge(loc, to_loc, from_tile, self[to_loc])
+                )
+
+        return edges
+
+    def iter_neighbors(
+            self, loc: Location2D, movement_strategy: MovementStrategy
+    ) -> Generator[Tuple[Location2D, float], None, None]:
+        """
+        Same as ``GraphableTopology.iter_neighbors``.
+
+        Costs of compilable movement strategies are looked up in
+        their table for the palette (see ``MovementStrategy.compile``).
+        """
+        keys = self.keys
+        x, y = loc
+        x0 = max(0, x - 1)
+        y0 = max(0, y - 1)
+        window = keys[x0:x + 2, y0:y + 2].tolist()
+        location_class = self.location_class
+        compiled = movement_strategy.compile(
+            self.palette, RECTANGULAR_DIRECTIONS
+        )
+        if compiled is not None:
+            x_limit, y_limit = keys.shape
+            costs = compiled.lists[window[x - x0][y - y0]]
+            for d, (dx, dy) in enumerate(RECTANGULAR_DIRECTIONS):
+                x1 = x + dx
+                y1 = y + dy
+                if 0 <= x1 < x_limit and 0 <= y1 < y_limit:
+                    cost = costs[window[x1 - x0][y1 - y0]][d]
+                    if cost != INF:
+                        yield location_class(x1, y1), cost
+            return
+
+        palette = self.palette.tiles
+        from_tile = palette[keys[x, y]]
+        get_passability = movement_strategy.get_passability
+        for x1, row in enumerate(window, x0):
+            for y1, tile_id in enumerate(row, y0):
+                if x1 == x and y1 == y:
+                    continue
+                to_loc = location_class(x1, y1)
+                p = get_passability(from_tile, palette[tile_id], loc, to_loc)
+                if p is not None:
+                    yield to_loc, p
+
+    def iter_predecessors(
+            self, loc: Location2D, movement_strategy: MovementStrategy
+    ) -> Generator[Tuple[Location2D, float], None, None]:
+        keys = self.keys
+        x, y = loc
+        x0 = max(0, x - 1)
+        y0 = max(0, y - 1)
+        window = keys[x0:x + 2, y0:y + 2].tolist()
+        location_class = self.location_class
+        compiled = movement_strategy.compile(
+            self.palette, RECTANGULAR_DIRECTIONS
+        )
+        if compiled is not None:
+            x_limit, y_limit = keys.shape
+            lists = compiled.lists
+            to_id = window[x - x0][y - y0]
+            for d, (dx, dy) in enumerate(RECTANGULAR_DIRECTIONS):
+                x1 = x + dx
+                y1 = y + dy
+                if 0 <= x1 < x_limit and 0 <= y1 < y_limit:
+                    cost = lists[window[x1 - x0][y1 - y0]][to_id][
+                        _OPPOSITE_DIRECTIONS[d]
+                    ]
+                    if cost != INF:
+                        yield location_class(x1, y1), cost
+            return
+
+        palette = self.palette.tiles
+        to_tile = palette[keys[x, y]]
+        get_passability = movement_strategy.get_passability
+        for x1, row in enumerate(window, x0):
+            for y1, tile_id in enumerate(row, y0):
+                if x1 == x and y1 == y:
+                    continue
+                from_loc = location_class(x1, y1)
+                p = get_passability(palette[tile_id], to_tile, from_loc, loc)
+                if p is not None:
+                    yield from_loc, p
+
+    def all_locations(self) -> Generator[Location2D, None, None]:
+        x_limit, y_limit = self.keys.shape
+        for x in range(x_limit):
+            for y in range(y_limit):
+                yield self.location_class(x, y)
+
+    def get_edge_costs(
+            self, movement_strategy: MovementStrategy
+    ) -> Tuple[Tuple[Tuple[int, int], ...], np.ndarray]:
+        """
+        Compute the costs of all edges at once.
+
+        Return ``(directions, costs)``, where ``costs[d, x, y]``
+        is the cost of moving from ``(x, y)`` by ``directions[d]``
+        (``inf`` if impossible). Costs are ``float64``, like the costs
+        of ``iter_neighbors``; only compact graphs store ``float32``.
+
+        Compilable strategies (see ``MovementStrategy.compile``) are
+        vectorized with array shifts and their cost table; other
+        strategies are queried edge by edge.
+        """
+        compiled = movement_strategy.compile(
+            self.palette, RECTANGULAR_DIRECTIONS
+        )
+        if compiled is not None:
+            return self._get_compiled_edge_costs(compiled)
+
+        costs = np.full(
+            (len(RECTANGULAR_DIRECTIONS),) + self.keys.shape, np.inf
+        )
+        direction_index = {
+            direction: d for d, direction in enumerate(RECTANGULAR_DIRECTIONS)
+        }
+        for loc in self.all_locations():
+            for to_loc, cost in self.iter_neighbors(loc, movement_strategy):
+                d = direction_index[(to_loc.x - loc.x, to_loc.y - loc.y)]
+                costs[d, loc.x, loc.y] = cost
+        return RECTANGULAR_DIRECTIONS, costs
+
+    def _get_compiled_edge_costs(
+            self, compiled: CompiledMovement
+    ) -> Tuple[Tuple[Tuple[int, int], ...], np.ndarray]:
+        table = compiled.costs
+        # Directions in which no move is possible are left out
+        used = np.flatnonzero(np.isfinite(table).any(axis=(0, 1))).tolist()
+        directions = tuple(compiled.directions[d] for d in used)
+        keys = self.keys
+        x_limit, y_limit = keys.shape
+        costs = np.full((len(directions), x_limit, y_limit), np.inf)
+        for i, (d, (dx, dy)) in enumerate(zip(used, directions)):
+            from_x = slice(max(0, -dx), x_limit - max(0, dx))
+            from_y = slice(max(0, -dy), y_limit - max(0, dy))
+            to_x = slice(max(0, dx), x_limit - max(0, -dx))
+            to_y = slice(max(0, dy), y_limit - max(0, -dy))
+            costs[i, from_x, from_y] = table[
+                keys[from_x, from_y], keys[to_x, to_y], d
+            ]
+        return directions, costs
+
+    def to_graph(self, movement_strategy: MovementStrategy,
+                 compact: bool=False) -> Graph:
+        if compact:
+            return self._to_csr_graph(movement_strategy)
+
+        directions, costs = self.get_edge_costs(movement_strategy)
+        location_class = self.location_class
+        graph = {}
+        for (dx, dy), direction_costs in zip(directions, costs):
+            xs, ys = np.nonzero(np.isfinite(direction_costs))
+            for x, y, cost in zip(
+                    xs.tolist(), ys.tolist(),
+                    direction_costs[xs, ys].tolist()):
+                from_loc = location_class(x, y)
+                if from_loc not in graph:
+                    graph[from_loc] = {}
+                graph[from_loc][location_class(x + dx, y + dy)] = cost
+        return graph
+
+    def _to_csr_graph(self, movement_strategy: MovementStrategy) -> CSRGraph:
+        directions, costs = self.get_edge_costs(movement_strategy)
+        x_limit, y_limit = self.keys.shape
+        # (node, direction) order, so that edges of a node are contiguous
+        costs = costs.reshape(len(directions), x_limit * y_limit).T
+        passable = np.isfinite(costs)
+        indptr = np.zeros(x_limit * y_limit + 1, dtype=np.int64)
+        np.cumsum(passable.sum(axis=1), out=indptr[1:])
+        node_ids, direction_ids = np.nonzero(passable)
+        offsets = np.array(
+            [dx * y_limit + dy for dx, dy in directions], dtype=np.int64
+        )
+        indices = (node_ids + offsets[direction_ids]).astype(np.int32)
+        return CSRGraph(
+            indptr, indices, costs[passable].astype(np.float32),
+            self.get_location_index()
+        )
+
+
+class HexTopology(TileArrayMixin, GraphableTopology):
+    """
+    Map of hexagons with pointy tops, stored as a 2D integer array
+    (see ``TileArrayMixin``).
+
+    Locations are axial ``HexLocation``s, and ``keys[row, col]`` holds
+    the tile of ``HexLocation.from_offset(row, col, layout)``.
+    With the default ``HEX_ODD_R`` layout the map is a rectangle whose
+    odd rows are shifted right by half a hexagon, so character maps
+    are read as they look; ``HEX_AXIAL`` maps are rhombuses.
+
+    Neighbours come from tables of row and column offsets, one for
+    even and one for odd rows, instead of lists of ``DirectedEdge``.
+    """
+
+    __slots__ = 'keys', 'palette', 'layout', '_offsets'
+
+    location_class = HexLocation
+    #: Offsets of the neighbours of a location
+    directions = HEX_DIRECTIONS
+
+    def __init__(self, matrix: List[List[KeyTile]], layout: str=HEX_ODD_R,
+                 palette: TilePalette=None):
+        self._init_layout(layout)
+        self._init_tiles(matrix, palette)
+        self._init_changes()
+
+    @classmethod
+    def from_array(cls, keys: np.ndarray,
+                   palette: Union[TilePalette, Sequence[KeyTile]],
+                   layout: str=HEX_ODD_R) -> 'HexTopology':
+        """
+        Create a topology from an array of ids into ``palette``, which
+        is shared if it is a ``TilePalette``.
+        """
+        topology = cls.__new__(cls)
+        topology._init_layout(layout)
+        topology._init_array(keys, palette)
+        topology._init_changes()
+        return topology
+
+    def _init_layout(self, layout: str):
+        shift = HexLocation.get_row_shift
+        self.layout = layout
+        # (row, col) offsets of the neighbours in even and odd rows
+        self._offsets = tuple(
+            tuple(
+                (dr, dq + shift(layout, parity + dr) - shift(layout, parity))
+                for dq, dr in HEX_DIRECTIONS
+            )
+            for parity in (0, 1)
+        )
+
+    def get_location_index(self) -> HexLocationIndex:
+        return HexLocationIndex(self.shape, self.layout)
+
+    def get_cells(self, coords: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the rows and columns in ``keys`` of an ``(n, 2)`` array of
+        location coordinates, which may be out of bounds.
+        """
+        qs, rs = coords[:, 0], coords[:, 1]
+        return rs, qs + HexLocation.get_row_shift(self.layout, rs)
+
+    def _get_cell(self, loc: HexLocation) -> Tuple[int, int]:
+        """Return ``(row, col)`` of ``loc`` in ``keys``"""
+        if not isinstance(loc, self.location_class):
+            raise TypeError(loc.__class__.__name__)
+        row, col = loc.to_offset(self.layout)
+        row_limit, col_limit = self.keys.shape
+        if not (0 <= row < row_limit and 0 <= col < col_limit):
+            raise IndexError(loc)
+        return row, col
+
+    def __getitem__(self, loc: HexLocation):
+        return self.palette.tiles[self.keys[self._get_cell(loc)]]
+
+    def _set_tile(self, loc: HexLocation, value: KeyTile):
+        self.keys[self._get_cell(loc)] = self.get_tile_id(value)
+
+    def update_many(self, locs: Iterable[HexLocation],
+                    tiles: Iterable[KeyTile]):
+        locs = list(locs)
+        tiles = list(tiles)
+        if len(locs) != len(tiles):
+            raise ValueError('locs and tiles must be of the same length')
+        if not locs:
+            return
+        rows, cols = zip(*[self._get_cell(loc) for loc in locs])
+        self.keys[list(rows), list(cols)] = [
+            self.get_tile_id(tile) for tile in tiles
+        ]
+        self._record_changes(locs)
+
+    def _iter_adjacent(self, loc: HexLocation
+                       ) -> Iterator[Tuple[int, HexLocation, int, int]]:
+        """
+        Generate ``(direction, to_loc, from_id, to_id)`` for the
+        neighbours of ``loc``, with the tile ids of both cells.
+        """
+        keys = self.keys
+        row_limit, col_limit = keys.shape
+        q, r = loc
+        col = q + HexLocation.get_row_shift(self.layout, r)
+        if not (0 <= r < row_limit and 0 <= col < col_limit):
+            raise IndexError(loc)
+        row0 = max(0, r - 1)
+        col0 = max(0, col - 1)
+        window = keys[row0:r + 2, col0:col + 2].tolist()
+        from_id = window[r - row0][col - col0]
+        location_class = self.location_class
+        d = 0
+        for (drow, dcol), (dq, dr) in zip(
+                self._offsets[r & 1], HEX_DIRECTIONS):
+            row1 = r + drow
+            col1 = col + dcol
+            if 0 <= row1 < row_limit and 0 <= col1 < col_limit:
+                yield (
+                    d, location_class(q + dq, r + dr), from_id,
+                    window[row1 - row0][col1 - col0]
+                )
+            d += 1
+
+    def get_affected_locations(self, locs: Iterable[HexLocation]
+                               ) -> Set[HexLocation]:
+        affected = set()
+        for loc in locs:
+            affected.add(loc)
+            affected.update(
+                to_loc for _, to_loc, _, _ in self._iter_adjacent(loc)
+            )
+        return affected
+
+    def get_edges(self, loc: HexLocation) -> List[DirectedEdge]:
+        palette = self.palette.tiles
+        return [
+            DirectedEdge(loc, to_loc, palette[from_id], palette[to_id])
+            for _, to_loc, from_id, to_id in self._iter_adjacent(loc)
+        ]
+
+    def iter_neighbors(
+            self, loc: HexLocation, movement_strategy: MovementStrategy
+    ) -> Generator[Tuple[HexLocation, float], None, None]:
+        compiled = movement_strategy.compile(self.palette, HEX_DIRECTIONS)
+        if compiled is not None:
+            lists = compiled.lists
+            for d, to_loc, from_id, to_id in self._iter_adjacent(loc):
+                cost = lists[from_id][to_id][d]
+                if cost != INF:
+                    yield to_loc, cost
+            return
+
+        palette = self.palette.tiles
+        get_passability = movement_strategy.get_passability
+        for _, to_loc, from_id, to_id in self._iter_adjacent(loc):
+            p = get_passability(palette[from_id], palette[to_id], loc, to_loc)
+            if p is not None:
+                yield to_loc, p
+
+    def iter_predecessors(
+            self, loc: HexLocation, movement_strategy: MovementStrategy
+    ) -> Generator[Tuple[HexLocation, float], None, None]:
+        compiled = movement_strategy.compile(self.palette, HEX_DIRECTIONS)
+        if compiled is not None:
+            lists = compiled.lists
+            for d, from_loc, to_id, from_id in self._iter_adjacent(loc):
+                cost = lists[from_id][to_id][_OPPOSITE_HEX_DIRECTIONS[d]]
+                if cost != INF:
+                    yield from_loc, cost
+            return
+
+        palette = self.palette.tiles
+        get_passability = movement_strategy.get_passability
+        for _, from_loc, to_id, from_id in self._iter_adjacent(loc):
+            p = get_passability(
+                palette[from_id], palette[to_id], from_loc, loc
+            )
+            if p is not None:
+                yield from_loc, p
+
+    def all_locations(self) -> Generator[HexLocation, None, None]:
+        row_limit, col_limit = self.keys.shape
+        for row in range(row_limit):
+            for col in range(col_limit):
+                yield HexLocation.from_offset(row, col, self.layout)
+
+    def _get_neighbor_ids(self) -> np.ndarray:
+        """
+        Return ``ids[d, row, col]``, the node id (see
+        ``get_location_index``) of the neighbour of a cell
+        by ``HEX_DIRECTIONS[d]``, or ``-1`` outside of the map.
+        """
+        row_limit, col_limit = self.keys.shape
+        rows = np.arange(row_limit)[:, None]
+        cols = np.arange(col_limit)[None, :]
+        col_offsets = np.array(
+            [[dcol for _, dcol in offsets] for offsets in self._offsets]
+        )[rows[:, 0] & 1]
+        ids = np.full(
+            (len(HEX_DIRECTIONS), row_limit, col_limit), -1, dtype=np.int64
+        )
+        for d, (dq, dr) in enumerate(HEX_DIRECTIONS):
+            to_rows = np.broadcast_to(rows + dr, ids.shape[1:])
+            to_cols = cols + col_offsets[:, d:d + 1]
+            valid = (
+                (to_rows >= 0) & (to_rows < row_limit) &
+                (to_cols >= 0) & (to_cols < col_limit)
+            )
+            ids[d][valid] = to_rows[valid] * col_limit + to_cols[valid]
+        return ids
+
+    def get_edge_costs(
+            self, movement_strategy: MovementStrategy
+    ) -> Tuple[Tuple[Tuple[int, int], ...], np.ndarray]:
+        """
+        Compute the costs of all edges at once.
+
+        Return ``(HEX_DIRECTIONS, costs)``, where ``costs[d, row, col]``
+        is the cost of moving from the cell ``(row, col)`` of ``keys``
+        by ``HEX_DIRECTIONS[d]`` (``inf`` if impossible).
+        Compilable strategies are vectorized; other strategies are
+        queried edge by edge.
+        """
+        keys = self.keys
+        costs = np.full((len(HEX_DIRECTIONS),) + keys.shape, np.inf)
+        compiled = movement_strategy.compile(self.palette, HEX_DIRECTIONS)
+        if compiled is None:
+            palette = self.palette.tiles
+            for loc in self.all_locations():
+                row, col = loc.to_offset(self.layout)
+                for d, to_loc, from_id, to_id in self._iter_adjacent(loc):
+                    p = movement_strategy.get_passability(
+                        palette[from_id], palette[to_id], loc, to_loc
+                    )
+                    if p is not None:
+                        costs[d, row, col] = p
+            return HEX_DIRECTIONS, costs
+
+        table = compiled.costs
+        flat_keys = keys.reshape(-1)
+        for d, to_ids in enumerate(self._get_neighbor_ids()):
+            valid = to_ids >= 0
+            costs[d][valid] = table[keys[valid], flat_keys[to_ids[valid]], d]
+        return HEX_DIRECTIONS, costs
+
+    def to_graph(self, movement_strategy: MovementStrategy,
+                 compact: bool=False) -> Graph:
+        _, costs = self.get_edge_costs(movement_strategy)
+        node_count = self.keys.size
+        # (node, direction) order, so that edges of a node are contiguous
+        costs = costs.reshape(len(HEX_DIRECTIONS), node_count).T
+        passable = np.isfinite(costs)
+        indptr = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(passable.sum(axis=1), out=indptr[1:])
+        indices = self._get_neighbor_ids().reshape(
+            len(HEX_DIRECTIONS), node_count
+        ).T[passable].astype(np.int32)
+        weights = costs[passable]
+        if compact:
+            weights = weights.astype(np.float32)
+        graph = CSRGraph(indptr, indices, weights, self.get_location_index())
+        return graph if compact else graph.to_dict()
+
+
 #   *---*---*---*---*---*
 #  / \ / \ / \ / \ / \ /
 # *---*---*---*---*---*
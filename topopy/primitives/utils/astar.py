@@ -0,0 +1,61 @@
+from heapq import heappop, heappush
+from itertools import count
+
+from .dijkstra import _deconstruct_path
+
+
+def find_path(get_neighbors, start, end, heuristic, weight=1):
+    """
+    Calculate the shortest path using A*.
+
+    With ``weight`` greater than 1 the search becomes weighted A*:
+    nodes are ordered by ``g + weight * h``, which expands fewer nodes
+    and returns a path at most ``weight`` times longer than the optimal one
+    (given an admissible heuristic).
+
+    :param get_neighbors: callable returning an iterable of
+                          ``(neighbor, weight)`` pairs for a node
+    :param start: starting node
+    :param end: ending node
+    :param heuristic: callable returning a lower bound of the distance
+                      from a node to ``end``
+    :param weight: heuristic inflation factor
+    :return: ``(distance, path)`` or ``(None, None)``, if there is no path
+    """
+
+    distance_from_start = {start: 0}
+    tentative_parents = {}
+    visited_nodes = set()
+    # Among equal estimates prefer deeper nodes (larger ``g``):
+    # on open maps this avoids expanding every node of equal cost
+    tie_breaker = count()
+    heap = [(weight * heuristic(start), 0, next(tie_breaker), start)]
+
+    while heap:
+        _, _, _, current = heappop(heap)
+        if current in visited_nodes:
+            continue
+
+        if current == end:
+            return (
+                distance_from_start[end],
+                _deconstruct_path(tentative_parents, start, end)
+            )
+
+        visited_nodes.add(current)
+        distance = distance_from_start[current]
+
+        for neighbor, edge_weight in get_neighbors(current):
+            if neighbor in visited_nodes:
+                continue
+            neighbor_distance = distance + edge_weight
+            if neighbor_distance < distance_from_start.get(
+                    neighbor, float('inf')):
+                distance_from_start[neighbor] = neighbor_distance
+                tentative_parents[neighbor] = current
+                heappush(heap, (
+                    neighbor_distance + weight * heuristic(neighbor),
+                    -neighbor_distance, next(tie_breaker), neighbor
+                ))
+
+    return None, None
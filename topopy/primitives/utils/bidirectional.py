@@ -0,0 +1,84 @@
+from heapq import heappop, heappush
+from itertools import count
+
+from .dijkstra import _deconstruct_path
+
+
+def find_path(get_neighbors, get_predecessors, start, end,
+              potential=None):
+    """
+    Calculate the shortest path with two searches, forwards from
+    ``start`` and backwards from ``end``, that meet in the middle.
+
+    Let ``mu`` be the shortest ``start -> end`` distance found through a
+    node reached by both searches. The searches stop once the sum of
+    their smallest keys is at least ``mu``, so the result is exact.
+
+    :param get_neighbors: callable returning an iterable of
+                          ``(neighbor, weight)`` pairs for a node
+    :param get_predecessors: callable returning an iterable of
+                             ``(predecessor, weight)`` pairs for a node
+    :param start: starting node
+    :param end: ending node
+    :param potential: optional consistent potential ``p(node)`` for
+                      bidirectional A*: the forward search is ordered by
+                      ``g + p`` and the backward one by ``g - p``
+    :return: ``(distance, path)`` or ``(None, None)``, if there is no path
+    """
+
+    if start == end:
+        return 0, [start]
+    if potential is None:
+        def potential(node):
+            return 0
+
+    distances = ({start: 0}, {end: 0})
+    parents = ({}, {})
+    settled = (set(), set())
+    signs = (1, -1)
+    tie_breaker = count()
+    heaps = (
+        [(potential(start), next(tie_breaker), start)],
+        [(-potential(end), next(tie_breaker), end)],
+    )
+    edge_functions = (get_neighbors, get_predecessors)
+    best, meeting = float('inf'), None
+
+    while heaps[0] and heaps[1]:
+        # Both keys include the potential, and p(v) - p(v) cancels out
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        _, _, current = heappop(heaps[side])
+        if current in settled[side]:
+            continue
+        settled[side].add(current)
+
+        side_distances = distances[side]
+        other_distances = distances[1 - side]
+        sign = signs[side]
+        distance = side_distances[current]
+        for neighbor, weight in edge_functions[side](current):
+            if neighbor in settled[side]:
+                continue
+            neighbor_distance = distance + weight
+            if neighbor_distance < side_distances.get(
+                    neighbor, float('inf')):
+                side_distances[neighbor] = neighbor_distance
+                parents[side][neighbor] = current
+                heappush(heaps[side], (
+                    neighbor_distance + sign * potential(neighbor),
+                    next(tie_breaker), neighbor
+                ))
+                other = other_distances.get(neighbor)
+                if other is not None and neighbor_distance + other < best:
+                    best, meeting = neighbor_distance + other, neighbor
+
+    if meeting is None:
+        return None, None
+    path = _deconstruct_path(parents[0], start, meeting)
+    cursor = meeting
+    while cursor != end:
+        cursor = parents[1][cursor]
+        path.append(cursor)
+    return best, path
@@ -1,4 +1,5 @@
-# TODO: Rewrite
+from heapq import heappop, heappush
+from itertools import count
 
 
 def get_shortest_path(weighted_graph, start, end):
@@ -10,49 +11,124 @@ def get_shortest_path(weighted_graph, start, end):
     :param start: starting node
     :param end: ending node
     :param weighted_graph: {"node1": {"node2": "weight", ...}, ...}
-    :return: [<start>, ... nodes between ..., <end>] or None, if there is no
-             path
+    :return: ``(distance, [<start>, ... nodes between ..., <end>])``
+             or ``(None, None)``, if there is no path
+    """
+
+    # Nodes without outgoing edges are not present in the graph
+    no_edges = {}
+
+    def get_neighbors(node):
+        return weighted_graph.get(node, no_edges).items()
+
+    return find_path(get_neighbors, start, end)
+
+
+def find_path(get_neighbors, start, end):
+    """
+    Calculate the shortest path using a binary heap with lazy deletion.
+
+    The search stops as soon as ``end`` is taken from the heap,
+    so only the part of the graph closer to ``start`` than ``end``
+    is explored.
+
+    :param get_neighbors: callable returning an iterable of
+                          ``(neighbor, weight)`` pairs for a node
+    :param start: starting node
+    :param end: ending node
+    :return: ``(distance, path)`` or ``(None, None)``, if there is no path
     """
 
-    # We always need to visit the start
-    nodes_to_visit = {start}
-    visited_nodes = set()
-    # Distance from start to start is 0
     distance_from_start = {start: 0}
     tentative_parents = {}
+    visited_nodes = set()
+    # The counter breaks ties so that nodes never have to be comparable
+    tie_breaker = count()
+    heap = [(0, next(tie_breaker), start)]
 
-    while nodes_to_visit:
-        # The next node should be the one with the smallest weight
-        current = min(
-            [(distance_from_start[node], node) for node in nodes_to_visit]
-        )[1]
+    while heap:
+        distance, _, current = heappop(heap)
+        if current in visited_nodes:
+            # Stale entry left behind by a later improvement
+            continue
 
         # The end was reached
         if current == end:
-            break
+            return distance, _deconstruct_path(tentative_parents, start, end)
+
+        visited_nodes.add(current)
+
+        for neighbor, weight in get_neighbors(current):
+            if neighbor in visited_nodes:
+                continue
+            neighbor_distance = distance + weight
+            if neighbor_distance < distance_from_start.get(
+                    neighbor, float('inf')):
+                distance_from_start[neighbor] = neighbor_distance
+                tentative_parents[neighbor] = current
+                heappush(
+                    heap, (neighbor_distance, next(tie_breaker), neighbor)
+                )
+
+    return None, None
+
+
+def find_paths(get_neighbors, start, ends):
+    """
+    Calculate the shortest paths from ``start`` to several nodes at once.
+
+    A single search tree serves all of ``ends``; the search stops
+    as soon as all of them are reached.
+
+    :param get_neighbors: callable returning an iterable of
+                          ``(neighbor, weight)`` pairs for a node
+    :param start: starting node
+    :param ends: iterable of ending nodes
+    :return: ``{end: (distance, path)}``, ``(None, None)``
+             for unreachable ends
+    """
+
+    remaining = set(ends)
+    results = dict.fromkeys(remaining, (None, None))
+    distance_from_start = {start: 0}
+    tentative_parents = {}
+    visited_nodes = set()
+    tie_breaker = count()
+    heap = [(0, next(tie_breaker), start)]
+
+    while heap and remaining:
+        distance, _, current = heappop(heap)
+        if current in visited_nodes:
+            continue
+
+        if current in remaining:
+            remaining.discard(current)
+            results[current] = (
+                distance,
+                _deconstruct_path(tentative_parents, start, current)
+            )
 
-        nodes_to_visit.discard(current)
         visited_nodes.add(current)
 
-        edges = weighted_graph[current]
-        unvisited_neighbors = set(edges).difference(visited_nodes)
-        for neighbor in unvisited_neighbors:
-            neighbor_distance = distance_from_start[current] + edges[neighbor]
+        for neighbor, weight in get_neighbors(current):
+            if neighbor in visited_nodes:
+                continue
+            neighbor_distance = distance + weight
             if neighbor_distance < distance_from_start.get(
                     neighbor, float('inf')):
                 distance_from_start[neighbor] = neighbor_distance
                 tentative_parents[neighbor] = current
-                nodes_to_visit.add(neighbor)
+                heappush(
+                    heap, (neighbor_distance, next(tie_breaker), neighbor)
+                )
 
-    return distance_from_start[end], _deconstruct_path(tentative_parents, end)
+    return results
 
 
-def _deconstruct_path(tentative_parents, end):
-    if end not in tentative_parents:
-        return None
+def _deconstruct_path(tentative_parents, start, end):
     cursor = end
-    path = []
-    while cursor:
+    path = [cursor]
+    while cursor != start:
+        cursor = tentative_parents[cursor]
         path.append(cursor)
-        cursor = tentative_parents.get(cursor)
     return list(reversed(path))
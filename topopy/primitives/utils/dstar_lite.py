@@ -0,0 +1,189 @@
+from heapq import heappop, heappush
+from itertools import count
+
+INF = float('inf')
+#: Relative tolerance of key comparisons
+EPSILON = 1e-9
+
+
+def _key_less(a, b):
+    """
+    Compare keys, treating nearly equal floats as equal: the sums
+    in keys are rounded differently along different paths, and
+    stopping on a rounding error leaves the start inconsistent.
+    """
+    for x, y in zip(a, b):
+        tolerance = EPSILON * max(1, abs(y)) if y != INF else 0
+        if x < y - tolerance:
+            return True
+        if x > y + tolerance:
+            return False
+    return False
+
+
+class DStarLite:
+    """
+    D* Lite incremental search (Koenig & Likhachev, 2002).
+
+    The search runs backwards from ``goal``, so the start can move
+    freely (``move_to``) and changed edge costs are repaired locally
+    (``update_nodes``) instead of searching from scratch.
+
+    :param get_neighbors: callable returning an iterable of
+                          ``(neighbor, weight)`` pairs for a node
+    :param get_predecessors: callable returning an iterable of
+                             ``(predecessor, weight)`` pairs for a node
+    :param heuristic: consistent lower bound ``heuristic(a, b)``
+                      of the distance between two nodes
+    """
+
+    def __init__(self, get_neighbors, get_predecessors, start, goal,
+                 heuristic):
+        self.get_neighbors = get_neighbors
+        self.get_predecessors = get_predecessors
+        self.heuristic = heuristic
+        self.start = start
+        self.goal = goal
+        self.expanded = 0
+        self._last_start = start
+        self._km = 0
+        self._g = {}
+        self._rhs = {goal: 0}
+        self._open = {}
+        self._heap = []
+        self._tie_breaker = count()
+        self._push(goal, (heuristic(start, goal), 0))
+
+    def _push(self, node, key):
+        self._open[node] = key
+        heappush(self._heap, (key, next(self._tie_breaker), node))
+
+    def _top_key(self):
+        heap = self._heap
+        while heap:
+            key, _, node = heap[0]
+            if self._open.get(node) == key:
+                return key
+            # Stale entry: the node was removed or got a new key
+            heappop(heap)
+        return INF, INF
+
+    def _calculate_key(self, node):
+        g_rhs = min(self._g.get(node, INF), self._rhs.get(node, INF))
+        return g_rhs + self.heuristic(self.start, node) + self._km, g_rhs
+
+    def _update_node(self, node):
+        if node != self.goal:
+            g = self._g
+            self._rhs[node] = min(
+                (weight + g.get(neighbor, INF)
+                 for neighbor, weight in self.get_neighbors(node)),
+                default=INF
+            )
+        self._open.pop(node, None)
+        if self._g.get(node, INF) != self._rhs.get(node, INF):
+            self._push(node, self._calculate_key(node))
+
+    def compute(self, complete: bool=False):
+        """
+        Repair the search tree until the start is consistent, or until
+        every node is if ``complete`` is set
+        """
+        g, rhs, start = self._g, self._rhs, self.start
+        while self._open if complete else (
+                _key_less(self._top_key(), self._calculate_key(start)) or
+                rhs.get(start, INF) != g.get(start, INF)
+        ):
+            old_key, _, node = heappop(self._heap)
+            if self._open.get(node) != old_key:
+                continue
+            self.expanded += 1
+            new_key = self._calculate_key(node)
+            if _key_less(old_key, new_key):
+                self._push(node, new_key)
+            elif g.get(node, INF) > rhs.get(node, INF):
+                del self._open[node]
+                g[node] = rhs[node]
+                for predecessor, _ in self.get_predecessors(node):
+                    self._update_node(predecessor)
+            else:
+                del self._open[node]
+                g[node] = INF
+                for predecessor, _ in self.get_predecessors(node):
+                    self._update_node(predecessor)
+                self._update_node(node)
+
+    def move_to(self, start):
+        """Move the start of the search (e.g. after an actor moved)"""
+        if start == self.start:
+            return
+        self.start = start
+        self._km += self.heuristic(self._last_start, start)
+        self._last_start = start
+
+    def update_nodes(self, nodes):
+        """Notify the search that outgoing edges of ``nodes`` changed"""
+        for node in nodes:
+            self._update_node(node)
+
+    def get_path(self):
+        """
+        Return ``(distance, path)`` from the current start to the goal,
+        or ``(None, None)`` if there is no path.
+        """
+        self.compute()
+        path = self._extract_path()
+        if path is None:
+            # Should not happen, but never report a path or its absence
+            # from an inconsistent tree
+            self.compute(complete=True)
+            path = self._extract_path()
+        distance = self._g.get(self.start, INF)
+        if distance == INF or path is None:
+            return None, None
+        return distance, path
+
+    def _extract_path(self):
+        """
+        Follow the g values from the start to the goal, depth first so
+        that zero-cost edges between nodes of equal g cannot make the
+        walk cycle. Return None if the path goes through an inconsistent
+        node.
+        """
+        g, rhs, goal = self._g, self._rhs, self.goal
+        path = [self.start]
+        visited = {self.start}
+        # Nodes left to try after each node of the path, best last
+        choices = []
+        while path[-1] != goal:
+            node = path[-1]
+            if len(choices) < len(path):
+                g_node = g.get(node, INF)
+                if g_node != rhs.get(node, INF):
+                    return None
+                if g_node == INF:
+                    return path
+                # Edges on shortest paths, costlier steps first on ties
+                # as they lead to nodes closer to the goal
+                limit = g_node + EPSILON * max(1, g_node)
+                edges = sorted(
+                    self.get_neighbors(node),
+                    key=lambda edge: (edge[1] + g.get(edge[0], INF), -edge[1])
+                )
+                choices.append([
+                    neighbor for neighbor, weight in reversed(edges)
+                    if weight + g.get(neighbor, INF) <= limit
+                ])
+            candidates = choices[-1]
+            while candidates and candidates[-1] in visited:
+                candidates.pop()
+            if candidates:
+                node = candidates.pop()
+                visited.add(node)
+                path.append(node)
+            else:
+                choices.pop()
+                path.pop()
+                if not path:
+                    return None
+        return path
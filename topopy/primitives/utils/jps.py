@@ -0,0 +1,170 @@
+from heapq import heappop, heappush
+from itertools import count
+
+
+def _sign(value):
+    return (value > 0) - (value < 0)
+
+
+def find_path(walkable, start, end, straight=1, diagonal=2**0.5,
+              stats=None):
+    """
+    Calculate the shortest path on a uniform-cost 8-connected grid
+    using Jump Point Search (Harabor & Grastien, 2011).
+
+    Diagonal moves are allowed next to obstacles, like in
+    ``SimpleRectangularMovement``. Symmetric paths are pruned,
+    so only jump points are put into the open list.
+
+    :param walkable: callable ``walkable(x, y) -> bool``;
+                     must be ``False`` outside of the grid
+    :param start: starting cell ``(x, y)``
+    :param end: ending cell ``(x, y)``
+    :param straight: cost of a straight step
+    :param diagonal: cost of a diagonal step
+                     (no more than ``2 * straight``)
+    :param stats: optional dict that receives the number of
+                  ``expanded`` jump points
+    :return: ``(distance, [<start>, ... every cell ..., <end>])``
+             or ``(None, None)``, if there is no path
+    """
+
+    if start == end:
+        return 0, [start]
+    if not (walkable(*start) and walkable(*end)):
+        return None, None
+
+    def octile(a, b):
+        dx = abs(a[0] - b[0])
+        dy = abs(a[1] - b[1])
+        if dx < dy:
+            dx, dy = dy, dx
+        return straight * (dx - dy) + diagonal * dy
+
+    def jump(x, y, dx, dy):
+        """Follow direction (dx, dy) from (x, y) up to the next jump point"""
+        while True:
+            x += dx
+            y += dy
+            if not walkable(x, y):
+                return None
+            if (x, y) == end:
+                return x, y
+            if dx and dy:
+                if (
+                        (walkable(x - dx, y + dy) and
+                         not walkable(x - dx, y)) or
+                        (walkable(x + dx, y - dy) and
+                         not walkable(x, y - dy))
+                ):
+                    return x, y
+                # A straight jump point ahead makes this one a jump point
+                if jump(x, y, dx, 0) or jump(x, y, 0, dy):
+                    return x, y
+            elif dx:
+                if (
+                        (walkable(x + dx, y + 1) and
+                         not walkable(x, y + 1)) or
+                        (walkable(x + dx, y - 1) and
+                         not walkable(x, y - 1))
+                ):
+                    return x, y
+            else:
+                if (
+                        (walkable(x + 1, y + dy) and
+                         not walkable(x + 1, y)) or
+                        (walkable(x - 1, y + dy) and
+                         not walkable(x - 1, y))
+                ):
+                    return x, y
+
+    def directions(node, parent):
+        """Pruned set of directions to search from ``node``"""
+        x, y = node
+        if parent is None:
+            return [
+                (dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                if (dx or dy) and walkable(x + dx, y + dy)
+            ]
+
+        dx = _sign(x - parent[0])
+        dy = _sign(y - parent[1])
+        result = []
+        if dx and dy:
+            result.extend(((0, dy), (dx, 0), (dx, dy)))
+            if not walkable(x - dx, y):
+                result.append((-dx, dy))
+            if not walkable(x, y - dy):
+                result.append((dx, -dy))
+        elif dx:
+            result.append((dx, 0))
+            if not walkable(x, y + 1):
+                result.append((dx, 1))
+            if not walkable(x, y - 1):
+                result.append((dx, -1))
+        else:
+            result.append((0, dy))
+            if not walkable(x + 1, y):
+                result.append((1, dy))
+            if not walkable(x - 1, y):
+                result.append((-1, dy))
+        return result
+
+    distance_from_start = {start: 0}
+    parents = {start: None}
+    closed = set()
+    tie_breaker = count()
+    heap = [(octile(start, end), 0, next(tie_breaker), start)]
+    expanded = 0
+
+    while heap:
+        _, _, _, current = heappop(heap)
+        if current in closed:
+            continue
+        if current == end:
+            break
+        closed.add(current)
+        expanded += 1
+
+        distance = distance_from_start[current]
+        for dx, dy in directions(current, parents[current]):
+            jump_point = jump(current[0], current[1], dx, dy)
+            if jump_point is None or jump_point in closed:
+                continue
+            jump_distance = distance + octile(current, jump_point)
+            if jump_distance < distance_from_start.get(
+                    jump_point, float('inf')):
+                distance_from_start[jump_point] = jump_distance
+                parents[jump_point] = current
+                heappush(heap, (
+                    jump_distance + octile(jump_point, end),
+                    -jump_distance, next(tie_breaker), jump_point
+                ))
+    else:
+        if stats is not None:
+            stats['expanded'] = expanded
+        return None, None
+
+    if stats is not None:
+        stats['expanded'] = expanded
+    return distance_from_start[end], _expand_path(parents, end)
+
+
+def _expand_path(parents, end):
+    """Fill in the cells between consecutive jump points"""
+    jump_points = []
+    cursor = end
+    while cursor is not None:
+        jump_points.append(cursor)
+        cursor = parents[cursor]
+    jump_points.reverse()
+
+    path = [jump_points[0]]
+    for x1, y1 in jump_points[1:]:
+        x, y = path[-1]
+        dx, dy = _sign(x1 - x), _sign(y1 - y)
+        while (x, y) != (x1, y1):
+            x += dx
+            y += dy
+            path.append((x, y))
+    return path
@@ -1,7 +1,19 @@
-from typing import Any, Callable, List, Type
+import io
+import json
+import struct
+import zlib
+from itertools import islice
+from typing import (  # noqa
+    Any, BinaryIO, Callable, Dict, Generator, Iterable, List, Tuple, Type
+)
 
-from topopy.primitives.topology import Topology, RectangularTopology
-from topopy.primitives.tile import KeyTile
+import numpy as np
+
+from topopy.primitives.topology import (
+    HexTopology, NumpyRectangularTopology, RectangularTopology,
+    TileArrayMixin, Topology
+)
+from topopy.primitives.tile import KeyTile, TilePalette
 
 
 class TopologySerializer:
@@ -17,13 +29,26 @@ class TopologySerializer:
 
 
 class RectangularSerializerBase(TopologySerializer):
+    """
+    Base class for serializers of rectangular maps.
+
+    Topologies that store tiles as an array (see ``TileArrayMixin``)
+    share ``palette`` if one is given.
+    """
+
     topology_class = RectangularTopology
     tile_factory = KeyTile.from_key
 
     def __init__(self, topology_class: Type[RectangularTopology]=None,
-                 tile_factory: Callable=None):
+                 tile_factory: Callable=None, palette: TilePalette=None):
         self.topology_class = topology_class or self.topology_class
         self.tile_factory = tile_factory or self.tile_factory
+        self.palette = palette
+
+    def _create(self, matrix: List[List[KeyTile]]) -> 'RectangularTopology':
+        if self.palette is None:
+            return self.topology_class(matrix)
+        return self.topology_class(matrix, palette=self.palette)
 
 
 class RectangularCharSerializer(RectangularSerializerBase):
@@ -36,13 +61,119 @@ class RectangularCharSerializer(RectangularSerializerBase):
             [self.tile_factory(char) for char in line.strip(self.sep)]
             for line in data.strip(self.sep).split(self.sep)
         ]
-        return self.topology_class(matrix)
+        return self._create(matrix)
+
+    def iter_rows(self, lines: Iterable[str], palette: TilePalette
+                  ) -> Generator[np.ndarray, None, None]:
+        """
+        Convert lines of characters to arrays of ids into ``palette``,
+        which interns the new tiles. Empty lines are skipped.
+        """
+        # Character code -> tile id
+        ids = {}  # type: Dict[int, int]
+        for line in lines:
+            line = line.strip(self.sep)
+            if not line:
+                continue
+            codes = np.frombuffer(line.encode('utf-32-le'), dtype='<u4')
+            unique, first, inverse = np.unique(
+                codes, return_index=True, return_inverse=True
+            )
+            # New tiles get ids in the order they appear
+            for i in np.argsort(first).tolist():
+                code = int(unique[i])
+                if code not in ids:
+                    ids[code] = palette.get_id(self.tile_factory(chr(code)))
+            row_ids = np.array(
+                [ids[code] for code in unique.tolist()], dtype=np.uint16
+            )
+            yield row_ids[inverse]
+
+    def deserialize_stream(self, lines: Iterable[str], topology=None,
+                           block_size: int=1024) -> 'RectangularTopology':
+        """
+        Read a map row by row from a file object or iterable of lines.
+
+        Rows are converted to tile ids in bulk and copied into an array
+        that grows by at least ``block_size`` rows at a time, so memory
+        stays close to the size of the array. The array is passed to
+        ``topology_class.from_array``, or ``NumpyRectangularTopology``'s
+        if ``topology_class`` does not store tiles as an array. If
+        ``topology`` is given (e.g. a ``ChunkedTopology``), blocks of
+        ``block_size`` rows are written into it with ``write_array``
+        instead and it is returned.
+        """
+        palette = TilePalette() if self.palette is None else self.palette
+        rows = self.iter_rows(lines, palette)
+        if topology is None:
+            topology_class = self.topology_class
+            if not issubclass(topology_class, TileArrayMixin):
+                topology_class = NumpyRectangularTopology
+            return topology_class.from_array(
+                _stack_rows(rows, block_size), palette
+            )
+
+        x = 0
+        for block in iter(lambda: list(islice(rows, block_size)), []):
+            topology.write_array(np.array(block), palette, (x, 0))
+            x += len(block)
+        return topology
 
     def serialize(self, topology: RectangularTopology) -> str:
-        return self.sep.join([
-            ''.join([str(tile) for tile in row])
-            for row in topology.matrix
-        ])
+        return self.sep.join(self._iter_lines(topology))
+
+    def serialize_stream(self, topology: RectangularTopology
+                         ) -> Generator[str, None, None]:
+        """
+        Generate the rows of ``serialize`` one by one, each followed
+        by ``sep``, e.g. for ``file.writelines``.
+        """
+        sep = self.sep
+        for line in self._iter_lines(topology):
+            yield line + sep
+
+    def _iter_lines(self, topology: RectangularTopology
+                    ) -> Generator[str, None, None]:
+        keys = getattr(topology, 'keys', None)
+        if not isinstance(keys, np.ndarray):
+            for row in topology.matrix:
+                yield ''.join([str(tile) for tile in row])
+            return
+
+        chars = [str(tile) for tile in topology.palette]
+        if all(len(char) == 1 for char in chars):
+            # Convert whole rows of ids to character codes
+            codes = np.array([ord(char) for char in chars], dtype='<u4')
+            for row in keys:
+                yield codes[row].tobytes().decode('utf-32-le')
+        else:
+            for row in keys.tolist():
+                yield ''.join([chars[i] for i in row])
+
+
+def _stack_rows(rows: Iterable[np.ndarray], block_size: int) -> np.ndarray:
+    """
+    Copy rows of equal length into a 2D array, resized in place as it
+    fills up.
+    """
+    keys = None
+    count = 0
+    for row in rows:
+        if keys is None:
+            keys = np.empty((block_size, len(row)), dtype=row.dtype)
+        elif count == len(keys):
+            keys.resize(
+                (count + max(block_size, count // 2), keys.shape[1]),
+                refcheck=False
+            )
+        if len(row) != keys.shape[1]:
+            raise ValueError('Rows must be of the same length')
+        keys[count] = row
+        count += 1
+    if keys is None:
+        raise ValueError('No rows to read')
+    keys.resize((count, keys.shape[1]), refcheck=False)
+    return keys
 
 
 class RectangularKeySerializer(RectangularSerializerBase):
@@ -51,10 +182,161 @@ class RectangularKeySerializer(RectangularSerializerBase):
             [self.tile_factory(key) for key in row]
             for row in matrix
         ]
-        return self.topology_class(matrix)
+        return self._create(matrix)
 
     def serialize(self, topology: RectangularTopology) -> list:
         return [
             [tile.key for tile in row]
             for row in topology.matrix
         ]
+
+
+class RectangularBinarySerializer(RectangularSerializerBase):
+    """
+    Binary format for topologies that store tiles as an integer array
+    (see ``TileArrayMixin``).
+
+    The data starts with ``MAGIC``, the compression and the length of
+    a JSON header holding the shape, the dtype, the tile keys of
+    the palette and the layout of ``HexTopology`` maps (which load only
+    into ``HexTopology`` classes). The row-major array of tile ids
+    follows, aligned to ``ALIGNMENT`` bytes. It is stored raw,
+    zlib-compressed (``'zlib'``) or as runs of equal ids (``'rle'``,
+    see ``encode_runs``).
+
+    ``load`` maps uncompressed files to memory instead of reading them:
+    the topology is backed by the file pages and changes to it are
+    private (copy-on-write). Ids are converted, and so copied, only if
+    they differ in the shared ``palette``. Tile keys must be
+    JSON-serializable.
+    """
+
+    topology_class = NumpyRectangularTopology
+    compressions = {None: 0, 'zlib': 1, 'rle': 2}
+
+    MAGIC = b'TOPOPY\x00\x01'
+    ALIGNMENT = 64
+    #: Magic, compression and header length
+    _prefix = struct.Struct('<8sBxxxI')
+
+    def __init__(self, *args, compression: str=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if compression not in self.compressions:
+            raise ValueError(
+                'Unknown compression: {!r}'.format(compression)
+            )
+        self.compression = compression
+
+    def _encode_header(self, topology) -> bytes:
+        keys = topology.keys
+        header = {
+            'shape': keys.shape,
+            'dtype': keys.dtype.str,
+            'palette': [tile.key for tile in topology.palette],
+        }
+        if isinstance(topology, HexTopology):
+            header['layout'] = topology.layout
+        header = json.dumps(header).encode()
+        size = self._prefix.size + len(header)
+        # Pad the header so that the array starts aligned
+        header += b' ' * (-size % self.ALIGNMENT)
+        return self._prefix.pack(
+            self.MAGIC, self.compressions[self.compression], len(header)
+        ) + header
+
+    def _read_header(self, f: BinaryIO) -> Tuple[int, dict, int]:
+        """Return the compression, the header and the data offset"""
+        prefix = f.read(self._prefix.size)
+        if len(prefix) < self._prefix.size:
+            raise ValueError('Truncated data')
+        magic, compression, header_size = self._prefix.unpack(prefix)
+        if magic != self.MAGIC:
+            raise ValueError('Not a binary topology')
+        header = json.loads(f.read(header_size).decode())
+        return compression, header, self._prefix.size + header_size
+
+    def _create_from_array(self, header: dict, keys: np.ndarray
+                           ) -> 'RectangularTopology':
+        tiles = [self.tile_factory(key) for key in header['palette']]
+        keys = keys.reshape(header['shape'])
+        kwargs = {}
+        if 'layout' in header:
+            if not issubclass(self.topology_class, HexTopology):
+                raise ValueError(
+                    'Hex topology data cannot be loaded as {}'.format(
+                        self.topology_class.__name__
+                    )
+                )
+            kwargs['layout'] = header['layout']
+        if self.palette is None:
+            return self.topology_class.from_array(keys, tiles, **kwargs)
+        tile_ids = self.palette.get_ids(tiles)
+        if tile_ids != list(range(len(tile_ids))):
+            keys = np.array(tile_ids, dtype=keys.dtype)[keys]
+        return self.topology_class.from_array(keys, self.palette, **kwargs)
+
+    def deserialize(self, data: bytes) -> 'RectangularTopology':
+        compression, header, offset = self._read_header(io.BytesIO(data))
+        dtype = np.dtype(header['dtype'])
+        payload = memoryview(data)[offset:]
+        # Arrays over ``bytes`` are read-only, hence the copies
+        if compression == self.compressions['zlib']:
+            keys = np.frombuffer(zlib.decompress(payload), dtype).copy()
+        elif compression == self.compressions['rle']:
+            keys = decode_runs(payload, dtype)
+        else:
+            keys = np.frombuffer(payload, dtype).copy()
+        return self._create_from_array(header, keys)
+
+    def serialize(self, topology: 'RectangularTopology') -> bytes:
+        keys = np.ascontiguousarray(topology.keys)
+        if self.compression == 'zlib':
+            payload = zlib.compress(keys.tobytes())
+        elif self.compression == 'rle':
+            payload = encode_runs(keys.ravel())
+        else:
+            payload = keys.tobytes()
+        return self._encode_header(topology) + payload
+
+    def save(self, topology: 'RectangularTopology', path: str):
+        with open(path, 'wb') as f:
+            f.write(self.serialize(topology))
+
+    def load(self, path: str, mmap: bool=True) -> 'RectangularTopology':
+        """
+        Load a topology from a file, mapping it to memory if ``mmap`` is
+        set and the file is not compressed.
+        """
+        with open(path, 'rb') as f:
+            compression, header, offset = self._read_header(f)
+            if not mmap or compression != self.compressions[None]:
+                f.seek(0)
+                return self.deserialize(f.read())
+        keys = np.memmap(
+            path, dtype=np.dtype(header['dtype']), mode='c', offset=offset,
+            shape=tuple(header['shape'])
+        )
+        return self._create_from_array(header, keys)
+
+
+def encode_runs(keys: np.ndarray) -> bytes:
+    """
+    Encode a 1D array as runs of equal values: the number of runs,
+    the run lengths (``int64``) and the values.
+    """
+    if not len(keys):
+        return struct.pack('<Q', 0)
+    starts = np.flatnonzero(np.diff(keys)) + 1
+    starts = np.concatenate(([0], starts))
+    lengths = np.diff(np.append(starts, len(keys))).astype('<i8')
+    return struct.pack('<Q', len(starts)) + lengths.tobytes() + \
+        keys[starts].tobytes()
+
+
+def decode_runs(data: bytes, dtype: np.dtype) -> np.ndarray:
+    (count,) = struct.unpack_from('<Q', data)
+    lengths = np.frombuffer(data, dtype='<i8', count=count, offset=8)
+    values = np.frombuffer(
+        data, dtype=dtype, count=count, offset=8 + lengths.nbytes
+    )
+    return np.repeat(values, lengths)
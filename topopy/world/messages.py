@@ -14,3 +14,14 @@ class InhabitCell(Message):
 class VacateCell(Message):
     __slots__ = ()
     fields = ('loc',)
+
+
+class OccupancyDelta(Message):
+    """
+    Moves applied by a ``TickWorld`` in a tick: ``moves`` maps actor
+    ids to ``(old_loc, new_loc)`` (``None`` outside of the world) and
+    ``rejected`` lists the actors whose moves were refused.
+    """
+
+    __slots__ = ()
+    fields = ('tick', 'moves', 'rejected')
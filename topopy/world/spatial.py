@@ -0,0 +1,224 @@
+import heapq
+from itertools import count
+from typing import Any, Dict, Iterator, List, Optional, Tuple  # noqa
+
+from topopy.primitives.location import Location
+
+BucketCoord = Tuple[int, int]
+
+
+class SpatialIndex:
+    """
+    Locations of actors, for queries by area.
+
+    Locations are 2D points ``(x, y)`` and distances are Euclidean.
+    An actor has at most one location.
+    """
+
+    __slots__ = ()
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __contains__(self, actor_id: Any) -> bool:
+        raise NotImplementedError
+
+    def get_location(self, actor_id: Any) -> Optional[Location]:
+        raise NotImplementedError
+
+    def move(self, actor_id: Any, loc: Location):
+        """Add an actor at ``loc`` or move it there"""
+        raise NotImplementedError
+
+    def remove(self, actor_id: Any):
+        """Remove an actor if it is in the index"""
+        raise NotImplementedError
+
+    def query_rect(self, min_x: int, min_y: int, max_x: int, max_y: int
+                   ) -> List[Any]:
+        """Return the actors with ``min_x <= x <= max_x`` and same for y"""
+        raise NotImplementedError
+
+    def query_radius(self, loc: Location, radius: float) -> List[Any]:
+        """Return the actors at most ``radius`` away from ``loc``"""
+        x, y = loc
+        r = int(radius)
+        radius_sq = radius * radius
+        locs = self._get_locations()
+        return [
+            actor_id
+            for actor_id in self.query_rect(x - r, y - r, x + r, y + r)
+            if _distance_sq(locs[actor_id], x, y) <= radius_sq
+        ]
+
+    def nearest(self, loc: Location, k: int=1) -> List[Any]:
+        """Return the ``k`` actors nearest to ``loc``, nearest first"""
+        locs = self._get_locations()
+        x, y = loc
+        return heapq.nsmallest(
+            k, locs, key=lambda actor_id: _distance_sq(locs[actor_id], x, y)
+        )
+
+    def _get_locations(self) -> Dict[Any, Location]:
+        raise NotImplementedError
+
+
+def _distance_sq(loc: Location, x: int, y: int) -> int:
+    dx = loc[0] - x
+    dy = loc[1] - y
+    return dx * dx + dy * dy
+
+
+class GridSpatialIndex(SpatialIndex):
+    """
+    Spatial index that hashes locations to square buckets of
+    ``cell_size`` by ``cell_size`` tiles.
+
+    Moves within a bucket only update the location of the actor.
+    Queries visit the buckets that overlap the queried area, or all
+    occupied buckets if there are fewer of them. ``cell_size`` should
+    be close to the usual query radius.
+    """
+
+    __slots__ = 'cell_size', '_locs', '_buckets'
+
+    def __init__(self, cell_size: int=16):
+        if cell_size < 1:
+            raise ValueError('Cell size must be positive')
+        self.cell_size = cell_size
+        self._locs = {}  # type: Dict[Any, Location]
+        self._buckets = {}  # type: Dict[BucketCoord, Dict[Any, Location]]
+
+    def __len__(self) -> int:
+        return len(self._locs)
+
+    def __contains__(self, actor_id: Any) -> bool:
+        return actor_id in self._locs
+
+    def get_location(self, actor_id: Any) -> Optional[Location]:
+        return self._locs.get(actor_id)
+
+    def _get_locations(self) -> Dict[Any, Location]:
+        return self._locs
+
+    def _get_bucket_coord(self, loc: Location) -> BucketCoord:
+        return loc[0] // self.cell_size, loc[1] // self.cell_size
+
+    def move(self, actor_id: Any, loc: Location):
+        coord = self._get_bucket_coord(loc)
+        old_loc = self._locs.get(actor_id)
+        if old_loc is not None:
+            old_coord = self._get_bucket_coord(old_loc)
+            if old_coord != coord:
+                self._remove_from_bucket(old_coord, actor_id)
+        bucket = self._buckets.get(coord)
+        if bucket is None:
+            bucket = self._buckets[coord] = {}
+        bucket[actor_id] = loc
+        self._locs[actor_id] = loc
+
+    def remove(self, actor_id: Any):
+        loc = self._locs.pop(actor_id, None)
+        if loc is not None:
+            self._remove_from_bucket(self._get_bucket_coord(loc), actor_id)
+
+    def _remove_from_bucket(self, coord: BucketCoord, actor_id: Any):
+        bucket = self._buckets[coord]
+        del bucket[actor_id]
+        if not bucket:
+            del self._buckets[coord]
+
+    def _iter_buckets(self, min_coord: BucketCoord, max_coord: BucketCoord
+                      ) -> Iterator[Dict[Any, Location]]:
+        """Generate the occupied buckets between two bucket coordinates"""
+        min_cx, min_cy = min_coord
+        max_cx, max_cy = max_coord
+        buckets = self._buckets
+        if (max_cx - min_cx + 1) * (max_cy - min_cy + 1) > len(buckets):
+            for (cx, cy), bucket in buckets.items():
+                if min_cx <= cx <= max_cx and min_cy <= cy <= max_cy:
+                    yield bucket
+            return
+
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                bucket = buckets.get((cx, cy))
+                if bucket is not None:
+                    yield bucket
+
+    def query_rect(self, min_x: int, min_y: int, max_x: int, max_y: int
+                   ) -> List[Any]:
+        found = []
+        for bucket in self._iter_buckets(
+                self._get_bucket_coord((min_x, min_y)),
+                self._get_bucket_coord((max_x, max_y))):
+            for actor_id, (x, y) in bucket.items():
+                if min_x <= x <= max_x and min_y <= y <= max_y:
+                    found.append(actor_id)
+        return found
+
+    def query_radius(self, loc: Location, radius: float) -> List[Any]:
+        x, y = loc
+        r = int(radius)
+        radius_sq = radius * radius
+        found = []
+        for bucket in self._iter_buckets(
+                self._get_bucket_coord((x - r, y - r)),
+                self._get_bucket_coord((x + r, y + r))):
+            for actor_id, actor_loc in bucket.items():
+                if _distance_sq(actor_loc, x, y) <= radius_sq:
+                    found.append(actor_id)
+        return found
+
+    def nearest(self, loc: Location, k: int=1) -> List[Any]:
+        """
+        Return the ``k`` actors nearest to ``loc``, nearest first.
+
+        Rings of buckets around ``loc`` are searched until the ``k``
+        nearest actors found so far are closer than any actor of
+        the next ring could be.
+        """
+        if k <= 0 or not self._locs:
+            return []
+        x, y = loc
+        cx, cy = self._get_bucket_coord(loc)
+        size = self.cell_size
+        buckets = self._buckets
+        # Max-heap of (-distance, order, actor_id) of the nearest actors,
+        # ``order`` avoids comparing actor ids
+        best = []  # type: List[Tuple[int, int, Any]]
+        order = count()
+        seen = 0
+        ring = 0
+        while seen < len(self._locs):
+            if (2 * ring + 1)**2 > len(buckets):
+                # Rings are larger than the occupied area
+                return super().nearest(loc, k)
+            if ring:
+                coords = [
+                    (cx + dx, cy + dy)
+                    for dx in range(-ring, ring + 1)
+                    for dy in ((-ring, ring) if abs(dx) < ring
+                               else range(-ring, ring + 1))
+                ]
+            else:
+                coords = [(cx, cy)]
+            for coord in coords:
+                bucket = buckets.get(coord)
+                if bucket is None:
+                    continue
+                seen += len(bucket)
+                for actor_id, actor_loc in bucket.items():
+                    item = (
+                        -_distance_sq(actor_loc, x, y), next(order), actor_id
+                    )
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item[0] > best[0][0]:
+                        heapq.heapreplace(best, item)
+            # Actors of the next rings are at least this far
+            bound = ring * size
+            if len(best) == k and -best[0][0] <= bound * bound:
+                break
+            ring += 1
+        return [actor_id for _, _, actor_id in sorted(best, reverse=True)]
@@ -1,15 +1,23 @@
 import asyncio
 from collections import namedtuple
-from typing import Any, Awaitable, Dict, List, Optional, Union  # noqa
+from itertools import chain
+from typing import (  # noqa
+    Any, Awaitable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+)
+
+import numpy as np
 
 from topopy.control.actor import Actor, ActorDispatcherBase, methdispatch
 from topopy.control.client import ClientBase
 from topopy.control.message import Message
 from topopy.primitives.location import Location
-from topopy.primitives.topology import Topology
+from topopy.primitives.topology import (
+    RectangularTopology, TileArrayMixin, Topology
+)
 from topopy.primitives.movement import MovementStrategy
 from topopy.utils.methdispatch import methdispatch
 from . import messages
+from .spatial import GridSpatialIndex, SpatialIndex
 
 
 class TopoActor(Actor):
@@ -30,7 +38,11 @@ class TopoActor(Actor):
 
     @property
     def loc(self):
-        return self.loc
+        return self._loc
+
+    @property
+    def movement_strategies(self) -> Dict[Any, MovementStrategy]:
+        return self._movement_strategies
 
     def inhabit_location(self, loc: Location):
         self.send(messages.InhabitCell(loc=loc))
@@ -39,23 +51,18 @@ class TopoActor(Actor):
         self.send(messages.VacateCell(loc=loc))
 
     def check_movement(self, loc: Location) -> bool:
-        """Check whether actor can move to a given location"""
+        """
+        Check whether actor can move to a given location
+        (see ``World.check_movements`` to check many actors at once)
+        """
         if not self._movement_strategies:
             return False
 
-        old_world_loc = self._world.get_location(self.loc)
-        new_world_loc = self._world.get_location(loc)
-        for topo, movement in self._movement_strategies.items():
-            passability = movement.get_passability(
-                from_loc=self._loc,
-                to_loc=loc,
-                from_tile=old_world_loc.tiles[topo],
-                to_tile=new_world_loc.tiles[topo]
-            )
-            if passability is None:
-                return False
-
-        return True
+        topologies = self._world.topologies
+        return all(
+            _check_movement(topologies[topo], movement, self._loc, loc)
+            for topo, movement in self._movement_strategies.items()
+        )
 
     def move_to(self, loc: Location):
         """
@@ -70,6 +77,30 @@ class TopoActor(Actor):
         self._loc = loc
 
 
+def _check_movement(topology: Topology, movement: MovementStrategy,
+                    from_loc: Location, to_loc: Location) -> bool:
+    if isinstance(topology, RectangularTopology) and min(
+            *from_loc, *to_loc) < 0:
+        # Negative indices would wrap around the matrix
+        return False
+    try:
+        from_tile = topology[from_loc]
+        to_tile = topology[to_loc]
+    except IndexError:
+        return False
+    return movement.get_passability(
+        from_loc=from_loc, to_loc=to_loc,
+        from_tile=from_tile, to_tile=to_tile
+    ) is not None
+
+
+def _to_array(locs: List[Location]) -> np.ndarray:
+    """Return the coordinates of 2D locations as an ``(n, 2)`` array"""
+    return np.fromiter(
+        chain.from_iterable(locs), dtype=np.int64, count=2 * len(locs)
+    ).reshape(-1, 2)
+
+
 WorldLocation = namedtuple(
     'WorldLocation', (
         'actors',
@@ -84,23 +115,124 @@ class WorldBase(Actor):
             loop: asyncio.BaseEventLoop,
             client: ClientBase,
             topologies: Dict[Any, Topology],
-            actors: Union[List[Actor], Dict[Actor]]
+            actors: Union[List[Actor], Dict[Any, Actor]],
+            spatial_index: SpatialIndex=None
     ):
         super().__init__(loop=loop, client=client)
 
         if isinstance(actors, list):
-            actors = {a.id: actors for a in actors}
+            actors = {a.id: a for a in actors}
 
         self.topologies = topologies
         self.actors = actors
         self.actors_by_loc = {}  # type: Dict[Location, List[Any]]
+        # Locations of the actors in ``actors_by_loc``, for area queries
+        self.spatial_index = spatial_index or GridSpatialIndex()
+
+    def get_actors_in_rect(self, min_x: int, min_y: int, max_x: int,
+                           max_y: int) -> List[Any]:
+        return self.spatial_index.query_rect(min_x, min_y, max_x, max_y)
+
+    def get_actors_in_radius(self, loc: Location, radius: float
+                             ) -> List[Any]:
+        return self.spatial_index.query_radius(loc, radius)
+
+    def get_nearest_actors(self, loc: Location, k: int=1) -> List[Any]:
+        return self.spatial_index.nearest(loc, k)
 
     def get_location(self, loc: Location) -> WorldLocation:
         return WorldLocation(
-            actors=self.actors_by_loc[loc],
-            tiles={name: topo[loc] for name, topo in self.topologies},
+            actors=self.actors_by_loc.get(loc, []),
+            tiles={name: topo[loc] for name, topo in self.topologies.items()},
         )
 
+    def check_movements(self, actor_ids: Sequence[Any],
+                        target_locs: Sequence[Location]) -> np.ndarray:
+        """
+        Check whether each actor can move to its target location, like
+        ``TopoActor.check_movement``, and return a boolean mask.
+
+        Moves are grouped by topology and movement strategy. Moves to
+        adjacent cells of array-backed topologies are looked up in
+        compiled cost tables all at once; other moves are checked one
+        by one. Actors without a location can move anywhere, and moves
+        out of a topology are impossible.
+        """
+        actors = list(map(self.actors.__getitem__, actor_ids))
+        from_locs = [actor.loc for actor in actors]
+        strategies = [actor.movement_strategies for actor in actors]
+        count = len(actors)
+        mask = np.fromiter(map(bool, strategies), dtype=bool, count=count)
+        checked = np.flatnonzero(mask & np.fromiter(
+            (loc is not None for loc in from_locs), dtype=bool, count=count
+        ))
+
+        # Group the moves by movement strategies, then by topology name
+        # and movement
+        by_strategies = {}  # type: Dict[Tuple, List[int]]
+        for i in checked.tolist():
+            key = tuple(strategies[i].items())
+            indices = by_strategies.get(key)
+            if indices is None:
+                indices = by_strategies[key] = []
+            indices.append(i)
+        groups = {}  # type: Dict[Tuple[Any, MovementStrategy], List]
+        for items, indices in by_strategies.items():
+            for key in items:
+                groups.setdefault(key, []).append(indices)
+
+        for (name, movement), parts in groups.items():
+            indices = list(chain.from_iterable(parts))
+            mask[indices] &= self._check_movements(
+                self.topologies[name], movement,
+                [from_locs[i] for i in indices],
+                [target_locs[i] for i in indices]
+            )
+        return mask
+
+    def _check_movements(self, topology: Topology,
+                         movement: MovementStrategy,
+                         from_locs: List[Location], to_locs: List[Location]
+                         ) -> np.ndarray:
+        compiled = None
+        if isinstance(topology, TileArrayMixin):
+            compiled = movement.compile(topology.palette, topology.directions)
+        if compiled is None:
+            return np.array([
+                _check_movement(topology, movement, from_loc, to_loc)
+                for from_loc, to_loc in zip(from_locs, to_locs)
+            ], dtype=bool)
+
+        src = _to_array(from_locs)
+        dst = _to_array(to_locs)
+        directions = np.array(topology.directions, dtype=np.int64)
+        matches = ((dst - src)[:, None, :] == directions).all(axis=2)
+        adjacent = matches.any(axis=1)
+
+        keys = topology.keys
+        src_rows, src_cols = topology.get_cells(src)
+        dst_rows, dst_cols = topology.get_cells(dst)
+        row_limit, col_limit = keys.shape
+        inside = (
+            (src_rows >= 0) & (src_rows < row_limit) &
+            (src_cols >= 0) & (src_cols < col_limit) &
+            (dst_rows >= 0) & (dst_rows < row_limit) &
+            (dst_cols >= 0) & (dst_cols < col_limit)
+        )
+        result = np.zeros(len(src), dtype=bool)
+        table = adjacent & inside
+        result[table] = np.isfinite(compiled.costs[
+            keys[src_rows[table], src_cols[table]],
+            keys[dst_rows[table], dst_cols[table]],
+            matches[table].argmax(axis=1)
+        ])
+        # Moves that the table does not cover, such as jumps
+        for i in np.flatnonzero(inside & ~adjacent).tolist():
+            result[i] = _check_movement(
+                topology, movement, from_locs[i], to_locs[i]
+            )
+        return result
+
     def __getitem__(self, key):
         if isinstance(key, Location):
             return self.get_location(key)
@@ -140,7 +272,8 @@ class WorldDispatcher(ActorDispatcherBase):
         if loc not in self.world.actors_by_loc:
             self.world.actors_by_loc[loc] = []
 
-        self.world.actors_by_loc[loc] = message.actor_id
+        self.world.actors_by_loc[loc].append(message.actor_id)
+        self.world.spatial_index.move(message.actor_id, loc)
 
     @dispatch.register(messages.VacateCell)
     def vacate_cell(self, message):
@@ -148,7 +281,152 @@ class WorldDispatcher(ActorDispatcherBase):
         self.world.actors_by_loc[loc].remove(message.actor_id)
         if not self.world.actors_by_loc[loc]:
             del self.world.actors_by_loc[loc]
+        if self.world.spatial_index.get_location(message.actor_id) == loc:
+            self.world.spatial_index.remove(message.actor_id)
 
 
 class World(WorldBase):
     __dispatcher_class__ = WorldDispatcher
+
+
+class TickWorldDispatcher(WorldDispatcher):
+    @methdispatch
+    def dispatch(self, message: Message) -> Optional[Awaitable]:
+        return super().dispatch(message)
+
+    @dispatch.register(messages.InhabitCell)
+    @dispatch.register(messages.VacateCell)
+    def buffer_movement(self, message):
+        self.world.pending.append((
+            message.actor_id, message['loc'],
+            isinstance(message, messages.InhabitCell)
+        ))
+
+
+class TickWorld(WorldBase):
+    """
+    World that applies movements once per tick.
+
+    ``InhabitCell`` and ``VacateCell`` messages are only buffered
+    in ``pending``, as are moves passed to ``request_moves`` without
+    messages. ``tick`` turns them into one move per actor, from its
+    current location to the last one it inhabited (or ``None`` if it
+    only vacated its cell), and applies all moves at once.
+
+    A cell holds at most ``cell_capacity`` actors after a tick
+    (no limit if ``None``). Cells freed during the tick can be entered.
+    If too many actors enter a cell, the ones that asked last are
+    rejected and stay where they were, which may in turn reject actors
+    that were entering their cells.
+
+    Every tick publishes one ``OccupancyDelta`` to ``delta_channel``.
+    """
+
+    __dispatcher_class__ = TickWorldDispatcher
+
+    def __init__(self, *args, cell_capacity: Optional[int]=1,
+                 delta_channel: str='world', **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cell_capacity = cell_capacity
+        self.delta_channel = delta_channel
+        # (actor id, location, whether the actor inhabits or vacates it)
+        self.pending = []  # type: List[Tuple[Any, Location, bool]]
+        self.tick_count = 0
+
+    def request_moves(self, moves: Iterable[Tuple[Any, Location]]):
+        """
+        Buffer ``(actor_id, loc)`` moves for the next tick, as if
+        the actors sent ``VacateCell`` and ``InhabitCell`` messages.
+        """
+        self.pending.extend(
+            (actor_id, loc, True) for actor_id, loc in moves
+        )
+
+    def _collect_moves(self) -> Dict[Any, Tuple[Location, Location]]:
+        """Return ``(old_loc, new_loc)`` of every actor that moves"""
+        get_location = self.spatial_index.get_location
+        # Actor id -> (old location, location after its messages so far)
+        moves = {}  # type: Dict[Any, Tuple[Location, Location]]
+        for actor_id, loc, inhabit in self.pending:
+            old_loc, new_loc = moves.get(actor_id) or (
+                (get_location(actor_id),) * 2
+            )
+            if inhabit:
+                new_loc = loc
+            elif new_loc == loc:
+                new_loc = None
+            # Moves are kept in the order of the last request
+            moves.pop(actor_id, None)
+            moves[actor_id] = (old_loc, new_loc)
+        return {
+            actor_id: move for actor_id, move in moves.items()
+            if move[0] != move[1]
+        }
+
+    def _resolve_conflicts(self, moves: Dict[Any, Tuple[Location, Location]]
+                           ) -> List[Any]:
+        """Remove the moves that overfill cells and return their actors"""
+        capacity = self.cell_capacity
+        if capacity is None:
+            return []
+        actors_by_loc = self.actors_by_loc
+        # Actors that will be in each cell entered by some actor
+        occupants = {}  # type: Dict[Location, List[Any]]
+        for actor_id, (_, new_loc) in moves.items():
+            if new_loc is not None and new_loc not in occupants:
+                occupants[new_loc] = [
+                    other for other in actors_by_loc.get(new_loc, ())
+                    if other not in moves
+                ]
+        for actor_id, (_, new_loc) in moves.items():
+            if new_loc is not None:
+                occupants[new_loc].append(actor_id)
+
+        rejected = []  # type: List[Any]
+        overfilled = [loc for loc in occupants]
+        while overfilled:
+            loc = overfilled.pop()
+            cell = occupants[loc]
+            while len(cell) > capacity and cell[-1] in moves:
+                actor_id = cell.pop()
+                old_loc = moves.pop(actor_id)[0]
+                rejected.append(actor_id)
+                if old_loc in occupants:
+                    # The actor stays, so its cell may be overfilled
+                    occupants[old_loc].insert(0, actor_id)
+                    overfilled.append(old_loc)
+        return rejected
+
+    def tick(self) -> messages.OccupancyDelta:
+        """Apply the pending movements and publish their delta"""
+        moves = self._collect_moves()
+        self.pending = []
+        rejected = self._resolve_conflicts(moves)
+
+        actors_by_loc = self.actors_by_loc
+        spatial_index = self.spatial_index
+        for actor_id, (old_loc, new_loc) in moves.items():
+            if old_loc is not None:
+                cell = actors_by_loc[old_loc]
+                cell.remove(actor_id)
+                if not cell:
+                    del actors_by_loc[old_loc]
+            if new_loc is None:
+                spatial_index.remove(actor_id)
+            else:
+                actors_by_loc.setdefault(new_loc, []).append(actor_id)
+                spatial_index.move(actor_id, new_loc)
+
+        self.tick_count += 1
+        delta = messages.OccupancyDelta(
+            self, tick=self.tick_count, moves=moves, rejected=rejected
+        )
+        if self.client is not None:
+            self.send_nowait(self.delta_channel, delta)
+        return delta
+
+    async def run(self, interval: float):
+        """Tick every ``interval`` seconds"""
+        while True:
+            self.tick()
+            await asyncio.sleep(interval)